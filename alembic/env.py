@@ -52,6 +52,10 @@ for plugin_dir in glob('backend/plugins/*/db/versions'):
 config.set_main_option('version_locations', os.pathsep.join(versions_locations))
 context.script.version_locations = versions_locations
 
+# the job store table of the scheduler is created by APScheduler, not by the migrations
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == "table" and name == "apscheduler_jobs")
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -68,6 +72,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -91,7 +96,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
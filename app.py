@@ -3,12 +3,16 @@ import os
 import logging
 import signal
 import sys
+import tempfile
 from flask import Flask
-from flask import request, abort
+from flask import request, abort, jsonify
 from logging.handlers import RotatingFileHandler
 from apscheduler.schedulers.background import BackgroundScheduler
-from backend.bot import Config, BotManager
-from security import verify_discourse_webhook_request, verify_ip_address, verify_discourse_instance
+from backend.bot import Config, BotManager, get_redis_client, scheduler_options
+from security import IPMatcher, verify_discourse_webhook_request, verify_ip_address, verify_discourse_instance
+from event_queue import EventQueue
+from webhook_dedup import WebhookDeduplicator
+from scheduler_leader import FileLeaderLock, RedisLeaderLock, SchedulerLeader
 
 # Set up logging
 logging.getLogger('werkzeug').setLevel(logging.WARNING)
@@ -27,48 +31,149 @@ root_logger.addHandler(file_handler)
 root_logger.addHandler(console_handler)
 
 # Set up the server
-scheduler = BackgroundScheduler()
-BotManager.register_jobs_to_scheduler(scheduler)
-scheduler.start()
+scheduler = BackgroundScheduler(**scheduler_options())
+
+# With several gunicorn workers or replicas, only the elected leader starts
+# the scheduler and registers the jobs, so that a single scheduler uses the
+# job store. Another worker takes over if the leader dies.
+def _start_scheduler():
+    # the jobs are registered once the scheduler is started, to find the stored ones
+    scheduler.start()
+    BotManager.register_jobs_to_scheduler(scheduler)
+
+
+def _on_elected():
+    if scheduler.running:
+        scheduler.resume()
+    else:
+        _start_scheduler()
+
+
+scheduler_leader = None
+if Config.server.scheduler_leader_election:
+    redis_client = get_redis_client()
+    if redis_client is not None:
+        leader_lock = RedisLeaderLock(
+            redis_client, key=f"scheduler_leader:{Config.site_url}", ttl=Config.server.scheduler_lock_ttl)
+    else:
+        leader_lock = FileLeaderLock(
+            Config.server.scheduler_lock_file or os.path.join(tempfile.gettempdir(), "bot_scheduler.lock"))
+    scheduler_leader = SchedulerLeader(
+        leader_lock,
+        on_elected=_on_elected,
+        on_demoted=scheduler.pause,
+        interval=Config.server.scheduler_lock_ttl / 3,
+    )
+    # the workers that are not elected never register the jobs
+    BotManager.delegate_scheduler()
+    scheduler_leader.start()
+else:
+    _start_scheduler()
+
+# Webhooks are acknowledged right away and dispatched by background workers,
+# so slow actions do not keep the Discourse request open
+event_queue = None
+if Config.server.event_queue_enabled:
+    event_queue = EventQueue(
+        BotManager.trigger_event,
+        max_size=Config.server.event_queue_size,
+        workers=Config.server.event_queue_workers,
+    )
+    event_queue.start()
+
+# Discourse redelivers webhooks on timeout, each event id is only handled once
+webhook_dedup = None
+if Config.server.webhook_dedup_enabled:
+    webhook_dedup = WebhookDeduplicator(
+        max_size=Config.server.webhook_dedup_size,
+        ttl=Config.server.webhook_dedup_ttl,
+        redis_client=get_redis_client() if Config.server.webhook_dedup_redis else None,
+    )
 
 # Graceful shutdown: stop scheduler on SIGTERM/SIGINT to avoid long exit delays
 def _shutdown(signum, frame):
     logging.info(f"Received signal {signum}, shutting down scheduler and exiting")
+    if scheduler_leader is not None:
+        scheduler_leader.stop()
     try:
-        scheduler.shutdown(wait=False)
+        # the scheduler is never started in the workers that are not elected
+        if scheduler.running:
+            scheduler.shutdown(wait=False)
     except Exception:
         logging.exception("Error while shutting down scheduler")
+    if event_queue is not None:
+        event_queue.shutdown(wait=False)
     sys.exit(0)
 signal.signal(signal.SIGTERM, _shutdown)
 signal.signal(signal.SIGINT, _shutdown)
 
 app = Flask(__name__)
 
+# compiled once, the lists can hold thousands of networks (e.g. CDN ranges)
+whitelist_ips = IPMatcher(Config.server.whitelist_ips)
+reverse_proxy_ips = IPMatcher(Config.server.reverse_proxy_ips)
+
 @app.before_request
 def verify_request():
     if request.method == 'POST':
         if not verify_discourse_instance(request, Config.server.discourse_instance_name):
             abort(403)
-        if not verify_ip_address(request, Config.server.whitelist_ips, Config.server.reverse_proxy_ips):
+        if not verify_ip_address(request, whitelist_ips, reverse_proxy_ips):
             abort(403)
-        if not verify_discourse_webhook_request(request, Config.server.webhook_secret):
+        # the body is read once here, the signature and the endpoint use the same bytes
+        if not verify_discourse_webhook_request(request, Config.server.webhook_secret, request.get_data()):
             abort(403)
 
 @app.route("/",)
 def root():
     return "OK"
 
+@app.route("/ready")
+def ready():
+    # actions still warming up do not handle events, the others already do
+    body = {"ready": BotManager.is_ready(), "actions": BotManager.warm_up_status()}
+    return jsonify(body), 200 if body["ready"] else 503
+
+@app.route("/metrics")
+def metrics():
+    return jsonify({
+        "event_queue": event_queue.metrics() if event_queue is not None else None,
+        "webhook_dedup": webhook_dedup.metrics() if webhook_dedup is not None else None,
+        "scheduler_leader": scheduler_leader.metrics() if scheduler_leader is not None else None,
+        "scheduled_jobs": BotManager.scheduled_job_metrics(),
+        "warm_up": BotManager.warm_up_status(),
+    })
+
 @app.route("/", methods=['POST'])
 def endpoint():
+    # the body is decoded by BotManager only if a handler needs it
     raw_body = request.get_data()
-    data = request.get_json()
     event = request.headers.get('X-Discourse-Event')
+    event_id = request.headers.get('X-Discourse-Event-Id')
+    if webhook_dedup is not None and webhook_dedup.check_and_mark(event_id):
+        return "ok"
     event_headers = {
         key: value
         for key, value in request.headers.items()
         if key.lower().startswith('x-discourse-')
     }
-    result = BotManager.trigger_event(event, data, raw_body=raw_body, event_headers=event_headers)
+    # the signature of the body has been verified, skip the model validation
+    trusted = bool(Config.server.webhook_secret)
+    if event_queue is not None:
+        # async handlers are awaited on the event loop, not in the queue workers
+        if not event_queue.submit(
+                event, raw_body=raw_body, event_headers=event_headers, trusted=trusted, wait=False):
+            # the redelivery of this event must not be skipped
+            if webhook_dedup is not None:
+                webhook_dedup.forget(event_id)
+            abort(503)
+        return "ok"
+    try:
+        result = BotManager.trigger_event(event, raw_body=raw_body, event_headers=event_headers, trusted=trusted)
+    except Exception:
+        if webhook_dedup is not None:
+            webhook_dedup.forget(event_id)
+        raise
     if len(result) > 0:
         return "\n\n".join(map(str, result))
     else:
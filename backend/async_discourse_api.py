@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from json.decoder import JSONDecodeError
+
+from fluent_discourse import DiscourseError, PageNotFoundError, RateLimitError, UnauthorizedError
+
+from .utils.http_session import get_async_http_client
+from .utils.ratelimiter import rate_limited_call_async
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBotAPI:
+    """
+    Asyncio counterpart of `BotAPI` built on `httpx`.
+
+    Methods have the same names and arguments as `BotAPI` but must be awaited,
+    they are meant to be used from `async def` action handlers.
+    """
+
+    def __init__(self, base_url: str, username: str, api_key: str, raise_for_rate_limit: bool = True):
+        if base_url.endswith("/"):
+            base_url = base_url[:-1]
+        self.base_url = base_url
+        self.username = username
+        self.raise_for_rate_limit = raise_for_rate_limit
+        self._headers = {"Api-Key": api_key}
+        # see BotAPI, non-ascii usernames can not be sent in the header
+        try:
+            username.encode("latin-1")
+            self._headers["Api-Username"] = username
+        except UnicodeEncodeError:
+            pass
+
+    async def _request(self, method: str, path: str, data=None, params=None, files=None):
+        url = f"{self.base_url}/{path}"
+        client = get_async_http_client()
+        # files are rewound before each attempt, so a retried upload sends the whole file
+        start_positions = {
+            name: file.tell() for name, (_, file) in (files or {}).items() if hasattr(file, 'seek')
+        }
+
+        async def send():
+            for name, position in start_positions.items():
+                files[name][1].seek(position)
+            if files is None:
+                return await client.request(method, url, json=data, params=params, headers=self._headers)
+            return await client.request(method, url, data=data, params=params, files=files, headers=self._headers)
+
+        while True:
+            r = await rate_limited_call_async(self.username, method, url, send)
+            if r.status_code == 200:
+                try:
+                    return r.json()
+                except JSONDecodeError:
+                    # Request succeeded but response body was not valid JSON
+                    return r.text
+            elif r.status_code == 404:
+                raise PageNotFoundError(
+                    f"The requested page was not found, or you do not have permission to access it: {r.url}")
+            elif r.status_code == 403:
+                raise UnauthorizedError("Invalid credentials")
+            elif r.status_code == 429:
+                if self.raise_for_rate_limit:
+                    raise RateLimitError("Rate limit hit")
+                wait_seconds = int(r.json()["extras"]["wait_seconds"]) + 1
+                logger.warning(f"Discourse rate limit hit, trying again in {wait_seconds} seconds")
+                await asyncio.sleep(wait_seconds)
+            else:
+                raise DiscourseError(
+                    f"Unhandled discourse exception: {r.status_code} - {r.text}")
+
+    async def get_topic_by_id(self, topic_id) -> dict:
+        return await self._request("GET", f"t/{topic_id}.json")
+
+    async def get_post_by_id(self, post_id) -> dict:
+        return await self._request("GET", f"posts/{post_id}.json")
+
+    async def get_post_replies_by_id(self, post_id) -> dict:
+        return await self._request("GET", f"posts/{post_id}/replies.json")
+
+    async def create_private_message(self, title, raw, target_usernames, **kwargs):
+        if isinstance(target_usernames, str):
+            target_usernames = target_usernames.split(',')
+        topic_data = {
+            "title": title,
+            "raw": raw,
+            "archetype": "private_message",
+            "target_recipients": ','.join(target_usernames),
+        }
+        kwargs.update(topic_data)
+        return await self.create_post_raw(kwargs)
+
+    async def create_post(self, raw, topic_id, reply_to_post_number=None, **kwargs):
+        post_data = {
+            "raw": raw,
+            "topic_id": topic_id,
+        }
+        if reply_to_post_number is not None:
+            post_data["reply_to_post_number"] = reply_to_post_number
+        kwargs.update(post_data)
+        return await self.create_post_raw(kwargs)
+
+    async def delete_post(self, post_id):
+        return await self._request("DELETE", f"posts/{post_id}.json")
+
+    async def create_topic(self, title, raw, category, tags=None, **kwargs):
+        topic_data = {
+            "title": title,
+            "raw": raw,
+            "category": category,
+            "tags": tags if tags else [],
+        }
+        kwargs.update(topic_data)
+        return await self.create_post_raw(kwargs)
+
+    async def create_post_raw(self, data):
+        return await self._request("POST", "posts.json", data=data)
+
+    async def close_topic(self, topic_id, close=True, until=None):
+        return await self.update_topic_status(topic_id, 'closed', close, until)
+
+    async def archive_topic(self, topic_id, archive=True, until=None):
+        return await self.update_topic_status(topic_id, 'archived', archive, until)
+
+    async def update_topic_status(self, topic_id, status, enabled, until=None):
+        data = {
+            'status': status,
+        }
+        if enabled is True:
+            data['enabled'] = 'true'
+        elif enabled is False:
+            data['enabled'] = 'false'
+        else:
+            data['enabled'] = enabled
+        if until is not None:
+            data['until'] = until
+        return await self._request("PUT", f"t/{topic_id}/status", data=data)
+
+    async def update_post_wiki(self, post_id, wiki=True):
+        return await self._request("PUT", f"posts/{post_id}/wiki", data={'wiki': wiki})
+
+    async def update_post_owner(self, topic_id, post_ids, username, **kwargs):
+        if isinstance(post_ids, int):
+            post_ids = [post_ids]
+        data = {'post_ids': post_ids, 'username': username}
+        data.update(kwargs)
+        return await self._request("POST", f"t/{topic_id}/change-owner", data=data)
+
+    async def close_topic_and_create_new(self, old_topic_id, title=None, raw=None, **kwargs):
+        old_topic = await self.get_topic_by_id(old_topic_id)
+        tags = old_topic.get('tags', [])
+        category = old_topic.get('category_id')
+        if title is None:
+            title = old_topic.get('title')
+        if raw is None:
+            raw = old_topic.get('title')
+        await self.close_topic(old_topic_id)
+        new_topic = await self.create_topic(title, raw, category, tags, **kwargs)
+        new_post_id = new_topic.get('id')
+        await self.update_post_wiki(new_post_id, True)
+        return new_topic
+
+    async def create_upload(self, file, file_name):
+        files = {
+            'files[]': (file_name, file)
+        }
+        params = {
+            'upload_type': 'composer',
+        }
+        return await self._request("POST", "uploads.json", params=params, files=files)
@@ -5,9 +5,15 @@ plugins.load_plugins()
 
 # initialize bot manager and config
 from .bot_manager import bot_manager as BotManager
+# actions with a warm-up join the dispatch once it has finished
+BotManager.start_warm_up()
 from .bot_config import config as Config
+from .utils.redis_cache import get_redis_client
+from .scheduled_jobs import scheduler_options
 
 __all__ = [
     "BotManager",
     "Config",
+    "get_redis_client",
+    "scheduler_options",
 ]
\ No newline at end of file
@@ -1,14 +1,136 @@
 from .bot_config import config as Config
 from .discourse_api import BotAPI
+from .async_discourse_api import AsyncBotAPI
+from .utils.ratelimiter import get_rate_limiter
 from .utils.singleton import Singleton
+from fluent_discourse import RateLimitError
+import functools
+import inspect
+import itertools
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+
+class AccountSelectionStrategy:
+    """
+    Decide in which order the writable accounts are tried for a write. The
+    throttled accounts are then moved after the others, whatever the strategy.
+    """
+    name = ""
+
+    def order(self, usernames: list[str], manager: "BotAccountManager") -> list[str]:
+        raise NotImplementedError
+
+
+class DefaultAccountStrategy(AccountSelectionStrategy):
+    """Always write with the default account, other accounts are only used as fallback."""
+    name = "default"
+
+    def order(self, usernames, manager):
+        default_username = manager.default_bot_client.username
+        return sorted(usernames, key=lambda username: username != default_username)
+
+
+class RoundRobinStrategy(AccountSelectionStrategy):
+    name = "round_robin"
+
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def order(self, usernames, manager):
+        start = next(self._counter) % len(usernames)
+        return usernames[start:] + usernames[:start]
+
+
+class LeastRecentlyRateLimitedStrategy(RoundRobinStrategy):
+    """Round robin among accounts that are not throttled, then the least recently throttled ones."""
+    name = "least_recently_rate_limited"
+
+    def order(self, usernames, manager):
+        rotated = super().order(usernames, manager)
+        # the sort is stable, the accounts out of their cooldown keep the rotation
+        return sorted(rotated, key=lambda username: (
+            manager.is_rate_limited(username),
+            manager.last_rate_limited_at(username) if manager.is_rate_limited(username) else 0))
+
+
+ACCOUNT_SELECTION_STRATEGIES: dict[str, type[AccountSelectionStrategy]] = {
+    strategy.name: strategy
+    for strategy in (DefaultAccountStrategy, RoundRobinStrategy, LeastRecentlyRateLimitedStrategy)
+}
+
+
+class BalancedBotAPI:
+    """
+    Proxy exposing the `BotAPI` methods, each call is sent with an account
+    picked by the account selection strategy.
+
+    When an account hits the rate limit, the call is retried with the next
+    account in the order given by the strategy. Helpers making several
+    requests (`multi_step_methods`) are run on the proxy itself, so that only
+    the request which hit the limit is retried, not the steps already done.
+    """
+    client_cls = BotAPI
+    multi_step_methods = ('close_topic_and_create_new',)
+
+    def __init__(self, manager: "BotAccountManager", clients: dict[str, BotAPI]):
+        self._manager = manager
+        self._clients = clients
+
+    def _ordered_clients(self):
+        return [self._clients[username] for username in self._manager.order_writable_accounts()]
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not callable(getattr(self.client_cls, name, None)):
+            raise AttributeError(name)
+        if name in self.multi_step_methods:
+            return functools.partial(getattr(self.client_cls, name), self)
+
+        def call(*args, **kwargs):
+            last_error = None
+            for client in self._ordered_clients():
+                try:
+                    return getattr(client, name)(*args, **kwargs)
+                except RateLimitError as e:
+                    last_error = e
+                    self._manager.mark_rate_limited(client.username)
+            raise last_error
+        return call
+
+
+class AsyncBalancedBotAPI(BalancedBotAPI):
+    """`BalancedBotAPI` for the `AsyncBotAPI` clients."""
+    client_cls = AsyncBotAPI
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not inspect.iscoroutinefunction(getattr(self.client_cls, name, None)):
+            raise AttributeError(name)
+        if name in self.multi_step_methods:
+            return functools.partial(getattr(self.client_cls, name), self)
+
+        async def call(*args, **kwargs):
+            last_error = None
+            for client in self._ordered_clients():
+                try:
+                    return await getattr(client, name)(*args, **kwargs)
+                except RateLimitError as e:
+                    last_error = e
+                    self._manager.mark_rate_limited(client.username)
+            raise last_error
+        return call
+
+
 @Singleton
 class BotAccountManager:
+    # seconds an account is considered throttled after a rate limit error
+    rate_limit_cooldown = 60
+
     def __init__(self):
         self.bot_clients: list[BotAPI] = []
+        self.async_bot_clients: list[AsyncBotAPI] = []
         for bot_account in Config.bot_accounts:
             self.bot_clients.append(
                 BotAPI(
@@ -18,6 +140,14 @@ class BotAccountManager:
                     raise_for_rate_limit=True
                 )
             )
+            self.async_bot_clients.append(
+                AsyncBotAPI(
+                    base_url=Config.site_url,
+                    username=bot_account.username,
+                    api_key=bot_account.api_key,
+                    raise_for_rate_limit=True
+                )
+            )
         if len(self.bot_clients) == 0:
             raise ValueError("No bot account is configured.")
         elif len(self.bot_clients) == 1:
@@ -36,10 +166,33 @@ class BotAccountManager:
             else:
                 self._default_bot_client = self.bot_clients[Config.bot_accounts.index(default_bot_clients[0])]
 
+        # bot accounts are fixed once loaded, checked for every post
+        self.username_set: frozenset[str] = frozenset(
+            bot_client.username for bot_client in self.bot_clients)
+        writable_usernames = [
+            bot_account.username for bot_account in Config.bot_accounts if bot_account.writable is True]
+        self.writable_usernames: list[str] = writable_usernames or [self._default_bot_client.username]
+        strategy_cls = ACCOUNT_SELECTION_STRATEGIES.get(Config.account_selection)
+        if strategy_cls is None:
+            logger.warning(
+                f"Unknown account selection strategy {Config.account_selection}, the default account will be used.")
+            strategy_cls = DefaultAccountStrategy
+        self.selection_strategy: AccountSelectionStrategy = strategy_cls()
+        self._rate_limited_at: dict[str, float] = {}
+        self._rate_limited_lock = threading.Lock()
+        self.writer_client = BalancedBotAPI(self, {
+            username: self.get_bot_client(username) for username in self.writable_usernames})
+        self.async_writer_client = AsyncBalancedBotAPI(self, {
+            username: self.get_async_bot_client(username) for username in self.writable_usernames})
+
     @property
     def default_bot_client(self):
         return self._default_bot_client
 
+    @property
+    def default_async_bot_client(self) -> AsyncBotAPI:
+        return self.async_bot_clients[self.bot_clients.index(self._default_bot_client)]
+
     @property
     def usernames(self):
         return [bot_client.username for bot_client in self.bot_clients]
@@ -50,5 +203,35 @@ class BotAccountManager:
                 return bot_client
         raise ValueError(f"Bot account with username {username} not found.")
 
+    def mark_rate_limited(self, username: str):
+        with self._rate_limited_lock:
+            self._rate_limited_at[username] = time.monotonic()
+        logger.warning(f"Bot account {username} is rate limited, other accounts will be preferred.")
+
+    def last_rate_limited_at(self, username: str) -> float:
+        return self._rate_limited_at.get(username, float("-inf"))
+
+    def is_rate_limited(self, username: str) -> bool:
+        """
+        Whether the account hit the rate limit in the last `rate_limit_cooldown`
+        seconds, or is still backing off after the `Retry-After` of Discourse.
+        """
+        if time.monotonic() - self.last_rate_limited_at(username) < self.rate_limit_cooldown:
+            return True
+        rate_limiter = get_rate_limiter()
+        return rate_limiter is not None and rate_limiter.is_backing_off(username)
+
+    def order_writable_accounts(self) -> list[str]:
+        ordered = self.selection_strategy.order(list(self.writable_usernames), self)
+        # the sort is stable, the throttled accounts are only used as fallback
+        rate_limited = {username: self.is_rate_limited(username) for username in ordered}
+        return sorted(ordered, key=rate_limited.__getitem__)
+
+    def get_async_bot_client(self, username: str) -> AsyncBotAPI:
+        for bot_client in self.async_bot_clients:
+            if bot_client.username == username:
+                return bot_client
+        raise ValueError(f"Bot account with username {username} not found.")
+
 
 account_manager = BotAccountManager()
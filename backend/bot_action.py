@@ -1,10 +1,15 @@
 from .discourse_api import BotAPI
+from .async_discourse_api import AsyncBotAPI
 from .model.post import Post
 from .bot_account_manager import account_manager as BotManager
 from .bot_config import config as Config
-from .utils.bot_post_check import post_created_by_bot, post_mention_bot, post_reply_to_bot
+from .event_filter import EventFilter
+from .utils.bot_post_check import (
+    post_created_by_bot, post_mention_any_bot, post_mention_bot, post_reply_to_any_bot, post_reply_to_bot)
 import inspect
 import logging
+import threading
+import time
 from collections import namedtuple
 from typing import Optional, Dict, Any
 from pydantic import BaseModel
@@ -19,16 +24,75 @@ class ActionResult(BaseModel):
     message: Optional[str] = None
     extra: Optional[Dict[str, Any]] = None
 
+class WarmUpStatus:
+    """State and progress (e.g. pages fetched, rows processed) of the warm-up of an action."""
+    PENDING = "pending"
+    RUNNING = "running"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, action_name: str, state: str = PENDING):
+        self.action_name = action_name
+        self.state = state
+        self.progress: dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == self.READY
+
+    def update(self, **progress):
+        with self._lock:
+            self.progress.update(progress)
+        logger.info(f"Warm-up of {self.action_name}: " + ", ".join(f"{key}={value}" for key, value in progress.items()))
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self.state = self.RUNNING
+
+    def finish(self, error: Optional[Exception] = None):
+        self.duration = time.monotonic() - self.started_at
+        self.error = None if error is None else repr(error)
+        self.state = self.READY if error is None else self.FAILED
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "progress": dict(self.progress),
+                "error": self.error,
+                "duration": self.duration,
+            }
+
+
 class BotAction:
     action_name = "BotActionBase"
     action_config_key = ""
+    # whether the action can run alongside other actions when concurrent
+    # dispatch is enabled, can be overridden by the `concurrent` config key
+    concurrent = False
     _events_listeners = {}
 
     def __init__(self) -> None:
-        self.priority: int = 0
         self._load_config()
+        # actions with higher priority are triggered first
+        self.priority: int = self.config.get('priority', 0)
+        self.concurrent: bool = self.config.get('concurrent', self.concurrent)
+        # actions overriding `warm_up` only handle events once it has finished
+        self.warm_up_status = WarmUpStatus(
+            self.action_name,
+            WarmUpStatus.PENDING if type(self).warm_up is not BotAction.warm_up else WarmUpStatus.READY,
+        )
         if self.enabled:
             self.api: BotAPI = BotManager.default_bot_client
+            # for `async def` handlers, which are awaited by BotManager
+            self.async_api: AsyncBotAPI = BotManager.default_async_bot_client
+            # replies are spread over the writable accounts, see `account_selection`
+            self.reply_api: BotAPI = BotManager.writer_client
+            self.async_reply_api: AsyncBotAPI = BotManager.async_writer_client
             self._register_events()
 
     def _load_config(self):
@@ -61,8 +125,26 @@ class BotAction:
             logger.warning(
                 f"Action {self.action_name} does not have any event listener or schedule.")
 
+    @property
+    def ready(self) -> bool:
+        return self.warm_up_status.ready
+
+    def warm_up(self):
+        """
+        Load what the action needs to handle events, e.g. global data.
+
+        It is run in the background by `BotManager.start_warm_up`, the action
+        does not receive events until it has finished. Report the progress
+        with `self.warm_up_status.update(...)`.
+        """
+
     def should_response(self, post: Post):
-        return not post_created_by_bot(post) and (post_mention_bot(post, self.api.username) or post_reply_to_bot(post, self.api.username))
+        if post_created_by_bot(post):
+            return False
+        if Config.account_selection != "default":
+            # the replies are spread over the accounts, users answer any of them
+            return post_mention_any_bot(post) or post_reply_to_any_bot(post)
+        return post_mention_bot(post, self.api.username) or post_reply_to_bot(post, self.api.username)
 
     def trigger(self, event: str, *args, **kwargs):
         if event in self._events_listeners:
@@ -78,7 +160,7 @@ def scheduled(*args, **kwargs):
 
     This decorator can be used multiple times on the same method, then the method will be triggered on multiple schedules. Schedule will not be registered if the action is disabled.
 
-    No parameters will be passed to the handler when triggered by the scheduler.
+    No parameters will be passed to the handler when triggered by the scheduler. Scheduled handlers must not be `async def`.
     """
     def wrapper(func: callable):
         descriptor = func if isinstance(func, BotActionEventDescriptor) else BotActionEventDescriptor(func)
@@ -86,17 +168,25 @@ def scheduled(*args, **kwargs):
         return descriptor
     return wrapper
 
-def on(event: str):
+def on(event: str, keywords=None, topic_ids=None, category_ids=None, exclude_bots: bool = False):
     """
     Decorator to bind a method as a handler to an Discourse event.
 
     This decorator can be used multiple times on the same method, then the method will be triggered on multiple events. Event will not be registered if the action is disabled.
 
     Parameters passed to the handler depend on the event type, please refer to the Discourse webhook documentation.
+
+    The handler can be an `async def` method, it is then awaited on a shared event loop and should use `self.async_api`.
+
+    The other parameters are checked by BotManager before triggering the handler, all of them must match:
+    `keywords` (any of them is in the post raw or topic title, or a function of the action returning them),
+    `topic_ids`, `category_ids`, and `exclude_bots` to skip posts and topics created by the bot accounts.
     """
+    event_filter = EventFilter.create(keywords, topic_ids, category_ids, exclude_bots)
+
     def wrapper(func: callable):
         descriptor = func if isinstance(func, BotActionEventDescriptor) else BotActionEventDescriptor(func)
-        descriptor.append_event(event)
+        descriptor.append_event(event, event_filter)
         return descriptor
     return wrapper
 
@@ -104,15 +194,18 @@ ScheduleArgs = namedtuple("ScheduleArgs", ["args", "kwargs"])
 
 class BotActionEventDescriptor:
     def __get__(self, instance, owner):
-        return BotActionEventHandler(instance, self.func, self.events, self.schedules)
+        return BotActionEventHandler(instance, self.func, self.events, self.schedules, self.filters)
 
     def __init__(self, func: callable):
         self.events = []
         self.schedules = []
+        self.filters: dict[str, EventFilter] = {}
         self.func = func
 
-    def append_event(self, event: str):
+    def append_event(self, event: str, event_filter: Optional[EventFilter] = None):
         self.events.append(event)
+        if event_filter is not None:
+            self.filters[event] = event_filter
     
     def append_schedule(self, schedule: str):
         self.schedules.append(schedule)
@@ -120,10 +213,12 @@ class BotActionEventDescriptor:
 class BotActionEventHandler:
     def __init__(self, action: BotAction, func: callable,
                   events: Optional[tuple[str]] = None,
-                  schedules: Optional[tuple[ScheduleArgs]] = None):
+                  schedules: Optional[tuple[ScheduleArgs]] = None,
+                  filters: Optional[dict[str, EventFilter]] = None):
         self.action = action
         self.events = [] if events is None else events
         self.schedules = [] if schedules is None else schedules
+        self.filters = {} if filters is None else filters
         self.func = func
         signature = inspect.signature(func)
         parameters = signature.parameters
@@ -143,6 +238,13 @@ class BotActionEventHandler:
     def __call__(self, *args, **kwargs):
         return self.func(self.action, *args, **kwargs)
 
+    def get_filter(self, event: str) -> Optional[EventFilter]:
+        event_filter = self.filters.get(event)
+        return event_filter.resolve(self.action) if event_filter is not None else None
+
+    def accepts_kwarg(self, name: str) -> bool:
+        return self._accepts_var_kwargs or name in self._accepted_kwargs
+
     def filter_kwargs(self, kwargs: dict) -> dict:
         if self._accepts_var_kwargs:
             return kwargs
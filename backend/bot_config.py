@@ -15,6 +15,61 @@ class ServerConfig(BaseModel):
     discourse_instance_name: str = ""
     whitelist_ips: list[str] = []
     reverse_proxy_ips: list[str] = []
+    event_queue_enabled: bool = True
+    event_queue_size: int = 1000
+    event_queue_workers: int = 4
+    # skip webhooks redelivered by Discourse, by X-Discourse-Event-Id
+    webhook_dedup_enabled: bool = True
+    webhook_dedup_size: int = 10000
+    webhook_dedup_ttl: int = 3600
+    webhook_dedup_redis: bool = True
+    # only one worker or replica runs the scheduled jobs, through a lease in
+    # Redis, or a lock file shared by the workers of a host without Redis
+    scheduler_leader_election: bool = True
+    scheduler_lock_ttl: int = 30
+    scheduler_lock_file: str = ""
+
+
+class HttpConfig(BaseModel):
+    pool_connections: int = 10
+    pool_maxsize: int = 20
+    keep_alive: bool = True
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+
+
+class RateLimitBucket(BaseModel):
+    # tokens added per second
+    rate: float
+    burst: int
+
+
+class RateLimitConfig(BaseModel):
+    enabled: bool = True
+    # share the buckets across workers through Redis when it is available
+    use_redis: bool = True
+    # retries after a 429 response, only if Retry-After is at most max_retry_wait seconds
+    max_retries: int = 2
+    max_retry_wait: float = 60
+    buckets: dict[str, RateLimitBucket] = {
+        "default": RateLimitBucket(rate=1, burst=60),
+        "post": RateLimitBucket(rate=0.5, burst=10),
+        "upload": RateLimitBucket(rate=0.2, burst=5),
+        "topic_status": RateLimitBucket(rate=0.5, burst=10),
+        # the admin API limit of Discourse (max_admin_api_reqs_per_minute)
+        "data_explorer": RateLimitBucket(rate=1, burst=60),
+    }
+
+
+class SchedulerConfig(BaseModel):
+    # keep the jobs and their next run time in the database across restarts
+    persistent_jobs: bool = True
+    # random delay in seconds added to every run, and to the first run after a start
+    jitter: int = 30
+    startup_jitter: int = 120
+    coalesce: bool = True
+    max_instances: int = 1
+    misfire_grace_time: int = 300
 
 
 class BotAccount(BaseModel):
@@ -29,9 +84,16 @@ class BotConfig(BaseModel):
     site_url: str
     limited_mode: bool = False
     limited_usernames: list[str] = []
+    concurrent_dispatch: bool = False
+    concurrent_dispatch_workers: int = 8
+    # default, round_robin or least_recently_rate_limited
+    account_selection: str = "default"
     redis_host: str = "redis"
     redis_port: int = 6379
     server: ServerConfig = ServerConfig()
+    http: HttpConfig = HttpConfig()
+    rate_limit: RateLimitConfig = RateLimitConfig()
+    scheduler: SchedulerConfig = SchedulerConfig()
     bot_accounts: list[BotAccount]
     action_custom_config: dict[str, dict[str, Any]]
     db_url: str = "sqlite:///db.sqlite"
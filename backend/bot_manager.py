@@ -1,14 +1,26 @@
+import asyncio
+import datetime
+import inspect
 import logging
+import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import MappingProxyType
 from typing import Type
 from .utils.singleton import Singleton
-from .bot_action import BotAction, ActionResult
-from .model import Post, Topic
+from .bot_action import BotAction, ActionResult, BotActionEventHandler, WarmUpStatus
+from .model import Post, Topic, TrustedPost, TrustedTopic
 from .bot_config import config as Config
 from .event_context import EventContext
+from .event_filter import CompiledEventFilters
+from .bot_account_manager import account_manager as AccountManager
+from .scheduled_jobs import job_metrics, run_scheduled_job
+from .utils.async_runner import async_runner
 
 logger = logging.getLogger(__name__)
 
 try:
+    from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
     from apscheduler.schedulers.base import BaseScheduler
 except ImportError: # pragma: no cover
     pass
@@ -18,6 +30,12 @@ class BotManager:
     def __init__(self):
         self.registered_actions: dict[str, BotAction] = {}
         self.activated_actions: dict[str, BotAction] = {}
+        # event name -> (((action_name, action), ...) ordered by priority,
+        # filters declared with `on` for these handlers or None)
+        self._dispatch_index: MappingProxyType = MappingProxyType({})
+        self._dispatch_index_lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
 
         self._should_warn_unregistered_schedule = False
 
@@ -29,31 +47,167 @@ class BotManager:
             action_inst = action_cls()
             self.registered_actions[action_cls.action_name] = action_inst
             if action_inst.enabled:
-                self.activated_actions[action_cls.action_name] = action_inst
+                self.activate_action(action_cls.action_name, action_inst)
                 if len(action_inst._schedules) > 0:
                     self._should_warn_unregistered_schedule = True
 
+    def activate_action(self, action_name: str, action: BotAction):
+        self.activated_actions[action_name] = action
+        self.rebuild_dispatch_index()
+
+    def rebuild_dispatch_index(self):
+        """
+        Rebuild the event -> actions index used by `trigger_event`.
+
+        Actions with higher `priority` are triggered first, actions with the same
+        priority keep their activation order. Actions which are not warmed up
+        yet are left out.
+        """
+        with self._dispatch_index_lock:
+            index: dict[str, list[tuple[str, BotAction]]] = {}
+            for action_name, action in self.activated_actions.items():
+                if not action.ready:
+                    continue
+                for event in action._events_listeners:
+                    index.setdefault(event, []).append((action_name, action))
+            dispatch_index = {}
+            for event, handlers in index.items():
+                handlers = tuple(sorted(handlers, key=lambda item: -item[1].priority))
+                filters = [self._get_event_filter(action, event) for _, action in handlers]
+                event_filters = None
+                if any(event_filter is not None for event_filter in filters):
+                    event_filters = CompiledEventFilters(event, filters, AccountManager.username_set)
+                dispatch_index[event] = (handlers, event_filters)
+            self._dispatch_index = MappingProxyType(dispatch_index)
+
+    @staticmethod
+    def _get_event_filter(action: BotAction, event: str):
+        handler = action._events_listeners.get(event)
+        if isinstance(handler, BotActionEventHandler):
+            return handler.get_filter(event)
+        return None
+
+    def get_event_handlers(self, event: str) -> tuple[tuple[str, BotAction], ...]:
+        return self._dispatch_index.get(event, ((), None))[0]
+
+    def start_warm_up(self):
+        """Run the `warm_up` of the activated actions in background threads."""
+        for action_name, action in self.activated_actions.items():
+            status = getattr(action, 'warm_up_status', None)
+            if isinstance(status, WarmUpStatus) and status.state == WarmUpStatus.PENDING:
+                status.start()
+                threading.Thread(
+                    target=self._warm_up_action, args=(action_name, action),
+                    name=f"warm-up-{action_name}", daemon=True,
+                ).start()
+
+    def _warm_up_action(self, action_name: str, action: BotAction):
+        logger.info(f"Warm-up of action {action_name} is started.")
+        try:
+            action.warm_up()
+        except Exception as e:
+            logger.error(f"Warm-up of action {action_name} failed, it will not handle events: {e}", exc_info=e)
+            action.warm_up_status.finish(e)
+            return
+        action.warm_up_status.finish()
+        logger.info(f"Warm-up of action {action_name} is finished in {action.warm_up_status.duration:.1f}s.")
+        self.rebuild_dispatch_index()
+
+    def warm_up_status(self) -> dict[str, dict]:
+        return {
+            action_name: action.warm_up_status.to_dict()
+            for action_name, action in self.activated_actions.items()
+            if isinstance(getattr(action, 'warm_up_status', None), WarmUpStatus)
+        }
+
+    def is_ready(self) -> bool:
+        """Whether every activated action is warmed up."""
+        return all(status["state"] == WarmUpStatus.READY for status in self.warm_up_status().values())
+
     def register_jobs_to_scheduler(self, scheduler: BaseScheduler):
+        """
+        Add the scheduled handlers of the activated actions to `scheduler`.
+
+        Jobs are identified by action and handler names, so that they replace
+        the ones kept in a persistent job store. A stored job keeps its next
+        run time, otherwise a random delay of up to `scheduler.startup_jitter`
+        seconds is added to the declared `next_run_time`, and interval and
+        cron triggers get a `scheduler.jitter` unless they declare one.
+        Call it once the scheduler is started, to see the stored jobs.
+        """
+        registered_job_ids = set()
         for action in self.activated_actions.values():
-            for schedule, handler in action._schedules:
+            for index, (schedule, handler) in enumerate(action._schedules):
+                handler_name = handler.func.__name__
+                kwargs = dict(schedule.kwargs)
+                job_id = kwargs.pop('id', None) or f"{action.action_name}.{handler_name}" + (f".{index}" if index > 0 else "")
+                trigger = schedule.args[0] if len(schedule.args) > 0 else kwargs.get('trigger')
+                if trigger in ('interval', 'cron'):
+                    kwargs.setdefault('jitter', Config.scheduler.jitter or None)
+                stored_job = scheduler.get_job(job_id)
+                if stored_job is not None and stored_job.next_run_time is not None:
+                    kwargs['next_run_time'] = stored_job.next_run_time
+                elif isinstance(kwargs.get('next_run_time'), datetime.datetime):
+                    kwargs['next_run_time'] += datetime.timedelta(
+                        seconds=random.uniform(0, Config.scheduler.startup_jitter))
                 scheduler.add_job(
-                    handler, *schedule.args, **schedule.kwargs)
-                logger.debug(f"Schedule job {handler} with schedule {schedule.args} {schedule.kwargs} is registered.")
+                    run_scheduled_job, *schedule.args,
+                    args=(job_id, action.action_name, handler_name),
+                    id=job_id, name=f"{action.action_name}.{handler_name}",
+                    replace_existing=True, **kwargs)
+                registered_job_ids.add(job_id)
+                logger.debug(f"Schedule job {job_id} with schedule {schedule.args} {schedule.kwargs} is registered.")
+        # jobs of the actions which are no longer activated
+        for job in scheduler.get_jobs():
+            if job.id not in registered_job_ids:
+                logger.info(f"Scheduled job {job.id} is removed.")
+                scheduler.remove_job(job.id)
+        scheduler.add_listener(job_metrics.listen, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+        self._should_warn_unregistered_schedule = False
+
+    def delegate_scheduler(self):
+        """
+        The jobs are registered to the scheduler of another worker, e.g. the
+        elected scheduler leader, do not warn that they are not registered here.
+        """
         self._should_warn_unregistered_schedule = False
 
+    def scheduled_job_metrics(self) -> dict:
+        return job_metrics.metrics()
+
     def trigger_event(
         self,
         event: str,
-        data: dict,
+        data: dict | None = None,
         raw_body: bytes | None = None,
         event_headers: dict[str, str] | None = None,
+        trusted: bool = False,
+        wait: bool = True,
     ):
+        """
+        Trigger the actions listening to `event`.
+
+        `data` is the decoded webhook body, it can be omitted when `raw_body` is
+        given, the body is then only decoded if a handler needs it.
+
+        `trusted` payloads, e.g. webhooks with a verified signature, are passed
+        as `TrustedPost` / `TrustedTopic` views without validation.
+
+        When some handlers are `async def`, the event is dispatched on the
+        shared event loop. With `wait=False` a `concurrent.futures.Future` of
+        the return values is then returned right away, so the calling thread
+        does not wait for the outbound calls of the handlers.
+        """
         # if there are schedules that are not registered, warn the user
         if self._should_warn_unregistered_schedule:
             logger.warning(
                 "There are schedules that are not registered, please make sure you have registered the scheduler.")
             self._should_warn_unregistered_schedule = False
 
+        handlers, event_filters = self._dispatch_index.get(event, ((), None))
+        if len(handlers) == 0:
+            return []
+
         args = []
         event_context = EventContext(
             event=event,
@@ -61,34 +215,165 @@ class BotManager:
             raw_body=raw_body,
             event_headers=dict(event_headers or {}),
         )
+        if event_filters is not None:
+            handlers = event_filters.select(handlers, event_context.raw_data)
+            if len(handlers) == 0:
+                return []
+
         kwargs = {'event_context': event_context}
         match event:
             case "post_created":
-                post = Post(**data['post'])
-                if Config.limited_mode and post.username not in Config.limited_usernames:
-                    return
-                kwargs['post'] = post
+                if Config.limited_mode or self._handlers_accept(handlers, event, 'post'):
+                    post_data = event_context.raw_data['post']
+                    post = TrustedPost(post_data) if trusted else Post(**post_data)
+                    if Config.limited_mode and post.username not in Config.limited_usernames:
+                        return
+                    kwargs['post'] = post
             case "topic_created":
-                topic = Topic(**data['topic'])
-                kwargs['topic'] = topic
+                if self._handlers_accept(handlers, event, 'topic'):
+                    topic_data = event_context.raw_data['topic']
+                    kwargs['topic'] = TrustedTopic(topic_data) if trusted else Topic(**topic_data)
             case "ping":
                 pass
 
+        if any(self._is_async_handler(action, event) for _, action in handlers):
+            future = async_runner.submit(self._dispatch_async(handlers, event, args, kwargs))
+            return future.result() if wait else future
+
+        if Config.concurrent_dispatch:
+            return self._dispatch_concurrently(handlers, event, args, kwargs)
+
         return_values = []
-        for action_name, action in self.activated_actions.items():
+        for action_name, action in handlers:
             if action.enabled:
-                try:
-                    action_return = action.trigger(event, *args, **kwargs)
-                    if action_return is not None:
-                        if isinstance(action_return, ActionResult):
-                            return_values.append(action_return.message)
-                            if action_return.stop_propagation:
-                                break
-                        else:
-                            return_values.append(action_return)
-                except Exception as e:
-                    logging.error(
-                        f"Error when triggering event {event} for action {action_name}: {e}", exc_info=e)
+                action_return = self._trigger_action(action_name, action, event, args, kwargs)
+                if self._collect_return_value(action_return, return_values):
+                    break
+        return return_values
+
+    def _dispatch_concurrently(self, handlers, event: str, args: list, kwargs: dict):
+        """
+        Trigger actions marked as `concurrent` in a thread pool.
+
+        Other actions are ordered: they wait until every action before them has
+        finished, and their `stop_propagation` prevents the later actions from
+        being triggered.
+        """
+        executor = self._get_executor()
+        return_values = []
+        pending = []
+        for action_name, action in handlers:
+            if not action.enabled:
+                continue
+            if action.concurrent:
+                pending.append(executor.submit(
+                    self._trigger_action, action_name, action, event, args, kwargs))
+                continue
+            if self._collect_futures(pending, return_values):
+                return return_values
+            pending = []
+            action_return = self._trigger_action(action_name, action, event, args, kwargs)
+            if self._collect_return_value(action_return, return_values):
+                return return_values
+        self._collect_futures(pending, return_values)
         return return_values
 
+    async def _dispatch_async(self, handlers, event: str, args: list, kwargs: dict):
+        """
+        Dispatch on the shared event loop: `async def` handlers are awaited
+        there, the other ones run in the dispatch thread pool. Actions marked
+        as `concurrent` are ordered as in `_dispatch_concurrently`.
+        """
+        loop = asyncio.get_running_loop()
+
+        def start(action_name: str, action: BotAction):
+            if self._is_async_handler(action, event):
+                return asyncio.ensure_future(self._await_action(action_name, action, event, args, kwargs))
+            return loop.run_in_executor(
+                self._get_executor(), self._trigger_action, action_name, action, event, args, kwargs)
+
+        return_values = []
+        pending = []
+        for action_name, action in handlers:
+            if not action.enabled:
+                continue
+            if Config.concurrent_dispatch and action.concurrent:
+                pending.append(start(action_name, action))
+                continue
+            if self._collect_results(await asyncio.gather(*pending), return_values):
+                return return_values
+            pending = []
+            if self._collect_return_value(await start(action_name, action), return_values):
+                return return_values
+        self._collect_results(await asyncio.gather(*pending), return_values)
+        return return_values
+
+    @staticmethod
+    async def _await_action(action_name: str, action: BotAction, event: str, args: list, kwargs: dict):
+        try:
+            return await action.trigger(event, *args, **kwargs)
+        except Exception as e:
+            logging.error(
+                f"Error when triggering event {event} for action {action_name}: {e}", exc_info=e)
+            return None
+
+    @staticmethod
+    def _is_async_handler(action: BotAction, event: str) -> bool:
+        handler = action._events_listeners.get(event)
+        return isinstance(handler, BotActionEventHandler) and inspect.iscoroutinefunction(handler.func)
+
+    @staticmethod
+    def _handlers_accept(handlers, event: str, name: str) -> bool:
+        """Whether any of the handlers takes the keyword argument `name`."""
+        for _, action in handlers:
+            handler = action._events_listeners.get(event)
+            if not isinstance(handler, BotActionEventHandler) or handler.accepts_kwarg(name):
+                return True
+        return False
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=Config.concurrent_dispatch_workers,
+                    thread_name_prefix="bot-action",
+                )
+            return self._executor
+
+    @staticmethod
+    def _trigger_action(action_name: str, action: BotAction, event: str, args: list, kwargs: dict):
+        try:
+            action_return = action.trigger(event, *args, **kwargs)
+            if inspect.isawaitable(action_return):
+                # awaitables returned by handlers which are not `async def`
+                action_return = async_runner.run(action_return)
+            return action_return
+        except Exception as e:
+            logging.error(
+                f"Error when triggering event {event} for action {action_name}: {e}", exc_info=e)
+            return None
+
+    @staticmethod
+    def _collect_return_value(action_return, return_values: list) -> bool:
+        """Append the return value of an action, return True if propagation should stop."""
+        if action_return is None:
+            return False
+        if isinstance(action_return, ActionResult):
+            return_values.append(action_return.message)
+            return action_return.stop_propagation
+        return_values.append(action_return)
+        return False
+
+    @classmethod
+    def _collect_futures(cls, futures: list[Future], return_values: list) -> bool:
+        return cls._collect_results([future.result() for future in futures], return_values)
+
+    @classmethod
+    def _collect_results(cls, results: list, return_values: list) -> bool:
+        stop_propagation = False
+        for action_return in results:
+            if cls._collect_return_value(action_return, return_values):
+                stop_propagation = True
+        return stop_propagation
+
 bot_manager = BotManager()
@@ -1,5 +1,5 @@
 import logging
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert, update
 from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
 from contextlib import contextmanager
 
@@ -27,6 +27,24 @@ class Base(_Base):
     def find(cls, *args, **kwargs):
         return cls.where(*args, **kwargs).first()
 
+    @classmethod
+    def bulk_insert(cls, mappings: list[dict]):
+        """Insert rows in a single statement and commit, e.g. `[{"topic_id": 1, ...}]`."""
+        if len(mappings) == 0:
+            return
+        session = db_manager._scoped_session()
+        session.execute(insert(cls), mappings)
+        session.commit()
+
+    @classmethod
+    def bulk_update(cls, mappings: list[dict]):
+        """Update rows by primary key in a single statement and commit, e.g. `[{"id": 1, "status": ...}]`."""
+        if len(mappings) == 0:
+            return
+        session = db_manager._scoped_session()
+        session.execute(update(cls), mappings)
+        session.commit()
+
     def save(self):
         session = db_manager._scoped_session()
         session.merge(self)
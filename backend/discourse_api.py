@@ -1,6 +1,51 @@
 from fluent_discourse import Discourse, RateLimitError
+from json.decoder import JSONDecodeError
 import requests
 
+from .utils.http_session import get_http_session
+from .utils.ratelimiter import rate_limited_call
+
+
+class PooledDiscourse(Discourse):
+    """
+    Discourse client sending requests through the shared HTTP session.
+
+    `fluent_discourse` calls the bare `requests.request`, which opens a new
+    connection for every request. Requests are also throttled by the client
+    side rate limiter of the bot account `account`.
+    """
+
+    def __init__(self, base_url, username, api_key, cache=None, raise_for_rate_limit=True, account=None):
+        super().__init__(base_url, username, api_key, cache, raise_for_rate_limit)
+        self._account = account if account is not None else str(username)
+
+    def _(self, name):
+        return PooledDiscourse(
+            self._base_url,
+            self._username,
+            self._api_key,
+            self._cache + [str(name)],
+            self._raise_for_rate_limit,
+            self._account,
+        )
+
+    def _request(self, method, url, data=None, params=None):
+        r = rate_limited_call(
+            self._account, method, url,
+            lambda: get_http_session().request(
+                method, url, json=data, params=params, headers=self._headers
+            ),
+        )
+        if r.status_code == 200:
+            try:
+                return r.json()
+            except JSONDecodeError:
+                # Request succeeded but response body was not valid JSON
+                return r.text
+        else:
+            return self._handle_error(r, method, url, data, params)
+
+
 class BotAPI:
     def __init__(self, base_url: str, username: str, api_key:str, raise_for_rate_limit: bool = True):
         # Discourse API could not handle non-ascii characters in the username
@@ -10,8 +55,9 @@ class BotAPI:
             encoded_username = username.encode("latin-1")
         except UnicodeEncodeError:
             encoded_username = None
-        self.client: Discourse = Discourse(
-            base_url=base_url, username=encoded_username, api_key=api_key, raise_for_rate_limit=raise_for_rate_limit)
+        self.client: Discourse = PooledDiscourse(
+            base_url=base_url, username=encoded_username, api_key=api_key,
+            raise_for_rate_limit=raise_for_rate_limit, account=username)
         self.base_url = base_url
         self.username = username
 
@@ -116,7 +162,15 @@ class BotAPI:
         params = {
             'upload_type': 'composer',
         }
-        r = requests.post(url, files=files, headers=headers, params=params)
+        start_position = file.tell() if hasattr(file, 'seek') else None
+
+        def send():
+            # rewind the file if the upload is retried after a rate limit
+            if start_position is not None:
+                file.seek(start_position)
+            return get_http_session().post(url, files=files, headers=headers, params=params)
+
+        r = rate_limited_call(self.username, 'POST', url, send)
         if r.status_code == 200:
             try:
                 return r.json()
@@ -1,10 +1,39 @@
-from dataclasses import dataclass, field
+from functools import cached_property
 from typing import Any
 
+from .utils.json_codec import loads
+
 
-@dataclass(frozen=True)
 class EventContext:
-    event: str
-    raw_data: dict[str, Any]
-    raw_body: bytes | None = None
-    event_headers: dict[str, str] = field(default_factory=dict)
+    """
+    Webhook event passed to the handlers accepting an `event_context` argument.
+
+    `raw_data` is decoded from `raw_body` on first access, so handlers which
+    only forward the raw body never pay for the JSON parsing.
+    """
+
+    def __init__(
+        self,
+        event: str,
+        raw_data: dict[str, Any] | None = None,
+        raw_body: bytes | None = None,
+        event_headers: dict[str, str] | None = None,
+    ):
+        self.event = event
+        self.raw_body = raw_body
+        self.event_headers = event_headers if event_headers is not None else {}
+        if raw_data is not None:
+            self.__dict__['raw_data'] = raw_data
+
+    @cached_property
+    def raw_data(self) -> dict[str, Any]:
+        if not self.raw_body:
+            return {}
+        return loads(self.raw_body)
+
+    @property
+    def is_parsed(self) -> bool:
+        return 'raw_data' in self.__dict__
+
+    def __repr__(self):  # pragma: no cover
+        return f"EventContext(event={self.event!r}, raw_body={self.raw_body!r}, event_headers={self.event_headers!r})"
@@ -0,0 +1,91 @@
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Iterable, Optional
+
+from .utils.aho_corasick import AhoCorasick
+
+
+@dataclass(frozen=True)
+class EventFilter:
+    """
+    Conditions declared with `on`, BotManager only triggers the handler of an
+    event whose payload matches all of them.
+
+    `keywords` match if any of them is in the raw content of a post (or the
+    title of a topic). It can also be a function of the action returning the
+    keywords, e.g. to read them from the config.
+    """
+    keywords: tuple[str, ...] | Callable[[Any], Iterable[str]] = ()
+    topic_ids: Optional[frozenset[int]] = None
+    category_ids: Optional[frozenset[int]] = None
+    exclude_bots: bool = False
+
+    @classmethod
+    def create(cls, keywords=None, topic_ids=None, category_ids=None, exclude_bots=False) -> Optional["EventFilter"]:
+        """Build a filter from the arguments of `on`, None if nothing is filtered."""
+        if keywords is None and topic_ids is None and category_ids is None and not exclude_bots:
+            return None
+        return cls(
+            keywords=keywords if callable(keywords) else tuple(keywords or ()),
+            topic_ids=frozenset(topic_ids) if topic_ids is not None else None,
+            category_ids=frozenset(category_ids) if category_ids is not None else None,
+            exclude_bots=exclude_bots,
+        )
+
+    def resolve(self, action) -> "EventFilter":
+        if callable(self.keywords):
+            return replace(self, keywords=tuple(self.keywords(action)))
+        return self
+
+
+def event_payload(event: str, raw_data: dict) -> dict:
+    match event:
+        case "post_created":
+            return raw_data.get("post") or {}
+        case "topic_created":
+            return raw_data.get("topic") or {}
+    return raw_data
+
+
+class CompiledEventFilters:
+    """
+    Filters of all the handlers of one event checked together: the keywords of
+    every handler are compiled into a single Aho-Corasick automaton, so the
+    content is scanned once per event, and the ids are set lookups.
+    """
+
+    def __init__(self, event: str, filters: list[Optional[EventFilter]], bot_usernames: Iterable[str]):
+        self.event = event
+        self.filters = filters
+        self.bot_usernames = frozenset(bot_usernames)
+        keywords = {keyword for event_filter in filters if event_filter is not None
+                    for keyword in event_filter.keywords}
+        self._matcher = AhoCorasick(keywords) if keywords else None
+
+    def select(self, handlers: tuple, raw_data: dict) -> tuple:
+        """Return the handlers whose filter matches, `handlers` are in the order of the filters."""
+        payload = event_payload(self.event, raw_data)
+        if self.event == "topic_created":
+            text = payload.get("title") or ""
+            topic_id = payload.get("id")
+            username = (payload.get("created_by") or {}).get("username")
+        else:
+            text = payload.get("raw") or ""
+            topic_id = payload.get("topic_id")
+            username = payload.get("username")
+        category_id = payload.get("category_id")
+        found_keywords = self._matcher.find(text) if self._matcher is not None else set()
+        is_bot = username in self.bot_usernames
+
+        selected = []
+        for handler, event_filter in zip(handlers, self.filters):
+            if event_filter is not None:
+                if event_filter.keywords and found_keywords.isdisjoint(event_filter.keywords):
+                    continue
+                if event_filter.topic_ids is not None and topic_id not in event_filter.topic_ids:
+                    continue
+                if event_filter.category_ids is not None and category_id not in event_filter.category_ids:
+                    continue
+                if event_filter.exclude_bots and is_bot:
+                    continue
+            selected.append(handler)
+        return tuple(selected)
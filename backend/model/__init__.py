@@ -1,5 +1,6 @@
-from .post import Post, PostAPI, PostWebhook
+from .addressing import PostAddressing
+from .post import Post, PostAPI, PostWebhook, TrustedPost
 from .user import BasicUser
-from .topic import Topic
+from .topic import Topic, TrustedTopic
 
-__all__ = [ 'Post', 'PostAPI', 'PostWebhook', 'BasicUser', 'Topic' ]
\ No newline at end of file
+__all__ = [ 'Post', 'PostAPI', 'PostWebhook', 'TrustedPost', 'PostAddressing', 'BasicUser', 'Topic', 'TrustedTopic' ]
\ No newline at end of file
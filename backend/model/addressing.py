@@ -0,0 +1,47 @@
+import re
+from html import unescape
+from typing import NamedTuple, Optional
+
+# `<a class="mention" href="/u/name">@name</a>` as cooked by Discourse
+_MENTION_RE = re.compile(r'<a\s([^>]*)>@([^<]*)</a\s*>', re.IGNORECASE)
+_ATTR_RE = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+
+
+def scan_mentions(cooked: str) -> frozenset[str]:
+    """
+    Usernames mentioned in the cooked HTML of a post.
+
+    The HTML is scanned with regular expressions instead of being parsed, only
+    the anchors of the class `mention` whose text is `@name` and whose link is
+    `/u/name` are kept, mentions in quotes included.
+    """
+    if 'mention' not in cooked:
+        return frozenset()
+    mentions = set()
+    for match in _MENTION_RE.finditer(cooked):
+        attributes = {
+            name.lower(): unescape(double or single or bare)
+            for name, double, single, bare in _ATTR_RE.findall(match.group(1))
+        }
+        if attributes.get('class', '').split() != ['mention']:
+            continue
+        username = unescape(match.group(2))
+        if attributes.get('href') == f"/u/{username}":
+            mentions.add(username)
+    return frozenset(mentions)
+
+
+class PostAddressing(NamedTuple):
+    """Who wrote a post and whom it is addressed to, shared by all actions."""
+    author: str
+    mentions: frozenset[str]
+    reply_to: Optional[str]
+
+    @classmethod
+    def from_post(cls, post) -> "PostAddressing":
+        reply_to_user = post.reply_to_user
+        return cls(
+            author=post.username,
+            mentions=scan_mentions(post.cooked),
+            reply_to=reply_to_user.username if reply_to_user else None,
+        )
@@ -0,0 +1,64 @@
+import datetime
+from typing import Any, ClassVar, Optional
+
+from pydantic import BaseModel
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime.datetime]:
+    """Parse a Discourse ISO 8601 timestamp, e.g. `2025-01-01T00:00:00.000Z`."""
+    if value is None:
+        return None
+    # `fromisoformat` only accepts the `Z` suffix from Python 3.11
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.datetime.fromisoformat(value)
+
+
+class TrustedView:
+    """
+    Read only view of a `model` over a payload known to be valid, e.g. a webhook
+    body whose signature has been verified.
+
+    Nothing is validated or copied when the view is built, a field is read from
+    the payload on first access and then cached on the view.
+    """
+    __slots__ = ('_data', '__dict__')
+    model: ClassVar[type[BaseModel]]
+    # fields holding a nested model, built without validation on access
+    nested_models: ClassVar[dict[str, type[BaseModel]]] = {}
+
+    _fields: ClassVar[dict[str, Any]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'model' in cls.__dict__:
+            cls._fields = dict(cls.model.model_fields)
+
+    def __init__(self, data: dict[str, Any]):
+        self._data = data
+
+    def __getattr__(self, name: str):
+        field = self._fields.get(name)
+        if field is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        if name in self._data:
+            value = self._data[name]
+        elif not field.is_required():
+            value = field.get_default(call_default_factory=True)
+        else:
+            raise AttributeError(f"Field '{name}' is missing in the payload")
+        nested_model = self.nested_models.get(name)
+        if nested_model is not None and isinstance(value, dict):
+            value = nested_model.model_construct(**value)
+        self.__dict__[name] = value
+        return value
+
+    def to_model(self) -> BaseModel:
+        """Validate the payload and return the full model."""
+        return self.model(**self._data)
+
+    def model_dump(self, **kwargs) -> dict[str, Any]:
+        return self.to_model().model_dump(**kwargs)
+
+    def __repr__(self):  # pragma: no cover
+        return f"{type(self).__name__}(id={self._data.get('id')!r})"
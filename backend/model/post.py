@@ -1,11 +1,34 @@
+import datetime
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
 from functools import cached_property
 from bs4 import BeautifulSoup
 
+from .addressing import PostAddressing
+from .base import TrustedView, parse_timestamp
 from .user import BasicUser
 
-class Post(BaseModel):
+class PostProperties:
+    """Values derived from the fields of `Post` and `TrustedPost`."""
+
+    @cached_property
+    def cooked_soup(self) -> BeautifulSoup:
+        return BeautifulSoup(self.cooked, 'lxml')
+
+    @cached_property
+    def addressing(self) -> PostAddressing:
+        return PostAddressing.from_post(self)
+
+    @cached_property
+    def created_at_datetime(self) -> datetime.datetime:
+        return parse_timestamp(self.created_at)
+
+    @cached_property
+    def updated_at_datetime(self) -> datetime.datetime:
+        return parse_timestamp(self.updated_at)
+
+
+class Post(PostProperties, BaseModel):
     id: int
     topic_id: int
     name: Optional[str]
@@ -43,9 +66,11 @@ class Post(BaseModel):
     accepted_answer: Optional[bool] = None
     topic_accepted_answer: Optional[bool] = None
 
-    @cached_property
-    def cooked_soup(self) -> BeautifulSoup:
-        return BeautifulSoup(self.cooked, 'lxml')
+
+class TrustedPost(PostProperties, TrustedView):
+    """`Post` read from a trusted payload without validation."""
+    model = Post
+    nested_models = {"reply_to_user": BasicUser}
 
 
 class PostAPI(Post):
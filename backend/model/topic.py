@@ -1,9 +1,20 @@
+import datetime
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
+from functools import cached_property
 
+from .base import TrustedView, parse_timestamp
 from .user import BasicUser
 
-class Topic(BaseModel):
+class TopicProperties:
+    """Values derived from the fields of `Topic` and `TrustedTopic`."""
+
+    @cached_property
+    def created_at_datetime(self) -> datetime.datetime:
+        return parse_timestamp(self.created_at)
+
+
+class Topic(TopicProperties, BaseModel):
     id: int
     title: str
     created_at: str
@@ -40,3 +51,9 @@ class Topic(BaseModel):
     pending_posts: Optional[List[Any]] = None
     tags: Optional[List[dict]] = None
     tags_descriptions: Optional[Dict[str, str]] = None
+
+
+class TrustedTopic(TopicProperties, TrustedView):
+    """`Topic` read from a trusted payload without validation."""
+    model = Topic
+    nested_models = {"created_by": BasicUser, "last_poster": BasicUser}
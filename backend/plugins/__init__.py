@@ -1,18 +1,60 @@
+import ast
 import os
 import pkgutil
 import importlib
 import logging
+import time
+from typing import Optional
 
 from ..bot_action import BotAction
+from ..bot_config import config as Config
 from ..bot_manager import bot_manager as BotManager
 
-def load_plugins():
+logger = logging.getLogger(__name__)
+
+
+def declared_config_keys(package_dir: str) -> Optional[list[str]]:
+    """
+    Config keys declared by `__action_config_keys__ = [...]` in the `__init__.py`
+    of a plugin, read without importing the plugin. None if it is not declared.
+    """
+    init_path = os.path.join(package_dir, '__init__.py')
+    if not os.path.exists(init_path):
+        return None
+    with open(init_path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=init_path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == '__action_config_keys__' for target in node.targets):
+            return list(ast.literal_eval(node.value))
+    return None
+
+
+def is_plugin_enabled(config_keys: list[str]) -> bool:
+    return any(Config.action_custom_config.get(key, {}).get('enabled', False) for key in config_keys)
+
+
+def load_plugins() -> dict[str, dict[str, float]]:
+    """
+    Import the plugin packages and register their actions.
+
+    Plugins declaring `__action_config_keys__` are only imported if one of the
+    keys is enabled in `action_custom_config`, the others are always imported.
+    Returns the import and init (registration) time of each loaded plugin, in seconds.
+    """
     collected_actions = []
     package_path = os.path.dirname(__file__)
+    timings: dict[str, dict[str, float]] = {}
 
     for _, module_name, is_pkg in pkgutil.iter_modules([package_path]):
         if is_pkg and not module_name.startswith('_'):
+            config_keys = declared_config_keys(os.path.join(package_path, module_name))
+            if config_keys is not None and not is_plugin_enabled(config_keys):
+                logger.info(f"Plugin {module_name} is skipped, none of {config_keys} is enabled.")
+                continue
+            start = time.perf_counter()
             module = importlib.import_module(f"{__name__}.{module_name}")
+            timings[module_name] = {"import": time.perf_counter() - start, "init": 0.0}
             if hasattr(module, '__all__'):
                 module_content = {name: getattr(
                     module, name) for name in module.__all__}
@@ -22,10 +64,14 @@ def load_plugins():
             for obj in module_content.values():
                 if isinstance(obj, type) and issubclass(obj, BotAction):
                     if obj.action_name != "BotActionBase":
-                        collected_actions.append(obj)
+                        collected_actions.append((module_name, obj))
                     elif obj is not BotAction:
                         logging.warning(
                             f"Class {obj} is a subclass of BotAction but does not have a valid action_name, so it is not registered.")
-    for action_cls in collected_actions:
+    for module_name, action_cls in collected_actions:
+        start = time.perf_counter()
         BotManager.register_bot_action(action_cls)
-
+        timings[module_name]["init"] += time.perf_counter() - start
+    for module_name, timing in timings.items():
+        logger.info(f"Plugin {module_name} is loaded, import {timing['import'] * 1000:.1f}ms, init {timing['init'] * 1000:.1f}ms.")
+    return timings
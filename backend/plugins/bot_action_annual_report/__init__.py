@@ -9,3 +9,6 @@ __all__ = [
     "BotPostReport",
     "BotSummaryReport",
 ]
+
+# the report actions share one config key
+__action_config_keys__ = ["BotAnnualReport"]
@@ -1,7 +1,11 @@
+import os
+
 from pydantic import BaseModel
 
 from ...bot_action import BotAction, ActionResult, on
 from ...model.post import Post
+from ...utils.file_lock import file_lock
+from .query_database import query_gate
 
 class ReportOptions(BaseModel):
     override_user_id: int = -1
@@ -19,6 +23,17 @@ class BotReportActionConfig(BaseModel):
     user_post_query_id: int
     user_visit_query_id: int
     working_path: str = "."
+    query_page_size: int = 300000
+    # the page size is halved on statement timeouts down to this size
+    query_min_page_size: int = 10000
+    # the user post query is `sql/user_post_keyset.sql`, read by (created_at, id)
+    # and split into time ranges fetched concurrently
+    user_post_query_keyset: bool = False
+    user_post_query_partitions: int = 1
+    # Data Explorer queries running at once, the result of a query is
+    # shared by the identical calls for `query_cache_ttl` seconds
+    query_concurrency: int = 4
+    query_cache_ttl: float = 60
 
 
 class BaseBotReportAction(BotAction):
@@ -29,6 +44,7 @@ class BaseBotReportAction(BotAction):
         super().__init__()
         self.config: BotReportActionConfig = BotReportActionConfig(
             **self.config)
+        query_gate.configure(self.config.query_concurrency, self.config.query_cache_ttl)
         if self.trigger_keyword is None:
             raise ValueError("trigger_keyword must be set")
 
@@ -36,6 +52,17 @@ class BaseBotReportAction(BotAction):
     def cache_key(cls, *args):
         return f"{cls.__name__}_"+'_'.join(map(lambda x: str(x).replace('_', r'\_'), args))
 
+    def build_lock(self, processed_data_path: str):
+        """
+        Held while checking and building the processed data: with several
+        workers, one queries the database and the others wait to load its result.
+        """
+        os.makedirs(os.path.dirname(processed_data_path) or ".", exist_ok=True)
+        return file_lock(f"{processed_data_path}.build.lock")
+
+    def report_query_progress(self, pages_fetched: int, rows_fetched: int):
+        self.warm_up_status.update(pages_fetched=pages_fetched, rows_fetched=rows_fetched)
+
     def get_reply_header(self, user_id, user_name, opts: ReportOptions):
         if not opts.override:
             return f"Hi,@{user_name},\n\n"
@@ -67,14 +94,14 @@ class BaseBotReportAction(BotAction):
     def get_reply_main_content(self, user_id: int, post: Post, opts: ReportOptions):
         raise NotImplementedError
 
-    @on("post_created")
+    @on("post_created", keywords=lambda action: [action.trigger_keyword], exclude_bots=True)
     def on_post(self, post: Post):
         if self.should_response(post):
             reply_raw = self.get_reply(post)
             # print(topic_id,post_number,reply_raw)
-            self.api.create_post(reply_raw,
-                                 post.topic_id, post.post_number,
-                                 skip_validations=True)
+            self.reply_api.create_post(reply_raw,
+                                       post.topic_id, post.post_number,
+                                       skip_validations=True)
             return ActionResult(action_name=self.action_name, stop_propagation=True)
 
     @staticmethod
@@ -1,4 +1,4 @@
-from datetime import timedelta, datetime
+from datetime import timedelta, datetime, timezone
 import os
 import pickle
 import logging
@@ -6,9 +6,10 @@ import numpy as np
 import pandas as pd
 
 from .base_bot_report_action import BaseBotReportAction, ReportOptions
-from .query_database import query_database, query_database_paged
+from .query_database import iter_query_pages, iter_query_partitions, query_database, time_partitions
 from .report_plot import plot_post_activity_hour, plot_post_activity_year
-from .preprocess_data import preprocess_posts_data
+from .preprocess_data import LOCAL_UTC_OFFSET, USER_TABLE_FILE, preprocess_posts_data
+from .post_report_store import PostReportStore
 
 from ...utils.redis_cache import redis_cache
 from ...model import Post
@@ -22,45 +23,56 @@ class BotPostReport(BaseBotReportAction):
     action_name = "BotPostReport"
     trigger_keyword = "我的2025发帖报告"
 
-    def __init__(self) -> None:
-        super().__init__()
-        if self.enabled:
-            self.load_global_report_data()
+    def warm_up(self):
+        self.load_global_report_data()
 
     def load_global_report_data(self):
         processed_data_path = os.path.join(
-            self.config.working_path, "post_report_processed.pkl")
-        if not os.path.exists(processed_data_path):
-            logger.info("Processed data not found, querying database...")
-            raw_data = query_database_paged(self.api, self.config.user_post_query_id, {
-            }, self.config.query_group, page_size=300000)
-            logger.info("Query finished, preprocessing data...")
-            preprocess_posts_data(raw_data, processed_data_path)
-
-        with open(processed_data_path, "rb") as f:
+            self.config.working_path, "post_report_processed")
+        with self.build_lock(processed_data_path):
+            if not os.path.exists(processed_data_path):
+                logger.info("Processed data not found, querying database...")
+                # the pages are aggregated as they are fetched
+                rows_processed = preprocess_posts_data(self.query_posts(), processed_data_path)
+                logger.info("Query finished, data preprocessed.")
+                self.warm_up_status.update(rows_processed=rows_processed)
+
+        with open(os.path.join(processed_data_path, USER_TABLE_FILE), "rb") as f:
             # post_count, post_read_count, post_character_count,post_count_rank,
             # post_read_count_rank, post_character_count_rank,
             # post_days, post_days_rank
             self.user_table: pd.DataFrame = pickle.load(f)
-
-            # dict: user_id: np.darray[365]
-            self.user_post_day_count = pickle.load(f)
-            # dict: user_id: np.darray[24]
-            self.user_post_hour_count = pickle.load(f)
+        # user_id -> np.ndarray[365] and np.ndarray[24], memory-mapped
+        self.post_counts = PostReportStore.load(processed_data_path)
 
         self.all_user_count = self.api.client.about.json.get()[
             "about"]["stats"]["users_count"]
 
+    def query_posts(self):
+        if not self.config.user_post_query_keyset:
+            return iter_query_pages(
+                self.api, self.config.user_post_query_id, {}, self.config.query_group,
+                page_size=self.config.query_page_size, min_page_size=self.config.query_min_page_size,
+                on_page=self.report_query_progress)
+        year_start = datetime(CURRENT_YEAR, 1, 1, tzinfo=timezone.utc).timestamp() - LOCAL_UTC_OFFSET
+        year_end = datetime(CURRENT_YEAR + 1, 1, 1, tzinfo=timezone.utc).timestamp() - LOCAL_UTC_OFFSET
+        return iter_query_partitions(
+            self.api, self.config.user_post_query_id,
+            time_partitions(year_start, year_end, self.config.user_post_query_partitions),
+            {}, self.config.query_group, on_page=self.report_query_progress,
+            page_size=self.config.query_page_size, min_page_size=self.config.query_min_page_size,
+            cursor_columns=("created_at", "id"))
+
     def get_post_data(self, user_id):
-        user_post_day_count = self.user_post_day_count.get(user_id, None)
-        user_post_hour_count = self.user_post_hour_count.get(user_id, None)
+        post_counts = self.post_counts.get(user_id)
         try:
             user_table_row = self.user_table.loc[user_id]
         except KeyError:
             user_table_row = None
-        if user_post_day_count is None or user_post_hour_count is None or user_table_row is None:
+        if post_counts is None or user_table_row is None:
             return None
         else:
+            user_post_day_count, user_post_hour_count = post_counts
             return user_post_day_count, user_post_hour_count, user_table_row
 
     def get_post_tag_data(self, user_id):
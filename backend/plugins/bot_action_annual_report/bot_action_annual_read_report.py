@@ -8,7 +8,7 @@ from ...utils.redis_cache import redis_cache
 
 from .base_bot_report_action import BaseBotReportAction
 from .preprocess_data import preprocess_visit_data
-from .query_database import query_database, query_database_paged
+from .query_database import iter_query_pages, query_database
 
 logger = logging.getLogger(__name__)
 
@@ -17,19 +17,22 @@ class BotReadReport(BaseBotReportAction):
     action_name = "BotReadReport"
     trigger_keyword = "我的2025阅读报告"
 
-    def __init__(self) -> None:
-        super().__init__()
+    def warm_up(self):
         self.load_global_report_data()
 
     def load_global_report_data(self):
         processed_data_path = os.path.join(
             self.config.working_path, "visit_report_processed.pkl")
-        if not os.path.exists(processed_data_path):
-            logger.info("Processed data not found, querying database...")
-            raw_data = query_database_paged(self.api, self.config.user_visit_query_id, {
-            }, self.config.query_group, page_size=300000)
-            logger.info("Query finished, preprocessing data...")
-            preprocess_visit_data(raw_data, processed_data_path)
+        with self.build_lock(processed_data_path):
+            if not os.path.exists(processed_data_path):
+                logger.info("Processed data not found, querying database...")
+                # the pages are aggregated as they are fetched
+                pages = iter_query_pages(self.api, self.config.user_visit_query_id, {
+                }, self.config.query_group, page_size=self.config.query_page_size,
+                    min_page_size=self.config.query_min_page_size, on_page=self.report_query_progress)
+                rows_processed = preprocess_visit_data(pages, processed_data_path)
+                logger.info("Query finished, data preprocessed.")
+                self.warm_up_status.update(rows_processed=rows_processed)
         with open(processed_data_path, "rb") as f:
             self.global_report_data: pd.DataFrame = pickle.load(f)
 
@@ -19,6 +19,15 @@ class BotSummaryReport(BaseBotReportAction):
         self.post_report: Optional[BotPostReport] = None
         self.read_report: Optional[BotReadReport] = None
 
+    @property
+    def ready(self) -> bool:
+        # the summary is made of the other reports, it waits for their warm-up
+        activated_actions = BotManager.activated_actions
+        return all(
+            action_name not in activated_actions or activated_actions[action_name].ready
+            for action_name in (BotInteractionReport.action_name, BotPostReport.action_name, BotReadReport.action_name)
+        )
+
     def _lookup_actions(self):
         if not self.action_cached:
             activated_actions = BotManager.activated_actions
@@ -0,0 +1,67 @@
+import os
+from typing import Optional
+
+import numpy as np
+
+DAYS = 365
+HOURS = 24
+
+
+class PostReportStore:
+    """
+    Post counts of each user by day of year and by hour of day.
+
+    They are kept as dense int32 matrices (users x days, users x hours) whose
+    rows follow `user_ids`, which is sorted. Stored as `.npy` files, they are
+    memory-mapped by `load`, so the workers share the pages of the OS cache
+    and only the rows which are read are loaded.
+    """
+
+    FILES = ("user_ids", "day_counts", "hour_counts")
+
+    def __init__(self, user_ids: np.ndarray, day_counts: np.ndarray, hour_counts: np.ndarray):
+        if not (len(user_ids) == len(day_counts) == len(hour_counts)):
+            raise ValueError("user_ids, day_counts and hour_counts must have the same number of rows.")
+        self.user_ids = user_ids
+        self.day_counts = day_counts
+        self.hour_counts = hour_counts
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def row_of(self, user_id: int) -> Optional[int]:
+        row = int(np.searchsorted(self.user_ids, user_id))
+        if row < len(self.user_ids) and self.user_ids[row] == user_id:
+            return row
+        return None
+
+    def get(self, user_id: int) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """Views of the day and hour counts of the user, None if the user has no post."""
+        row = self.row_of(user_id)
+        if row is None:
+            return None
+        return self.day_counts[row], self.hour_counts[row]
+
+    def save(self, path: str):
+        """Write the matrices as `.npy` files in the directory `path`."""
+        os.makedirs(path, exist_ok=True)
+        for name in self.FILES:
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = "r") -> "PostReportStore":
+        return cls(*(np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in cls.FILES))
+
+    @classmethod
+    def exists(cls, path: str) -> bool:
+        return all(os.path.exists(os.path.join(path, f"{name}.npy")) for name in cls.FILES)
+
+    @classmethod
+    def from_dicts(cls, day_counts: dict, hour_counts: dict) -> "PostReportStore":
+        """Build the store from `{user_id: counts}` dicts of the days and hours."""
+        user_ids = np.array(sorted(day_counts), dtype=np.int64)
+        return cls(
+            user_ids,
+            np.array([day_counts[user_id] for user_id in user_ids], dtype=np.int32).reshape(-1, DAYS),
+            np.array([hour_counts[user_id] for user_id in user_ids], dtype=np.int32).reshape(-1, HOURS),
+        )
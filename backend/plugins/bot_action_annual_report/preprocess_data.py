@@ -1,76 +1,236 @@
-from collections import defaultdict
 import pandas as pd
 import numpy as np
-import pytz
-import re
 import os
 import pickle
-from datetime import datetime
-
-
-def preprocess_posts_data(data: dict, path: str):
-    # colums: id user raw created_at reads
-    raw_rows = data['rows']
-    columns = data['columns']
-    data_table = pd.DataFrame(raw_rows, columns=columns)
-    data_table['created_at'] = data_table['created_at'].map(
-        lambda x: datetime.fromtimestamp(x, pytz.timezone('Asia/Shanghai')))
-    data_table.set_index('id', inplace=True)
-    user_post_count = defaultdict(lambda: 0)
-    user_post_character_count = defaultdict(lambda: 0)
-    user_post_read_count = defaultdict(lambda: 0)
-    user_post_hour_count = defaultdict(lambda: np.zeros(24, dtype=np.int32))
-    user_post_day_count = defaultdict(lambda: np.zeros(365, dtype=np.int32))
-    for row in data_table.itertuples():
-        user_id = row.user_id
-        user_post_count[user_id] += 1
-        user_post_read_count[user_id] += row.reads
-        user_post_character_count[user_id] += len(
-            re.findall(r'[\u4e00-\u9fa5]', row.raw))
-        user_post_hour_count[user_id][row.created_at.hour] += 1
-        day_of_year = row.created_at.timetuple().tm_yday - 1
-        user_post_day_count[user_id][day_of_year] += 1
-    user_post_days = {
-        user_id: np.count_nonzero(user_post_day_count[user_id])
-        for user_id in user_post_day_count
-    }
-    user_table = pd.DataFrame(
-        columns=['user_id', 'post_count', 'post_read_count', 'post_character_count'])
-    user_table.set_index('user_id', inplace=True)
-
-    user_table['post_count'] = pd.Series(
-        user_post_count, copy=True).astype(np.int32)
-    user_table['post_read_count'] = pd.Series(
-        user_post_read_count, copy=True).astype(np.int32)
-    user_table['post_character_count'] = pd.Series(
-        user_post_character_count, copy=True).astype(np.int32)
-    user_table['post_count_rank'] = user_table['post_count'].rank(
-        ascending=False)
-    user_table['post_read_count_rank'] = user_table['post_read_count'].rank(
-        ascending=False)
-    user_table['post_character_count_rank'] = user_table['post_character_count'].rank(
-        ascending=False)
-    user_table['post_days'] = pd.Series(
-        user_post_days, copy=True).astype(np.int32)
-    user_table['post_days_rank'] = user_table['post_days'].rank(
-        ascending=False)
-
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'wb') as f:
-        pickle.dump(user_table, f)
-        pickle.dump(dict(user_post_day_count), f)
-        pickle.dump(dict(user_post_hour_count), f)
-
-
-def preprocess_visit_data(data: dict, path: str):
-    table = pd.DataFrame(data['rows'], columns=data['columns'])
-    table.set_index('user_id', inplace=True)
-    table['posts_read_rank'] = table['posts_read'].rank(
-        method='min', ascending=False)
-    table['time_read_rank'] = table['time_read'].rank(
-        method='min', ascending=False)
-    table['days_visited_rank'] = table['days_visited'].rank(
-        method='min', ascending=False)
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'wb') as f:
-        pickle.dump(table, f)
+import shutil
+import tempfile
+from typing import Iterable
+
+from ...utils.file_lock import file_lock
+from .post_report_store import DAYS, HOURS, PostReportStore
+
+USER_TABLE_FILE = "user_table.pkl"
+
+
+# Asia/Shanghai has had no daylight saving time since 1991
+LOCAL_UTC_OFFSET = 8 * 3600
+# Chinese characters counted in the posts, U+4E00 to U+9FA5
+CJK_FIRST, CJK_LAST = 0x4e00, 0x9fa5
+# strings decoded at once by `count_cjk_characters`, bounds its memory use
+CJK_COUNT_CHUNK_SIZE = 100_000
+
+
+def local_hour_and_day_of_year(timestamps: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Hour of day and day of year (from 0) of epoch seconds in Asia/Shanghai."""
+    local_seconds = np.floor(timestamps).astype(np.int64) + LOCAL_UTC_OFFSET
+    local_days = local_seconds // 86400
+    year_first_days = local_days.astype('datetime64[D]').astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64)
+    return (local_seconds // 3600) % 24, local_days - year_first_days
+
+
+def count_cjk_characters(texts: list[str]) -> np.ndarray:
+    """
+    Number of Chinese characters in each text.
+
+    The texts are joined and decoded as UTF-32 code points, which are
+    compared at once and summed per text with a cumulative sum.
+    """
+    counts = np.zeros(len(texts), dtype=np.int64)
+    for start in range(0, len(texts), CJK_COUNT_CHUNK_SIZE):
+        chunk = [text or '' for text in texts[start:start + CJK_COUNT_CHUNK_SIZE]]
+        lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+        code_points = np.frombuffer(''.join(chunk).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32)
+        is_cjk = (code_points >= CJK_FIRST) & (code_points <= CJK_LAST)
+        cjk_before = np.concatenate(([0], np.cumsum(is_cjk, dtype=np.int64)))
+        ends = np.cumsum(lengths)
+        counts[start:start + len(chunk)] = cjk_before[ends] - cjk_before[ends - lengths]
+    return counts
+
+
+def _page_columns(page: dict) -> dict:
+    """Columns of a query page, as tuples of values."""
+    if len(page['rows']) == 0:
+        return dict.fromkeys(page['columns'], ())
+    return dict(zip(page['columns'], zip(*page['rows'])))
+
+
+class PostsAggregator:
+    """
+    Fold pages of posts (columns: id user_id raw created_at reads) into
+    per-user counters, the raw texts are dropped after each page.
+
+    The users are kept in the order of their first post.
+    """
+
+    def __init__(self):
+        # user id -> row of the counters
+        self.user_rows: dict[int, int] = {}
+        self.rows_processed = 0
+        self._post_counts = np.zeros(0, dtype=np.int64)
+        self._read_counts = np.zeros(0, dtype=np.float64)
+        self._character_counts = np.zeros(0, dtype=np.int64)
+        self._day_counts = np.zeros((0, DAYS), dtype=np.int32)
+        self._hour_counts = np.zeros((0, HOURS), dtype=np.int32)
+
+    def _reserve(self, user_count: int):
+        """Grow the counters to hold `user_count` users, doubling their capacity."""
+        capacity = len(self._post_counts)
+        if user_count <= capacity:
+            return
+        new_capacity = max(user_count, 2 * capacity)
+
+        def grow(counts: np.ndarray) -> np.ndarray:
+            grown = np.zeros((new_capacity,) + counts.shape[1:], dtype=counts.dtype)
+            grown[:capacity] = counts
+            return grown
+        self._post_counts = grow(self._post_counts)
+        self._read_counts = grow(self._read_counts)
+        self._character_counts = grow(self._character_counts)
+        self._day_counts = grow(self._day_counts)
+        self._hour_counts = grow(self._hour_counts)
+
+    def add_page(self, page: dict):
+        column_values = _page_columns(page)
+        page_rows, page_user_ids = pd.factorize(np.array(column_values['user_id'], dtype=np.int64), sort=False)
+        page_user_count = len(page_user_ids)
+        hours, days = local_hour_and_day_of_year(np.array(column_values['created_at'], dtype=np.float64))
+        if len(days) > 0 and days.max() >= DAYS:
+            raise ValueError(f"Posts must be in a year of {DAYS} days.")
+
+        # the users of a page are distinct, their counters are added at once
+        rows = np.fromiter(
+            (self.user_rows.setdefault(user_id, len(self.user_rows)) for user_id in page_user_ids.tolist()),
+            dtype=np.int64, count=page_user_count)
+        self._reserve(len(self.user_rows))
+        self._post_counts[rows] += np.bincount(page_rows, minlength=page_user_count)
+        self._read_counts[rows] += np.bincount(
+            page_rows, weights=np.array(column_values['reads'], dtype=np.float64), minlength=page_user_count)
+        self._character_counts[rows] += np.bincount(
+            page_rows, weights=count_cjk_characters(column_values['raw']), minlength=page_user_count).astype(np.int64)
+        self._hour_counts[rows] += np.bincount(
+            page_rows * HOURS + hours, minlength=page_user_count * HOURS).astype(np.int32).reshape(page_user_count, HOURS)
+        self._day_counts[rows] += np.bincount(
+            page_rows * DAYS + days, minlength=page_user_count * DAYS).astype(np.int32).reshape(page_user_count, DAYS)
+        self.rows_processed += len(page['rows'])
+
+    def result(self) -> tuple[pd.DataFrame, PostReportStore]:
+        """The user table and the post counts by day and by hour."""
+        user_count = len(self.user_rows)
+        user_ids = np.fromiter(self.user_rows, dtype=np.int64, count=user_count)
+        day_counts = self._day_counts[:user_count]
+        hour_counts = self._hour_counts[:user_count]
+
+        user_table = pd.DataFrame(index=pd.Index(user_ids, name='user_id'))
+        user_table['post_count'] = self._post_counts[:user_count].astype(np.int32)
+        user_table['post_read_count'] = self._read_counts[:user_count].astype(np.int32)
+        user_table['post_character_count'] = self._character_counts[:user_count].astype(np.int32)
+        user_table['post_count_rank'] = user_table['post_count'].rank(
+            ascending=False)
+        user_table['post_read_count_rank'] = user_table['post_read_count'].rank(
+            ascending=False)
+        user_table['post_character_count_rank'] = user_table['post_character_count'].rank(
+            ascending=False)
+        user_table['post_days'] = np.count_nonzero(day_counts, axis=1).astype(np.int32)
+        user_table['post_days_rank'] = user_table['post_days'].rank(
+            ascending=False)
+
+        # the store is sorted by user id
+        order = np.argsort(user_ids, kind='stable')
+        store = PostReportStore(user_ids[order], day_counts[order], hour_counts[order])
+        return user_table, store
+
+
+class VisitsAggregator:
+    """
+    Collect pages of per-user visit stats (columns: user_id posts_read
+    time_read days_visited ...) as compact frames instead of lists of rows.
+    """
+
+    def __init__(self):
+        self.rows_processed = 0
+        self._frames: list[pd.DataFrame] = []
+        self._columns = None
+
+    def add_page(self, page: dict):
+        self._columns = page['columns']
+        if len(page['rows']) > 0:
+            self._frames.append(pd.DataFrame(page['rows'], columns=page['columns']))
+        self.rows_processed += len(page['rows'])
+
+    def result(self) -> pd.DataFrame:
+        if len(self._frames) > 0:
+            table = pd.concat(self._frames, ignore_index=True)
+        else:
+            table = pd.DataFrame(columns=self._columns)
+        table.set_index('user_id', inplace=True)
+        table['posts_read_rank'] = table['posts_read'].rank(
+            method='min', ascending=False)
+        table['time_read_rank'] = table['time_read'].rank(
+            method='min', ascending=False)
+        table['days_visited_rank'] = table['days_visited'].rank(
+            method='min', ascending=False)
+        return table
+
+
+def aggregate_posts_data(data: dict) -> tuple[pd.DataFrame, PostReportStore]:
+    """
+    Aggregate the posts (columns: id user_id raw created_at reads) by user.
+
+    Returns the user table, with the users in the order of their first post,
+    and their post counts by day and by hour.
+    """
+    aggregator = PostsAggregator()
+    aggregator.add_page(data)
+    return aggregator.result()
+
+
+def preprocess_posts_data(pages: Iterable[dict], path: str) -> int:
+    """
+    Aggregate the pages of posts by user into the directory `path`: the user
+    table (`USER_TABLE_FILE`) and the day and hour counts as a `PostReportStore`.
+
+    Returns the number of posts.
+    """
+    aggregator = PostsAggregator()
+    for page in pages:
+        aggregator.add_page(page)
+    user_table, store = aggregator.result()
+
+    # written next to `path` first, so that a reader never sees a partial result
+    # and concurrent writers, e.g. several workers, do not share their temporary directory
+    path = os.path.normpath(path)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        store.save(tmp_path)
+        with open(os.path.join(tmp_path, USER_TABLE_FILE), 'wb') as f:
+            pickle.dump(user_table, f)
+        with file_lock(f"{path}.lock"):
+            shutil.rmtree(path, ignore_errors=True)
+            os.rename(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return aggregator.rows_processed
+
+
+def preprocess_visit_data(pages: Iterable[dict], path: str) -> int:
+    """Collect the pages of visit stats into a table pickled at `path`, returns the number of users."""
+    aggregator = VisitsAggregator()
+    for page in pages:
+        aggregator.add_page(page)
+    table = aggregator.result()
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(table, f)
+        with file_lock(f"{path}.lock"):
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return aggregator.rows_processed
@@ -1,10 +1,18 @@
 from ...discourse_api import BotAPI
+from ...utils.ratelimiter import reserved_call
 from fluent_discourse import DiscourseError
 import json
+import logging
+import queue
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import wraps
+from typing import Callable, ContextManager
 import threading
 
-GLOBAL_QUERY_LOCK = threading.Lock()
+logger = logging.getLogger(__name__)
 
 def format_params(params):
     if params is None:
@@ -19,53 +27,260 @@ def format_params(params):
                 params[k] = str(v)
         return params
 
+class QueryGate:
+    """
+    Run the Data Explorer queries of the reports with bounded concurrency.
+
+    At most `max_concurrent` queries run at once. Identical queries called
+    while one is running wait for it and share its result, which is then
+    kept `cache_ttl` seconds in a bounded LRU. Shared results must not be
+    modified by the callers.
+    """
+
+    def __init__(self, max_concurrent: int = 4, cache_ttl: float = 60, cache_size: int = 1024):
+        self._lock = threading.Lock()
+        self._in_flight: dict[tuple, Future] = {}
+        self._cache: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+        self._queries = 0
+        self._coalesced = 0
+        self._cache_hits = 0
+        self.configure(max_concurrent, cache_ttl, cache_size)
+
+    def configure(self, max_concurrent: int, cache_ttl: float, cache_size: int = 1024):
+        """Running queries keep the slots they hold, the new limit applies to the next ones."""
+        if max_concurrent <= 0:
+            raise ValueError("max_concurrent must be positive.")
+        with self._lock:
+            if getattr(self, 'max_concurrent', None) != max_concurrent:
+                self._semaphore = threading.BoundedSemaphore(max_concurrent)
+            self.max_concurrent = max_concurrent
+            self.cache_ttl = cache_ttl
+            self.cache_size = cache_size
+            self._evict(time.monotonic())
+
+    def _evict(self, now: float):
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        for key in [key for key, (expires_at, _) in self._cache.items() if expires_at <= now]:
+            del self._cache[key]
+
+    def run(self, key: tuple, query: Callable[[], dict],
+            reserve: Callable[[], ContextManager] | None = None) -> dict:
+        """
+        `reserve()` is entered before waiting for a slot, e.g. to wait for the
+        rate limit without holding the slot, only when the query is run.
+        """
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                self._cache_hits += 1
+                return cached[1]
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self._coalesced += 1
+        if not is_leader:
+            return future.result()
+
+        try:
+            with reserve() if reserve is not None else nullcontext():
+                with self._semaphore:
+                    result = query()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            self._queries += 1
+            if self.cache_ttl > 0:
+                self._cache[key] = (time.monotonic() + self.cache_ttl, result)
+                self._evict(time.monotonic())
+        future.set_result(result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "in_flight": len(self._in_flight),
+                "queries": self._queries,
+                "coalesced": self._coalesced,
+                "cache_hits": self._cache_hits,
+                "cache_size": len(self._cache),
+            }
+
+
+query_gate = QueryGate()
+
+
 def query_database(api: BotAPI, query_id: int, params=None, query_group="bot"):
     query = format_params(params)
-    with GLOBAL_QUERY_LOCK:
-        res = api.client.g[query_group].reports[query_id].run.json.post(
-            {"params": json.dumps(query)})
-    return res
+    key = (query_group, query_id, json.dumps(query, sort_keys=True))
+    endpoint = api.client.g[query_group].reports[query_id].run.json
+    return query_gate.run(
+        key, lambda: endpoint.post({"params": json.dumps(query)}),
+        reserve=lambda: reserved_call(api.username, 'POST', endpoint._make_url()))
 
 
-def query_database_paged(api: BotAPI, query_id: int, params=None, query_group="bot", page_size=300000):
-    result = {
-        "rows": [],
-        "columns": None,
-        "duration": 0.0,
-        "result_count": 0
-    }
+def iter_query_pages(api: BotAPI, query_id: int, params=None, query_group="bot", page_size=300000, on_page=None,
+                     cursor_columns=None, min_page_size=None):
+    """
+    Run the query page by page, yield each page as `{"columns", "rows", "duration", "result_count"}`.
+
+    Only one page is held at a time, the caller should fold it and drop it.
+    `on_page(pages_fetched, rows_fetched)` is called after each page.
+
+    Pages are read with `:offset` unless `cursor_columns` are given: the
+    values of these columns in the last row of a page are then passed as
+    `:cursor_<column>` for the next one, the query selects the rows after the
+    cursor in the order of these columns (keyset pagination). The cursor
+    parameters of the first page are left to the defaults of the query.
+
+    On a statement timeout the page size is halved down to `min_page_size`,
+    the query fails after three timeouts in a row at the smallest size.
+    """
     if params is None:
         params = {}
+    if min_page_size is None:
+        min_page_size = page_size
+    columns = None
+    cursor = {}
     has_more = True
     retry_times_left = 3
     current_page = 0
+    rows_fetched = 0
     while has_more:
         paged_params = params.copy()
-        paged_params['offset'] = current_page * page_size
+        if cursor_columns is None:
+            paged_params['offset'] = rows_fetched
+        else:
+            paged_params.update(cursor)
         query = format_params(paged_params)
         try:
             res = api.client.g[query_group].reports[query_id].run.json.post(
                 {"params": json.dumps(query), "limit": page_size})
         except DiscourseError as e:
             if "statement timeout" in e.args[0]:
+                if page_size > min_page_size:
+                    page_size = max(page_size // 2, min_page_size)
+                    retry_times_left = 3
+                    logger.warning(f"Query {query_id} timed out, page size is decreased to {page_size}.")
+                    continue
                 retry_times_left -= 1
                 if retry_times_left == 0:
                     raise DiscourseError(
-                        "Query timeout, max retry times reached, please decrease page_size and try again.")
+                        "Query timeout, max retry times reached, please decrease min_page_size and try again.")
                 else:
                     continue
             else:
                 raise
         has_more = len(res["rows"]) == page_size
-        if result["columns"] is None:
-            result["columns"] = res["columns"]
+        if columns is None:
+            columns = res["columns"]
         else:
-            assert result["columns"] == res["columns"], "Columns not match"
-        result["rows"].extend(res["rows"])
-        result["duration"] += res["duration"]
-        result["result_count"] += res["result_count"]
+            assert columns == res["columns"], "Columns not match"
+        if cursor_columns is not None and len(res["rows"]) > 0:
+            last_row = res["rows"][-1]
+            cursor = {f"cursor_{column}": last_row[columns.index(column)] for column in cursor_columns}
         retry_times_left = 3
         current_page += 1
+        rows_fetched += len(res["rows"])
+        if on_page is not None:
+            on_page(current_page, rows_fetched)
+        yield res
+
+
+def time_partitions(start: float, end: float, count: int) -> list[dict]:
+    """Split the epoch seconds [start, end) into `count` ranges `{"range_start", "range_end"}`."""
+    bounds = [start + (end - start) * i / count for i in range(count)] + [end]
+    return [{"range_start": bounds[i], "range_end": bounds[i + 1]} for i in range(count)]
+
+
+def iter_query_partitions(api: BotAPI, query_id: int, partitions: list[dict], params=None, query_group="bot",
+                          workers=None, on_page=None, **kwargs):
+    """
+    Run the query once per partition, e.g. `time_partitions`, the parameters
+    of a partition are added to `params`. Up to `workers` partitions are
+    fetched concurrently with `iter_query_pages` (`kwargs`), their pages are
+    yielded as they arrive, in no particular order.
+
+    `on_page(pages_fetched, rows_fetched)` is called with the totals of all
+    the partitions.
+    """
+    if params is None:
+        params = {}
+    workers = min(workers or len(partitions), len(partitions))
+    # the fetching threads wait while the pages are not consumed
+    pages = queue.Queue(maxsize=workers)
+    partition_done = object()
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch(partition: dict):
+        try:
+            for page in iter_query_pages(api, query_id, {**params, **partition}, query_group, **kwargs):
+                if not put(page):
+                    return
+        except Exception as e:
+            put(e)
+            return
+        put(partition_done)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"query-{query_id}")
+    for partition in partitions:
+        executor.submit(fetch, partition)
+    partitions_left = len(partitions)
+    pages_fetched = 0
+    rows_fetched = 0
+    try:
+        while partitions_left > 0:
+            item = pages.get()
+            if item is partition_done:
+                partitions_left -= 1
+                continue
+            if isinstance(item, Exception):
+                raise item
+            pages_fetched += 1
+            rows_fetched += len(item["rows"])
+            if on_page is not None:
+                on_page(pages_fetched, rows_fetched)
+            yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def query_database_paged(api: BotAPI, query_id: int, params=None, query_group="bot", page_size=300000, on_page=None,
+                         **kwargs):
+    """Collect every page of `iter_query_pages` into one result."""
+    result = {
+        "rows": [],
+        "columns": None,
+        "duration": 0.0,
+        "result_count": 0
+    }
+    for page in iter_query_pages(api, query_id, params, query_group, page_size, on_page, **kwargs):
+        result["columns"] = page["columns"]
+        result["rows"].extend(page["rows"])
+        result["duration"] += page["duration"]
+        result["result_count"] += page["result_count"]
     return result
 
 def retry_when_timeout(retry_times=3):
@@ -1,13 +1,10 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime
-import seaborn as sns
-import matplotlib.font_manager as fm
-from scipy.interpolate import make_interp_spline
-from scipy.ndimage import gaussian_filter1d
-from matplotlib.colors import LinearSegmentedColormap
 from io import BytesIO
 
+# matplotlib, seaborn and scipy take seconds to import, they are imported by
+# the plot functions so that loading the plugin stays fast
+
 CURRENT_YEAR = 2025
 
 
@@ -45,6 +42,11 @@ def get_most_active_month(month_avg_posts):
 
 
 def plot_post_activity_hour(post_hour):
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LinearSegmentedColormap
+    from scipy.interpolate import make_interp_spline
+    from scipy.ndimage import gaussian_filter1d
+
     x = np.arange(24*3)
     y = np.tile(post_hour, 3)
     y = gaussian_filter1d(y, sigma=0.7)
@@ -96,6 +98,10 @@ def plot_post_activity_hour(post_hour):
 
 
 def plot_post_activity_year(post_day):
+    import matplotlib.font_manager as fm
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     offset = datetime(CURRENT_YEAR, 1, 1).weekday()
     activity = np.zeros(7*53)
     activity[offset:offset + len(post_day)] = post_day
@@ -0,0 +1,19 @@
+-- [params]
+-- double :range_start = 1735660800
+-- double :range_end = 1767196800
+-- double :cursor_created_at = 0
+-- int :cursor_id = 0
+
+SELECT posts.id,posts.user_id,raw,EXTRACT(EPOCH FROM posts.created_at) AS created_at,reads FROM posts
+JOIN topics
+ON posts.topic_id = topics.id
+WHERE 
+posts.created_at >= to_timestamp(:range_start)
+AND posts.created_at < to_timestamp(:range_end)
+AND (posts.created_at, posts.id) > (to_timestamp(:cursor_created_at), :cursor_id)
+AND posts.deleted_at is NULL
+AND NOT posts.hidden
+AND topics.archetype = 'regular'
+AND topics.deleted_at is NULL
+AND posts.post_type = 1
+ORDER BY posts.created_at, posts.id
\ No newline at end of file
@@ -1,3 +1,5 @@
 from .bot_dice import BotDice
 
 __all__ = ["BotDice"]
+
+__action_config_keys__ = ["BotDice"]
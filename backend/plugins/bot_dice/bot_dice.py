@@ -18,6 +18,7 @@ class ParseError(ValueError):
 
 class BotDice(BotAction):
     action_name = "BotDice"
+    concurrent = True
 
     @staticmethod
     def help_message():
@@ -159,7 +160,7 @@ class BotDice(BotAction):
     def should_response(self, post: Post):
         return super().should_response(post) and "投掷" in post.raw
 
-    @on("post_created")
+    @on("post_created", keywords=["投掷"], exclude_bots=True)
     def on_post_created(self, post: Post):
         if not self.should_response(post):
             return False
@@ -169,7 +170,7 @@ class BotDice(BotAction):
         else:
             reply_text = self.get_reply(post)
 
-        self.api.create_post(reply_text, post.topic_id,
-                             post.post_number, skip_validations=True)
+        self.reply_api.create_post(reply_text, post.topic_id,
+                                   post.post_number, skip_validations=True)
 
         return True
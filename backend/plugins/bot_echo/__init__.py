@@ -1,3 +1,5 @@
 from .bot_echo import BotEcho
 
 __all__ = ["BotEcho"]
+
+__action_config_keys__ = ["BotEcho"]
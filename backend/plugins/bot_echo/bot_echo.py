@@ -5,6 +5,7 @@ import json
 
 class BotEcho(BotAction):
     action_name = "BotEcho"
+    concurrent = True
 
     def get_reply(self, post: Post):
         return f"```\n{json.dumps(post.model_dump(), indent=4, ensure_ascii=False)}\n```"
@@ -15,8 +16,8 @@ class BotEcho(BotAction):
 
             reply_text = self.get_reply(post)
 
-            self.api.create_post(reply_text, post.topic_id,
-                                 post.post_number, skip_validations=True)
+            self.reply_api.create_post(reply_text, post.topic_id,
+                                       post.post_number, skip_validations=True)
 
     @on("ping")
     def on_ping(self, *args, **kwargs):
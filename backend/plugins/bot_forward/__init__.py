@@ -1,3 +1,5 @@
 from .bot_forward import BotForward
 
-__all__ = ["BotForward"]
\ No newline at end of file
+__all__ = ["BotForward"]
+
+__action_config_keys__ = ["BotForward"]
@@ -14,6 +14,7 @@ class ForwardTask(BaseModel):
 
 class BotForward(BotAction):
     action_name = "BotForward"
+    concurrent = True
 
     def __init__(self):
         super().__init__()
@@ -1,3 +1,5 @@
 from .bot_public_post_webhook_forward import BotPublicPostWebhookForward
 
 __all__ = ["BotPublicPostWebhookForward"]
+
+__action_config_keys__ = ["BotPublicPostWebhookForward"]
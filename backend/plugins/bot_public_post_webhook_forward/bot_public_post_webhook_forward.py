@@ -1,17 +1,16 @@
 import logging
 from typing import Optional
 
-import requests
-
 from ...bot_action import BotAction, on
 from ...event_context import EventContext
-from ...model.post import Post
+from ...utils.http_session import get_http_session
 
 logger = logging.getLogger(__name__)
 
 
 class BotPublicPostWebhookForward(BotAction):
     action_name = "BotPublicPostWebhookForward"
+    concurrent = True
     default_timeout_seconds = 5
 
     def __init__(self):
@@ -28,11 +27,8 @@ class BotPublicPostWebhookForward(BotAction):
                 logger.warning("BotPublicPostWebhookForward is enabled but webhook_url is not configured.")
 
     @on("post_created")
-    def on_post_created(
-        self,
-        post: Post,
-        event_context: EventContext,
-    ):
+    def on_post_created(self, event_context: EventContext):
+        # no `post` argument, so that BotManager does not build a Post model for this action
         if not self.webhook_url:
             return
 
@@ -54,7 +50,7 @@ class BotPublicPostWebhookForward(BotAction):
     def forward_webhook(self, raw_body: bytes, event_headers: dict[str, str]):
         headers = dict(event_headers)
         try:
-            response = requests.post(
+            response = get_http_session().post(
                 self.webhook_url,
                 data=raw_body,
                 headers=headers,
@@ -1,3 +1,5 @@
 from .bot_rss_fwd import BotRssFwd
 
-__all__ = ["BotRssFwd"]
\ No newline at end of file
+__all__ = ["BotRssFwd"]
+
+__action_config_keys__ = ["BotRssFwd"]
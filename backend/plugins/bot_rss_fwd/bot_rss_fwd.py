@@ -9,13 +9,16 @@ from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 from pydantic import BaseModel
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 
 from .markdown_converter import render_md
+from .seen_guid_cache import SeenGuidCache
 from ...db import Base
 from ...db import db_manager as DBManager
 from ...model import Post
 from ...bot_action import BotAction, scheduled
 from ...bot_account_manager import account_manager as AccountManager
+from ...bot_kv_storage import storage as KVStorage
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +40,15 @@ class BotRssFwdConfig(BaseModel):
     enabled: bool
     rsshub_url: str
     tasks: list['RssFwdTaskConfig']
+    # number of feeds fetched at the same time
+    fetch_workers: int = 8
+    # recently recorded GUIDs kept in memory per task, 0 to disable
+    seen_guid_cache_size: int = 1000
+    # also keep the recorded GUIDs in Redis, shared between processes
+    seen_guid_cache_redis: bool = False
+    # most recent GUIDs kept in Redis per task, and seconds they are kept after the last one
+    seen_guid_cache_redis_size: int = 10000
+    seen_guid_cache_redis_ttl: int = 30 * 24 * 3600
 
 class RssFwdTaskConfig(BaseModel):
     endpoint: str
@@ -53,7 +65,7 @@ class RssFwdTaskConfig(BaseModel):
     
     @property
     def is_new_task(self):
-        return RssFwdRecord.where(task_id=self.task_key).count() == 0
+        return RssFwdRecord.where(task_id=self.task_key).with_entities(RssFwdRecord.id).first() is None
 
     def __init__(self, **data):
         super().__init__(**data)
@@ -80,6 +92,14 @@ class BotRssFwd(BotAction):
         super().__init__()
         self.config: BotRssFwdConfig = BotRssFwdConfig(**self.config)
         self.base_url = self.config.rsshub_url
+        redis_client = None
+        if self.config.seen_guid_cache_redis:
+            from ...utils.redis_cache import get_redis_client
+            redis_client = get_redis_client()
+        self.seen_guids = SeenGuidCache(
+            self.config.seen_guid_cache_size, redis_client,
+            redis_max_size=self.config.seen_guid_cache_redis_size,
+            redis_ttl=self.config.seen_guid_cache_redis_ttl)
 
     @staticmethod
     def feed_time_to_local_timezone(feed_time: time.struct_time) -> time.struct_time:
@@ -91,18 +111,35 @@ class BotRssFwd(BotAction):
         element = BeautifulSoup(feed.summary, 'lxml')
         return render_md(element)
     
+    @staticmethod
+    def feed_record(task: RssFwdTaskConfig, feed: FeedParserDict, post: Optional[Post] = None) -> dict:
+        return {
+            "task_id": task.task_key,
+            "guid": feed.guid,
+            "topic_id": post.topic_id if post is not None else None,
+            "post_id": post.id if post is not None else None,
+        }
+
     def record_feed(self, task: RssFwdTaskConfig, feed: FeedParserDict, post: Optional[Post] = None):
-        record = RssFwdRecord(task_id=task.task_key, guid=feed.guid)
-        if post is not None:
-            record.topic_id = post.topic_id
-            record.post_id = post.id
-        record.save()
+        self.record_feeds(task, [self.feed_record(task, feed, post)])
+
+    def record_feeds(self, task: RssFwdTaskConfig, records: list[dict]):
+        RssFwdRecord.bulk_insert(records)
+        self.seen_guids.add(task.task_key, [record["guid"] for record in records])
+
+    def is_new_task(self, task: RssFwdTaskConfig) -> bool:
+        return not self.seen_guids.has_task(task.task_key) and task.is_new_task
 
     def filter_feed(self, feeds: list[FeedParserDict], task: RssFwdTaskConfig) -> list[FeedParserDict]:
-        filtered_feeds = []
-        for feed in feeds:
-            if RssFwdRecord.find(task_id=task.task_key, guid=feed.guid) is None:
-                filtered_feeds.append(feed)
+        unseen_guids = self.seen_guids.unseen(task.task_key, [feed.guid for feed in feeds])
+        if len(unseen_guids) > 0:
+            recorded_guids = {guid for guid, in RssFwdRecord.where(
+                RssFwdRecord.task_id == task.task_key,
+                RssFwdRecord.guid.in_(unseen_guids),
+            ).with_entities(RssFwdRecord.guid)}
+            self.seen_guids.add(task.task_key, recorded_guids)
+            unseen_guids = set(unseen_guids) - recorded_guids
+        filtered_feeds = [feed for feed in feeds if feed.guid in unseen_guids]
         filtered_feeds.sort(key=lambda feed: feed.published_parsed)
         return filtered_feeds
 
@@ -123,39 +160,89 @@ class BotRssFwd(BotAction):
             )
         return Post(**result)
 
+    def feed_cache_key(self, task: RssFwdTaskConfig) -> str:
+        return f"{self.action_name}.feed_cache.{task.task_key}"
+
+    def fetch_feed(self, task: RssFwdTaskConfig) -> Optional[FeedParserDict]:
+        """
+        Fetch the feed of a task with a conditional request, using the ETag and
+        Last-Modified of the last processed response.
+
+        Return None if the feed is not modified or could not be parsed.
+        """
+        feed_url = urljoin(self.base_url, task.endpoint)
+        feed_cache = KVStorage.get(self.feed_cache_key(task)) or {}
+        conditional_args = {name: value for name, value in feed_cache.items() if value is not None}
+        rss_response = feedparser.parse(feed_url, **conditional_args)
+        if rss_response.get('status') == 304:
+            logger.debug(f"RSS feed {feed_url} is not modified.")
+            return None
+        if rss_response.bozo:
+            logger.warning(f"Failed to parse RSS feed {feed_url}.")
+            return None
+        return rss_response
+
+    def save_feed_cache(self, task: RssFwdTaskConfig, rss_response: FeedParserDict):
+        etag = rss_response.get('etag')
+        modified = rss_response.get('modified')
+        if etag is not None or modified is not None:
+            KVStorage.set(self.feed_cache_key(task), {"etag": etag, "modified": modified})
+
     def process_task(self, task: RssFwdTaskConfig):
         if not task.enabled:
             logger.debug(f"RSS forward task {task.endpoint} is disabled.")
             return
+        rss_response = self.fetch_feed(task)
+        if rss_response is not None:
+            self.process_feed(task, rss_response)
+
+    def process_feed(self, task: RssFwdTaskConfig, rss_response: FeedParserDict):
         feed_url = urljoin(self.base_url, task.endpoint)
-        rss_response = feedparser.parse(feed_url)
-        if rss_response.bozo:
-            logger.warning(f"Failed to parse RSS feed {feed_url}.")
-            return
-        if not task.is_new_task:
+        if not self.is_new_task(task):
             feeds = self.filter_feed(rss_response.entries, task)
             if len(feeds) == 0:
                 logger.debug(f"No new feed in {feed_url}.")
-                return
-            for feed in feeds:
-                title = feed.title if task.title_prefix is None else f"{task.title_prefix} {feed.title}"
-                link = feed.link
-                feed_content_md = self.render_feed(feed)
-                post_content = f"{link}\n\n{feed_content_md}"
-                post = self.create_post_or_topic(task, title, post_content)
-                self.record_feed(task, feed, post)
+            records = []
+            try:
+                for feed in feeds:
+                    title = feed.title if task.title_prefix is None else f"{task.title_prefix} {feed.title}"
+                    link = feed.link
+                    feed_content_md = self.render_feed(feed)
+                    post_content = f"{link}\n\n{feed_content_md}"
+                    post = self.create_post_or_topic(task, title, post_content)
+                    records.append(self.feed_record(task, feed, post))
+            finally:
+                # record the forwarded feeds even if a later one failed, so they are not posted twice
+                self.record_feeds(task, records)
         else:
             # new task, record all existing feeds
             # we only forward new feeds in the future
             logger.debug(f"RSS forward task {task.endpoint} is a new task, no feed will be processed.")
-            for feed in rss_response.entries:
-                self.record_feed(task, feed)
+            self.record_feeds(task, [self.feed_record(task, feed) for feed in rss_response.entries])
+        # only remember the response once all of its entries are handled
+        self.save_feed_cache(task, rss_response)
+
+    def fetch_feed_safely(self, task: RssFwdTaskConfig) -> Optional[FeedParserDict]:
+        try:
+            return self.fetch_feed(task)
+        except Exception:
+            logger.exception(f"Failed to fetch RSS feed of task {task.endpoint}.")
+            return None
 
     @scheduled('interval', minutes=5, next_run_time=datetime.datetime.now())
     def on_scheduled(self):
+        tasks = [task for task in self.config.tasks if task.enabled]
+        if len(tasks) == 0:
+            return
+        # feeds are fetched concurrently, database and forum writes stay in this thread
+        with ThreadPoolExecutor(max_workers=self.config.fetch_workers,
+                                thread_name_prefix="rss-fetch") as executor:
+            responses = list(executor.map(self.fetch_feed_safely, tasks))
         with DBManager.scoped_session():
-            for task in self.config.tasks:
+            for task, rss_response in zip(tasks, responses):
+                if rss_response is None:
+                    continue
                 try:
-                    self.process_task(task)
+                    self.process_feed(task, rss_response)
                 except Exception:
                     logger.exception(f"Failed to process RSS forward task {task.endpoint}.")
@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class SeenGuidCache:
+    """
+    Per task LRU of the feed GUIDs that are already recorded in the database.
+
+    It lets a poll without new entries skip the database. When `redis_client`
+    is given, the GUIDs are also kept in a Redis sorted set per task, scored
+    by the time they were added, so that they are shared between processes
+    and survive restarts, the local LRU is still checked first. The set keeps
+    the `redis_max_size` most recent GUIDs and expires `redis_ttl` seconds
+    after the last one was added, older GUIDs are found in the database.
+    """
+
+    def __init__(self, max_size: int = 1000, redis_client=None, key_prefix: str = "rss_fwd.seen_at",
+                 redis_max_size: int = 10000, redis_ttl: int = 30 * 24 * 3600):
+        self.max_size = max_size
+        self.redis_client = redis_client
+        self.key_prefix = key_prefix
+        self.redis_max_size = redis_max_size
+        self.redis_ttl = redis_ttl
+        self._tasks: dict[str, OrderedDict[str, None]] = {}
+        self._lock = threading.Lock()
+
+    def _redis_key(self, task_key: str) -> str:
+        return f"{self.key_prefix}:{task_key}"
+
+    def has_task(self, task_key: str) -> bool:
+        """Whether any GUID of the task is known, i.e. the task is not new."""
+        with self._lock:
+            if len(self._tasks.get(task_key, ())) > 0:
+                return True
+        if self.redis_client is not None:
+            try:
+                return self.redis_client.exists(self._redis_key(task_key)) > 0
+            except Exception as e:
+                logger.warning(f"Failed to read seen GUIDs of {task_key} from Redis: {e}")
+        return False
+
+    def unseen(self, task_key: str, guids: Iterable[str]) -> list[str]:
+        """Return the GUIDs which are not known to be recorded."""
+        with self._lock:
+            seen = self._tasks.get(task_key, OrderedDict())
+            unseen = []
+            for guid in guids:
+                if guid in seen:
+                    seen.move_to_end(guid)
+                else:
+                    unseen.append(guid)
+        if len(unseen) > 0 and self.redis_client is not None:
+            try:
+                scores = self.redis_client.zmscore(self._redis_key(task_key), unseen)
+            except Exception as e:
+                logger.warning(f"Failed to read seen GUIDs of {task_key} from Redis: {e}")
+            else:
+                self._add_local(task_key, [guid for guid, score in zip(unseen, scores) if score is not None])
+                unseen = [guid for guid, score in zip(unseen, scores) if score is None]
+        return unseen
+
+    def add(self, task_key: str, guids: Iterable[str]):
+        guids = list(guids)
+        if len(guids) == 0:
+            return
+        self._add_local(task_key, guids)
+        if self.redis_client is not None:
+            redis_key = self._redis_key(task_key)
+            now = time.time()
+            try:
+                pipeline = self.redis_client.pipeline(transaction=False)
+                pipeline.zadd(redis_key, {guid: now for guid in guids})
+                pipeline.zremrangebyrank(redis_key, 0, -self.redis_max_size - 1)
+                pipeline.expire(redis_key, self.redis_ttl)
+                pipeline.execute()
+            except Exception as e:
+                logger.warning(f"Failed to write seen GUIDs of {task_key} to Redis: {e}")
+
+    def _add_local(self, task_key: str, guids: list[str]):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            seen = self._tasks.setdefault(task_key, OrderedDict())
+            for guid in guids:
+                seen[guid] = None
+                seen.move_to_end(guid)
+            while len(seen) > self.max_size:
+                seen.popitem(last=False)
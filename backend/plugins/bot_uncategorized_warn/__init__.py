@@ -1,3 +1,5 @@
 from .bot_uncategorized_warn import BotUncategorizedWarn
 
 __all__ = ["BotUncategorizedWarn"]
+
+__action_config_keys__ = ["BotUncategorizedWarn"]
@@ -3,7 +3,8 @@ from ...model.topic import Topic
 from ...db import db_manager as DBManager
 from ...db import Base
 
-from sqlalchemy import Column, Integer, DateTime, Enum
+from sqlalchemy import Column, Integer, DateTime, Enum, Index
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum as PyEnum
 from pytz import UTC
 import datetime
@@ -26,6 +27,10 @@ class UncategorizedTopicWarningRecord(Base):
     status = Column(Enum(WarningStatus), default=WarningStatus.PENDING, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.datetime.now(UTC), nullable=False)
 
+    __table_args__ = (
+        Index('idx_status_created_at', 'status', 'created_at'),
+    )
+
 UNCATEGORIZED_WARN_MESSAGE = "请勿选择未分类，也请不要随意发在聊聊水源，发帖前仔细阅读分类描述后选择。"
 
 class BotUncategorizedWarn(BotAction):
@@ -41,24 +46,46 @@ class BotUncategorizedWarn(BotAction):
 
     @scheduled('interval', minutes=10, next_run_time=datetime.datetime.now())
     def check_warnings(self):
+        # created_at is stored as naive UTC
+        now = datetime.datetime.now(UTC).replace(tzinfo=None)
+        expire_before = now - datetime.timedelta(minutes=30)
         with DBManager.scoped_session():
-            records = UncategorizedTopicWarningRecord.where(status=WarningStatus.PENDING).all()
+            expired_records = UncategorizedTopicWarningRecord.where(
+                UncategorizedTopicWarningRecord.status == WarningStatus.PENDING,
+                UncategorizedTopicWarningRecord.created_at < expire_before,
+            ).all()
+            recent_records = UncategorizedTopicWarningRecord.where(
+                UncategorizedTopicWarningRecord.status == WarningStatus.PENDING,
+                UncategorizedTopicWarningRecord.created_at >= expire_before,
+            ).all()
+            # ORM objects are bound to this thread's session, workers only get plain values
+            checks = [(record.id, record.topic_id, record.post_id, record.created_at, True)
+                      for record in expired_records]
+            checks += [(record.id, record.topic_id, record.post_id, record.created_at, False)
+                       for record in recent_records]
+            if len(checks) == 0:
+                return
+
+            with ThreadPoolExecutor(max_workers=self.config.get('check_workers', 8)) as executor:
+                results = list(executor.map(lambda check: self._check_warning(now, *check), checks))
 
-            for record in records:
-                try:
-                    topic = Topic(**self.api.get_topic_by_id(record.topic_id))
-                    if topic.category_id != 1:
-                        record.status = WarningStatus.REMOVED
-                        self.api.delete_post(record.post_id)
-                        record.save()
-                    else:
-                        if record.created_at.replace(tzinfo=UTC) < datetime.datetime.now(UTC) - datetime.timedelta(minutes=30):
-                            record.status = WarningStatus.EXPIRED
-                            self.api.archive_topic(topic.id)
-                            record.save()
-                except Exception as e:
-                    logger.exception(f"Error checking warning for topic {record.topic_id}: {e}")
-                    if record.created_at.replace(tzinfo=UTC) < datetime.datetime.now(UTC) - datetime.timedelta(minutes=120):
-                        record.status = WarningStatus.EXCPTION
-                        record.save()
+            UncategorizedTopicWarningRecord.bulk_update([
+                {"id": record_id, "status": status}
+                for (record_id, *_), status in zip(checks, results) if status is not None
+            ])
 
+    def _check_warning(self, now, record_id, topic_id, post_id, created_at, expired):
+        """Check a pending warning and return its new status, None if it stays pending."""
+        try:
+            topic = Topic(**self.api.get_topic_by_id(topic_id))
+            if topic.category_id != 1:
+                self.api.delete_post(post_id)
+                return WarningStatus.REMOVED
+            if expired:
+                self.api.archive_topic(topic.id)
+                return WarningStatus.EXPIRED
+        except Exception as e:
+            logger.exception(f"Error checking warning for topic {topic_id}: {e}")
+            if created_at < now - datetime.timedelta(minutes=120):
+                return WarningStatus.EXCPTION
+        return None
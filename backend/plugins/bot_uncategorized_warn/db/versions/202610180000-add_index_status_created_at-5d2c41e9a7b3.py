@@ -0,0 +1,25 @@
+"""Add index on status and created_at
+
+Revision ID: 5d2c41e9a7b3
+Revises: b0e6e37f5044
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2c41e9a7b3'
+down_revision: Union[str, None] = 'b0e6e37f5044'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_status_created_at', 'uncategorized_topic_warning_records', ['status', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_status_created_at', table_name='uncategorized_topic_warning_records')
@@ -0,0 +1,101 @@
+import logging
+import threading
+import time
+
+from .bot_config import config as Config
+
+logger = logging.getLogger(__name__)
+
+try:
+    from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+except ImportError: # pragma: no cover
+    pass
+
+
+class JobMetrics:
+    """Runtime metrics of the scheduled jobs, by job id."""
+
+    def __init__(self):
+        self._jobs: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _job(self, job_id: str) -> dict:
+        return self._jobs.setdefault(job_id, {
+            "runs": 0,
+            "failures": 0,
+            "last_run_at": None,
+            "last_duration": None,
+            "max_duration": 0.0,
+            # runs skipped because the previous one was still running
+            "overruns": 0,
+            # runs skipped because the scheduler was late by more than the grace time
+            "misfires": 0,
+        })
+
+    def record_run(self, job_id: str, started_at: float, duration: float, success: bool):
+        with self._lock:
+            job = self._job(job_id)
+            job["runs"] += 1
+            job["failures"] += 0 if success else 1
+            job["last_run_at"] = started_at
+            job["last_duration"] = duration
+            job["max_duration"] = max(job["max_duration"], duration)
+
+    def listen(self, event):
+        """Listener of the `EVENT_JOB_MISSED` and `EVENT_JOB_MAX_INSTANCES` scheduler events."""
+        with self._lock:
+            job = self._job(event.job_id)
+            if event.code == EVENT_JOB_MISSED:
+                job["misfires"] += 1
+            elif event.code == EVENT_JOB_MAX_INSTANCES:
+                job["overruns"] += 1
+        logger.warning(f"Scheduled job {event.job_id} is skipped, "
+                       f"{'it missed its run time' if event.code == EVENT_JOB_MISSED else 'its previous run is not finished'}.")
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {job_id: dict(job) for job_id, job in self._jobs.items()}
+
+
+job_metrics = JobMetrics()
+
+
+def run_scheduled_job(job_id: str, action_name: str, handler_name: str):
+    """
+    Run the scheduled handler `handler_name` of an activated action.
+
+    Jobs refer to this function and to names instead of the bound handlers,
+    so that they can be kept in a persistent job store.
+    """
+    from .bot_manager import bot_manager as BotManager
+    action = BotManager.activated_actions.get(action_name)
+    if action is None:
+        logger.warning(f"Scheduled job {job_id} is skipped, action {action_name} is not activated.")
+        return None
+    handler = getattr(action, handler_name)
+    started_at = time.time()
+    start = time.perf_counter()
+    success = False
+    try:
+        result = handler()
+        success = True
+        return result
+    finally:
+        job_metrics.record_run(job_id, started_at, time.perf_counter() - start, success)
+
+
+def scheduler_options() -> dict:
+    """Options of the scheduler running the jobs registered by `BotManager.register_jobs_to_scheduler`."""
+    options = {
+        "job_defaults": {
+            "coalesce": Config.scheduler.coalesce,
+            "max_instances": Config.scheduler.max_instances,
+            "misfire_grace_time": Config.scheduler.misfire_grace_time,
+        },
+    }
+    if Config.scheduler.persistent_jobs:
+        from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+        from .db import db_manager
+        options["jobstores"] = {"default": SQLAlchemyJobStore(engine=db_manager._engine)}
+    return options
+
@@ -0,0 +1,56 @@
+from collections import deque
+from typing import Iterable
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton finding which of many keywords occur in a text in
+    a single pass, whatever the number of keywords.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[frozenset[str]] = [frozenset()]
+        outputs: list[set[str]] = [set()]
+        for keyword in keywords:
+            if not keyword:
+                raise ValueError("Keywords must not be empty.")
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                node = next_node
+            outputs[node].add(keyword)
+
+        # breadth first, the failure links of shallower nodes are always set,
+        # nodes at depth 1 fail to the root
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, next_node in self._goto[node].items():
+                queue.append(next_node)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_node] = self._goto[fail].get(char, 0)
+                outputs[next_node] |= outputs[self._fail[next_node]]
+        self._output = [frozenset(output) for output in outputs]
+
+    def find(self, text: str) -> set[str]:
+        """Return the keywords occurring in `text`."""
+        goto, fail, output = self._goto, self._fail, self._output
+        found: set[str] = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found |= output[node]
+        return found
@@ -0,0 +1,53 @@
+import asyncio
+import threading
+from typing import Awaitable
+
+
+class AsyncRunner:
+    """
+    Run coroutines on one event loop living in a background thread.
+
+    Async handlers from every thread share this loop, so awaiting outbound
+    calls does not need one thread per call.
+    """
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(
+                        target=loop.run_forever, name="async-runner", daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    def submit(self, awaitable: Awaitable):
+        """Schedule `awaitable` on the loop and return a `concurrent.futures.Future`."""
+        return asyncio.run_coroutine_threadsafe(_wrap(awaitable), self.loop)
+
+    def run(self, awaitable: Awaitable, timeout: float | None = None):
+        """Block the calling thread until `awaitable` is done and return its result."""
+        return self.submit(awaitable).result(timeout)
+
+    def stop(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
+async def _wrap(awaitable: Awaitable):
+    return await awaitable
+
+
+async_runner = AsyncRunner()
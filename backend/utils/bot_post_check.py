@@ -3,20 +3,20 @@ from ..model import Post
 from typing import Optional
 
 def post_created_by_bot(post: Post):
-    return post.username in account_manager.usernames
+    return post.addressing.author in account_manager.username_set
 
 def post_mention_bot(post: Post, bot_username: Optional[str] = None):
     if bot_username is None:
         bot_username = account_manager.default_bot_client.username
-    mention_tags = post.cooked_soup.find_all(
-        lambda tag: tag.name == 'a' and
-                    tag.get('class') == ['mention'] and
-                    tag.get('href') == f"/u/{bot_username}" and
-                    tag.get_text() == f"@{bot_username}"
-    )
-    return bool(mention_tags)
+    return bot_username in post.addressing.mentions
 
 def post_reply_to_bot(post: Post, bot_username: Optional[str] = None):
     if bot_username is None:
         bot_username = account_manager.default_bot_client.username
-    return post.reply_to_user and post.reply_to_user.username == bot_username
+    return post.addressing.reply_to == bot_username
+
+def post_mention_any_bot(post: Post):
+    return not post.addressing.mentions.isdisjoint(account_manager.username_set)
+
+def post_reply_to_any_bot(post: Post):
+    return post.addressing.reply_to in account_manager.username_set
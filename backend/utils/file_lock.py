@@ -0,0 +1,18 @@
+import fcntl
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Hold an exclusive `flock` on the file `path`, created if needed.
+
+    Processes and threads wait for each other, the lock is released by the
+    system if the holder dies.
+    """
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
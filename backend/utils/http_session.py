@@ -0,0 +1,86 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def create_http_session(pool_connections: int = 10, pool_maxsize: int = 20,
+                        keep_alive: bool = True, max_retries: int = 3,
+                        backoff_factor: float = 0.5) -> requests.Session:
+    # only failed connections and idempotent requests are retried by urllib3,
+    # so POST requests will not be sent twice
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """
+    Return the process wide HTTP session.
+
+    The session keeps a pool of keep-alive connections per host, it is shared by
+    every BotAPI client and plugin so that TCP and TLS handshakes are reused.
+    """
+    global _session
+    if _session is None:
+        # imported here so that importing the Discourse client does not load the config
+        from ..bot_config import config as Config
+        with _session_lock:
+            if _session is None:
+                _session = create_http_session(
+                    pool_connections=Config.http.pool_connections,
+                    pool_maxsize=Config.http.pool_maxsize,
+                    keep_alive=Config.http.keep_alive,
+                    max_retries=Config.http.max_retries,
+                    backoff_factor=Config.http.backoff_factor,
+                )
+    return _session
+
+
+_async_client = None
+
+
+def get_async_http_client():
+    """
+    Return the process wide `httpx.AsyncClient`, the async counterpart of `get_http_session`.
+
+    The client is bound to the event loop it is first used on, use it from
+    coroutines running on `async_runner`.
+    """
+    global _async_client
+    if _async_client is None:
+        import httpx
+        from ..bot_config import config as Config
+        with _session_lock:
+            if _async_client is None:
+                max_keepalive = Config.http.pool_maxsize if Config.http.keep_alive else 0
+                _async_client = httpx.AsyncClient(
+                    # httpx only retries failed connections
+                    transport=httpx.AsyncHTTPTransport(
+                        retries=Config.http.max_retries,
+                        limits=httpx.Limits(
+                            max_connections=Config.http.pool_maxsize,
+                            max_keepalive_connections=max_keepalive,
+                        ),
+                    ),
+                    timeout=httpx.Timeout(30.0),
+                )
+    return _async_client
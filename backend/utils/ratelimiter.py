@@ -1 +1,341 @@
-# TODO
\ No newline at end of file
+import asyncio
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlsplit
+
+from fluent_discourse import RateLimitError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRY_AFTER = 5.0
+
+# (account, endpoint class) of the token taken by `reserved_call` in this thread
+_reserved = threading.local()
+
+# Bucket state is (tokens, last): the number of tokens available at time `last`.
+# A reservation always succeeds and returns how long the caller has to wait,
+# so the same bucket works for threads (time.sleep) and coroutines (asyncio.sleep).
+# A backoff moves `last` to the end of the Retry-After period, tokens only
+# start to refill after it.
+_RESERVE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local backoff = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'last')
+local tokens = tonumber(state[1]) or burst
+local last = tonumber(state[2]) or now
+if now > last then
+    tokens = math.min(burst, tokens + (now - last) * rate)
+    last = now
+end
+if backoff > 0 and now + backoff > last then
+    tokens = math.min(tokens, 1)
+    last = now + backoff
+end
+tokens = tokens - requested
+local wait = last - now
+if tokens < 0 then
+    wait = wait + (-tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'last', tostring(last))
+redis.call('PEXPIRE', KEYS[1], math.ceil((last - now + burst / rate) * 1000) + 60000)
+return tostring(wait)
+"""
+
+
+class TokenBucket:
+    """In-process token bucket refilled with `rate` tokens per second up to `burst` tokens."""
+
+    def __init__(self, rate: float, burst: int):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst must be at least 1.")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _update(self, requested: float, backoff: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if now > self._last:
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+            if backoff > 0 and now + backoff > self._last:
+                self._tokens = min(self._tokens, 1)
+                self._last = now + backoff
+            self._tokens -= requested
+            wait = self._last - now
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return wait
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take `tokens` from the bucket and return the number of seconds to wait before using them."""
+        return self._update(tokens, 0)
+
+    def release(self, tokens: float = 1):
+        """Give back `tokens` reserved for a request that is not sent."""
+        self._update(-tokens, 0)
+
+    def wait_time(self) -> float:
+        """Seconds to wait for a token, without taking it."""
+        return self._update(0, 0)
+
+    def backoff(self, seconds: float):
+        """Stop handing out tokens for `seconds`, e.g. after a 429 response."""
+        self._update(0, seconds)
+
+
+class RedisTokenBucket:
+    """Token bucket stored in Redis, shared by every worker using the same key."""
+
+    def __init__(self, redis_client, key: str, rate: float, burst: int):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst must be at least 1.")
+        self.rate = rate
+        self.burst = burst
+        self.key = key
+        self._script = redis_client.register_script(_RESERVE_SCRIPT)
+        self._fallback = TokenBucket(rate, burst)
+
+    def _update(self, requested: float, backoff: float) -> float:
+        try:
+            return float(self._script(keys=[self.key], args=[self.rate, self.burst, requested, backoff]))
+        except Exception as e:
+            logger.warning(f"Failed to use Redis rate limit bucket {self.key}, using local bucket: {e}")
+            return self._fallback._update(requested, backoff)
+
+    def reserve(self, tokens: float = 1) -> float:
+        return self._update(tokens, 0)
+
+    def release(self, tokens: float = 1):
+        self._update(-tokens, 0)
+
+    def wait_time(self) -> float:
+        return self._update(0, 0)
+
+    def backoff(self, seconds: float):
+        self._update(0, seconds)
+
+
+def classify_endpoint(method: str, url: str) -> str:
+    """Map a Discourse API request to the rate limit class it is counted in."""
+    path = urlsplit(url).path
+    method = method.upper()
+    if re.search(r"/uploads(\.json)?$", path):
+        return "upload"
+    if re.search(r"/t/\d+/status$", path):
+        return "topic_status"
+    if re.search(r"/(reports|queries)/\d+/run(\.json)?$", path):
+        return "data_explorer"
+    if method == "POST" and re.search(r"/posts(\.json)?$", path):
+        return "post"
+    return "default"
+
+
+def parse_retry_after(response) -> float:
+    """Seconds to wait after a 429 response, from `Retry-After` or the Discourse error body."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is not None:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    try:
+        return float(response.json()["extras"]["wait_seconds"])
+    except Exception:
+        return DEFAULT_RETRY_AFTER
+
+
+class RateLimiter:
+    """
+    Client side rate limiter with one token bucket per account and endpoint class.
+
+    `buckets` maps an endpoint class (see `classify_endpoint`) to `(rate, burst)`.
+    Classes without their own entry share the limits of `default`, requests are
+    not limited if there is no `default` entry either.
+    """
+
+    def __init__(self, buckets: dict[str, tuple[float, int]], redis_client=None,
+                 max_retries: int = 2, max_retry_wait: float = 60, key_prefix: str = "ratelimit"):
+        self.bucket_limits = dict(buckets)
+        self.redis_client = redis_client
+        self.max_retries = max_retries
+        self.max_retry_wait = max_retry_wait
+        self.key_prefix = key_prefix
+        self._buckets: dict[tuple[str, str], TokenBucket | RedisTokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def get_bucket(self, account: str, endpoint_class: str):
+        limits = self.bucket_limits.get(endpoint_class, self.bucket_limits.get("default"))
+        if limits is None:
+            return None
+        bucket_key = (account, endpoint_class)
+        with self._lock:
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                rate, burst = limits
+                if self.redis_client is not None:
+                    bucket = RedisTokenBucket(
+                        self.redis_client, f"{self.key_prefix}:{account}:{endpoint_class}", rate, burst)
+                else:
+                    bucket = TokenBucket(rate, burst)
+                self._buckets[bucket_key] = bucket
+        return bucket
+
+    def reserve(self, account: str, endpoint_class: str) -> float:
+        bucket = self.get_bucket(account, endpoint_class)
+        return 0.0 if bucket is None else bucket.reserve()
+
+    def wait_time(self, account: str, endpoint_class: str) -> float:
+        """Seconds before the account can send a request of the class, e.g. while it backs off after a 429."""
+        bucket = self.get_bucket(account, endpoint_class)
+        return 0.0 if bucket is None else bucket.wait_time()
+
+    def is_backing_off(self, account: str) -> bool:
+        """Whether a bucket of `account` used by this process would make a request wait longer than `max_retry_wait`."""
+        with self._lock:
+            buckets = [bucket for (bucket_account, _), bucket in self._buckets.items() if bucket_account == account]
+        return any(bucket.wait_time() > self.max_retry_wait for bucket in buckets)
+
+    def take(self, account: str, endpoint_class: str) -> float:
+        """
+        Same as `reserve`, but raise `RateLimitError` rather than returning a
+        wait longer than `max_retry_wait`, so that the caller can fall back to
+        another account instead of blocking its thread.
+        """
+        bucket = self.get_bucket(account, endpoint_class)
+        if bucket is None:
+            return 0.0
+        wait = bucket.reserve()
+        if wait > self.max_retry_wait:
+            bucket.release()
+            raise RateLimitError(
+                f"Rate limit of {account} ({endpoint_class}) is backing off for {wait:.0f} more seconds")
+        return wait
+
+    def backoff(self, account: str, endpoint_class: str, seconds: float):
+        bucket = self.get_bucket(account, endpoint_class)
+        if bucket is not None:
+            bucket.backoff(seconds)
+
+    def _should_retry(self, account: str, endpoint_class: str, response, retries_left: int) -> bool:
+        retry_after = parse_retry_after(response)
+        logger.warning(
+            f"Discourse rate limit hit for {account} ({endpoint_class}), backing off {retry_after} seconds")
+        self.backoff(account, endpoint_class, retry_after)
+        return retries_left > 0 and retry_after <= self.max_retry_wait
+
+    def call(self, account: str, method: str, url: str, send: Callable):
+        """
+        Call `send()` once the bucket allows it, and retry it after the
+        `Retry-After` period when it returns a 429 response. Raise
+        `RateLimitError` if the bucket would make it wait longer than
+        `max_retry_wait`.
+        """
+        endpoint_class = classify_endpoint(method, url)
+        retries_left = self.max_retries
+        # the token of the first attempt may have been taken by `reserved_call`
+        reserved = getattr(_reserved, 'key', None) == (account, endpoint_class)
+        if reserved:
+            _reserved.key = None
+        while True:
+            wait = 0.0 if reserved else self.take(account, endpoint_class)
+            reserved = False
+            if wait > 0:
+                time.sleep(wait)
+            response = send()
+            if response.status_code != 429 or \
+                    not self._should_retry(account, endpoint_class, response, retries_left):
+                return response
+            retries_left -= 1
+
+    async def call_async(self, account: str, method: str, url: str, send: Callable[[], Awaitable]):
+        """Same as `call`, for a coroutine function `send`."""
+        endpoint_class = classify_endpoint(method, url)
+        retries_left = self.max_retries
+        while True:
+            wait = await asyncio.to_thread(self.take, account, endpoint_class) \
+                if self.redis_client is not None else self.take(account, endpoint_class)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            response = await send()
+            if response.status_code != 429 or \
+                    not self._should_retry(account, endpoint_class, response, retries_left):
+                return response
+            retries_left -= 1
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_loaded = False
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Return the process wide rate limiter built from the `rate_limit` config, None if disabled."""
+    global _rate_limiter, _rate_limiter_loaded
+    if not _rate_limiter_loaded:
+        # imported here so that importing the Discourse client does not load the config
+        from ..bot_config import config as Config
+        with _rate_limiter_lock:
+            if not _rate_limiter_loaded:
+                rate_limit_config = Config.rate_limit
+                if rate_limit_config.enabled:
+                    redis_client = None
+                    if rate_limit_config.use_redis:
+                        from .redis_cache import get_redis_client
+                        redis_client = get_redis_client()
+                    _rate_limiter = RateLimiter(
+                        {name: (bucket.rate, bucket.burst) for name, bucket in rate_limit_config.buckets.items()},
+                        redis_client=redis_client,
+                        max_retries=rate_limit_config.max_retries,
+                        max_retry_wait=rate_limit_config.max_retry_wait,
+                    )
+                _rate_limiter_loaded = True
+    return _rate_limiter
+
+
+@contextmanager
+def reserved_call(account: str, method: str, url: str):
+    """
+    Wait for the token of a request now, the next `rate_limited_call` of this
+    thread for the same account and endpoint class does not take another one.
+
+    Used to wait for the rate limit before holding a bounded resource, e.g. a
+    slot of the Data Explorer queries, rather than while holding it.
+    """
+    rate_limiter = get_rate_limiter()
+    if rate_limiter is None:
+        yield
+        return
+    endpoint_class = classify_endpoint(method, url)
+    wait = rate_limiter.take(account, endpoint_class)
+    if wait > 0:
+        time.sleep(wait)
+    _reserved.key = (account, endpoint_class)
+    try:
+        yield
+    finally:
+        _reserved.key = None
+
+
+def rate_limited_call(account: str, method: str, url: str, send: Callable):
+    rate_limiter = get_rate_limiter()
+    if rate_limiter is None:
+        return send()
+    return rate_limiter.call(account, method, url, send)
+
+
+async def rate_limited_call_async(account: str, method: str, url: str, send: Callable[[], Awaitable]):
+    rate_limiter = get_rate_limiter()
+    if rate_limiter is None:
+        return await send()
+    return await rate_limiter.call_async(account, method, url, send)
@@ -35,6 +35,11 @@ except Exception as e:
     _redis_available = False
 
 
+def get_redis_client() -> Optional[redis.Redis]:
+    """Return the shared Redis client, None if Redis is not available."""
+    return _redis_client if _redis_available else None
+
+
 def redis_cache(cache_key: Optional[Union[str, Callable]] = None, ex: int = 3600):
     if not _redis_available:
         return lambda f: f
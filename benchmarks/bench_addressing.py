@@ -0,0 +1,70 @@
+"""Mention and reply checks of `BotAction.should_response` on large cooked posts."""
+import json
+import os
+
+from .common import measure, report
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "data", "test_model_post_data.json")
+# actions calling `should_response` for the same post
+ACTIONS = 5
+
+
+def cooked_post(quotes: int, mentions: int) -> str:
+    paragraph = "<p>" + "一段很长的引用内容 some quoted text. " * 20 + "</p>"
+    quote = (
+        '<aside class="quote no-group" data-username="user" data-post="1" data-topic="1">'
+        '<div class="title"><img alt="" width="24" height="24" src="/user_avatar/user.png" class="avatar"> user:</div>'
+        f"<blockquote>{paragraph * 3}</blockquote></aside>"
+    )
+    mention_list = " ".join(
+        f'<a class="mention" href="/u/user{i}">@user{i}</a>' for i in range(mentions))
+    return quote * quotes + f"<p>{mention_list}</p>" + paragraph + '<p><a class="mention" href="/u/bot">@bot</a> 投掷</p>'
+
+
+def soup_should_response(post, usernames):
+    # the checks before the addressing summary, the soup is cached on the post
+    if post.username in list(usernames):
+        return False
+    mention_tags = post.cooked_soup.find_all(
+        lambda tag: tag.name == 'a' and
+                    tag.get('class') == ['mention'] and
+                    tag.get('href') == "/u/bot" and
+                    tag.get_text() == "@bot"
+    )
+    return bool(mention_tags) or bool(post.reply_to_user and post.reply_to_user.username == "bot")
+
+
+def addressing_should_response(post, usernames):
+    addressing = post.addressing
+    return addressing.author not in usernames and ("bot" in addressing.mentions or addressing.reply_to == "bot")
+
+
+def main():
+    from backend.model import Post
+
+    with open(DATA_PATH) as f:
+        data = json.load(f)["webhook_with_reply_to"]
+    usernames = frozenset({"bot", "bot2"})
+
+    results = {}
+    for quotes, mentions in [(0, 0), (5, 20), (20, 100), (50, 300)]:
+        cooked = cooked_post(quotes, mentions)
+        paths = {
+            "soup": soup_should_response,
+            "addressing": addressing_should_response,
+        }
+        for path, check in paths.items():
+            def event(check=check, cooked=cooked):
+                post = Post(**{**data, "cooked": cooked})
+                for _ in range(ACTIONS):
+                    assert check(post, usernames)
+            timing = measure(event, repeat=3, number=20)
+            results[f"{len(cooked) // 1024}KiB, {mentions} mentions: {path}"] = {
+                "events_per_s": 1e6 / timing["best_us"],
+                "best_us": timing["best_us"],
+            }
+    report(f"should_response of {ACTIONS} actions per post, post construction included", results)
+
+
+if __name__ == "__main__":
+    main()
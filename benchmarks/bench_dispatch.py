@@ -0,0 +1,55 @@
+"""Per-event dispatch overhead of BotManager with many registered actions."""
+from .common import measure, report, setup_backend
+
+ACTION_COUNT = 120
+POST_CREATED_LISTENERS = 4
+
+
+def main():
+    action_names = [f"SyntheticAction{i}" for i in range(ACTION_COUNT)]
+    setup_backend({name: {"enabled": True} for name in action_names})
+
+    from backend.bot_action import BotAction, on
+    from backend.bot_manager import bot_manager as BotManager
+
+    def make_action(index: int, event: str):
+        def handler(self, event_context):
+            return None
+        return type(action_names[index], (BotAction,), {
+            "action_name": action_names[index],
+            "handler": on(event)(handler),
+        })
+
+    for i in range(ACTION_COUNT):
+        event = "post_created" if i < POST_CREATED_LISTENERS else f"custom_event_{i}"
+        BotManager.register_bot_action(make_action(i, event))
+
+    kwargs = {"event_context": None}
+
+    def legacy_dispatch():
+        # the loop used before the dispatch index was introduced
+        for _, action in BotManager.activated_actions.items():
+            if action.enabled:
+                action.trigger("post_created", **kwargs)
+
+    def indexed_dispatch():
+        for _, action in BotManager.get_event_handlers("post_created"):
+            if action.enabled:
+                action.trigger("post_created", **kwargs)
+
+    def unhandled_event():
+        BotManager.trigger_event("user_updated", {})
+
+    report(
+        f"Dispatch of one event with {ACTION_COUNT} actions, "
+        f"{POST_CREATED_LISTENERS} of them listening",
+        {
+            "loop over activated_actions": measure(legacy_dispatch),
+            "dispatch index": measure(indexed_dispatch),
+            "trigger_event without listener": measure(unhandled_event),
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Allowlist lookup with thousands of CIDRs, per-request parsing vs the compiled IPMatcher."""
+import ipaddress
+import random
+
+from security import IPMatcher
+
+from .common import measure, report
+
+IPV4_NETWORKS = 4000
+IPV6_NETWORKS = 1000
+
+
+def legacy_in_whitelist(ip, whitelist_ips) -> bool:
+    # the implementation before IPMatcher, every network is parsed on every request
+    if ip in whitelist_ips:
+        return True
+    for net in whitelist_ips:
+        if ipaddress.ip_address(ip) in ipaddress.ip_network(net):
+            return True
+    return False
+
+
+def main():
+    rng = random.Random(0)
+    networks = [
+        str(ipaddress.ip_network((rng.getrandbits(32), rng.randint(16, 28)), strict=False))
+        for _ in range(IPV4_NETWORKS)
+    ] + [
+        str(ipaddress.ip_network((rng.getrandbits(128), rng.randint(32, 64)), strict=False))
+        for _ in range(IPV6_NETWORKS)
+    ]
+    matched_ip = str(ipaddress.ip_network(networks[-IPV6_NETWORKS - 1]).network_address + 1)
+    missed_ip = "203.0.113.7"
+    assert legacy_in_whitelist(matched_ip, networks)
+
+    matcher = IPMatcher(networks)
+    report(
+        f"Allowlist of {IPV4_NETWORKS} IPv4 and {IPV6_NETWORKS} IPv6 networks",
+        {
+            "legacy, last matching network": measure(lambda: legacy_in_whitelist(matched_ip, networks), number=5),
+            "legacy, no match": measure(lambda: legacy_in_whitelist(missed_ip, networks), number=5),
+            "IPMatcher, matching": measure(lambda: matched_ip in matcher),
+            "IPMatcher, no match": measure(lambda: missed_ip in matcher),
+            "IPMatcher compilation (startup)": measure(lambda: IPMatcher(networks), number=5),
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Validated Post vs TrustedPost view over the fixtures in tests/data."""
+import json
+import os
+import tracemalloc
+
+from .common import measure, report
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "data", "test_model_post_data.json")
+OBJECTS_FOR_MEMORY = 1000
+
+
+def memory_per_object(factory) -> float:
+    """
+    Bytes allocated per object while keeping `OBJECTS_FOR_MEMORY` of them alive,
+    the payload itself is not counted as it is shared with the event context.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory() for _ in range(OBJECTS_FOR_MEMORY)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / OBJECTS_FOR_MEMORY
+
+
+def main():
+    from backend.model import Post, TrustedPost
+
+    def read_fields(post):
+        # what a typical reply action reads from the post, the post is
+        # returned so that its memory is measured with the fields read
+        _ = post.username, post.raw, post.topic_id, post.post_number
+        return post
+
+    with open(DATA_PATH) as f:
+        fixtures = json.load(f)
+
+    results = {}
+    for name, data in fixtures.items():
+        paths = {
+            "validated": lambda data=data: Post(**data),
+            "trusted": lambda data=data: TrustedPost(data),
+            "validated + 4 fields": lambda data=data: read_fields(Post(**data)),
+            "trusted + 4 fields": lambda data=data: read_fields(TrustedPost(data)),
+        }
+        for path, factory in paths.items():
+            timing = measure(factory, number=2000)
+            results[f"{name}: {path}"] = {
+                "objects_per_s": 1e6 / timing["best_us"],
+                "best_us": timing["best_us"],
+                "bytes_per_object": memory_per_object(factory),
+            }
+    report("Post construction from tests/data/test_model_post_data.json", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Row by row vs vectorized aggregation of the posts of the annual post report."""
+import re
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from .common import measure, report, setup_backend
+
+POSTS = [10_000, 100_000, 1_000_000]
+USERS_PER_POST = 0.05
+
+
+def synthetic_posts(post_count: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    words = np.array(["水源", "hello", "你好，世界", "今天的课", "abc", "😀", "一些比较长的中文内容 with text"])
+    texts = [" ".join(rng.choice(words, 8)) for _ in range(1000)]
+    user_ids = rng.integers(1, max(int(post_count * USERS_PER_POST), 1) + 1, post_count)
+    timestamps = rng.integers(1735660800, 1767196799, post_count)
+    reads = rng.integers(0, 1000, post_count)
+    rows = [
+        [post_id, int(user_ids[post_id]), texts[post_id % len(texts)], int(timestamps[post_id]), int(reads[post_id])]
+        for post_id in range(post_count)
+    ]
+    return {"columns": ["id", "user_id", "raw", "created_at", "reads"], "rows": rows}
+
+
+def row_by_row(data: dict):
+    # the aggregation loop before the vectorized rewrite
+    import pandas as pd
+    import pytz
+    data_table = pd.DataFrame(data['rows'], columns=data['columns'])
+    data_table['created_at'] = data_table['created_at'].map(
+        lambda x: datetime.fromtimestamp(x, pytz.timezone('Asia/Shanghai')))
+    user_post_count = defaultdict(lambda: 0)
+    user_post_character_count = defaultdict(lambda: 0)
+    user_post_read_count = defaultdict(lambda: 0)
+    user_post_hour_count = defaultdict(lambda: np.zeros(24, dtype=np.int32))
+    user_post_day_count = defaultdict(lambda: np.zeros(365, dtype=np.int32))
+    for row in data_table.itertuples():
+        user_id = row.user_id
+        user_post_count[user_id] += 1
+        user_post_read_count[user_id] += row.reads
+        user_post_character_count[user_id] += len(re.findall(r'[一-龥]', row.raw))
+        user_post_hour_count[user_id][row.created_at.hour] += 1
+        user_post_day_count[user_id][row.created_at.timetuple().tm_yday - 1] += 1
+    return user_post_count, user_post_day_count, user_post_hour_count
+
+
+def main():
+    setup_backend()
+    # the real plugin package is needed here
+    sys.modules.pop("backend.plugins")
+    from backend.plugins.bot_action_annual_report.preprocess_data import aggregate_posts_data
+
+    results = {}
+    for post_count in POSTS:
+        data = synthetic_posts(post_count)
+        number = 1 if post_count >= 100_000 else 3
+        if post_count <= 100_000:
+            timing = measure(lambda data=data: row_by_row(data), repeat=1, number=number)
+            results[f"{post_count} posts: row by row"] = {"seconds": timing["best_us"] / 1e6}
+        timing = measure(lambda data=data: aggregate_posts_data(data), repeat=3, number=number)
+        results[f"{post_count} posts: vectorized"] = {"seconds": timing["best_us"] / 1e6}
+    report("Aggregation of the posts by user (user table, day and hour counts)", results)
+
+
+if __name__ == "__main__":
+    main()
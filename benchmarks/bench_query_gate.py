@@ -0,0 +1,47 @@
+"""A burst of report requests: one global query lock vs the query gate."""
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import report, setup_backend
+
+REQUESTS = 200
+USERS = 50
+QUERY_SECONDS = 0.02
+
+
+def burst(run_query) -> float:
+    """Seconds to answer `REQUESTS` concurrent requests of `USERS` distinct users."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=64) as executor:
+        list(executor.map(lambda i: run_query(i % USERS), range(REQUESTS)))
+    return time.perf_counter() - start
+
+
+def main():
+    setup_backend()
+    # the real plugin package is needed here
+    sys.modules.pop("backend.plugins")
+    from backend.plugins.bot_action_annual_report.query_database import QueryGate
+
+    def query():
+        time.sleep(QUERY_SECONDS)
+        return {"rows": []}
+
+    lock = threading.Lock()
+
+    def locked(user_id):
+        with lock:
+            return query()
+
+    results = {"global lock": {"seconds": burst(locked)}}
+    for max_concurrent in (1, 4, 8):
+        gate = QueryGate(max_concurrent=max_concurrent, cache_ttl=60)
+        results[f"gate of {max_concurrent}"] = {
+            "seconds": burst(lambda user_id, gate=gate: gate.run((user_id,), query))}
+    report(f"{REQUESTS} requests of {USERS} users, queries of {QUERY_SECONDS * 1000:.0f}ms", results)
+
+
+if __name__ == "__main__":
+    main()
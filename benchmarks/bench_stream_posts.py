@@ -0,0 +1,53 @@
+"""Peak memory of collecting every page of posts vs folding each page as it is fetched."""
+import sys
+import tracemalloc
+
+from .bench_preprocess_posts import synthetic_posts
+from .common import report, setup_backend
+
+POSTS = 300_000
+PAGE_SIZES = [10_000, 50_000]
+
+
+def fetch_pages(page_size: int):
+    """Pages of the query, generated on demand as they would be downloaded."""
+    for page in range(POSTS // page_size):
+        yield synthetic_posts(page_size, seed=page)
+
+
+def peak_memory(func) -> float:
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def main():
+    setup_backend()
+    # the real plugin package is needed here
+    sys.modules.pop("backend.plugins")
+    from backend.plugins.bot_action_annual_report.preprocess_data import PostsAggregator, aggregate_posts_data
+
+    def collected(page_size):
+        rows = []
+        for page in fetch_pages(page_size):
+            columns = page["columns"]
+            rows.extend(page["rows"])
+        aggregate_posts_data({"columns": columns, "rows": rows})
+
+    def streamed(page_size):
+        aggregator = PostsAggregator()
+        for page in fetch_pages(page_size):
+            aggregator.add_page(page)
+        aggregator.result()
+
+    results = {}
+    for page_size in PAGE_SIZES:
+        results[f"pages of {page_size}: collected"] = {"peak_mib": peak_memory(lambda page_size=page_size: collected(page_size))}
+        results[f"pages of {page_size}: streamed"] = {"peak_mib": peak_memory(lambda page_size=page_size: streamed(page_size))}
+    report(f"Aggregation of {POSTS} posts fetched by pages", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Latency of a signed post_created webhook, before and after single-pass body handling."""
+import hashlib
+import hmac
+import json
+import os
+
+from .common import measure_latency, report, setup_backend
+
+SECRET = "webhook-secret"
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "data", "test_model_post_data.json")
+
+
+def main():
+    setup_backend({"SyntheticForward": {"enabled": True}})
+
+    from flask import Flask, abort, request
+    from backend.bot_action import BotAction, on
+    from backend.bot_manager import bot_manager as BotManager
+    from backend.model import Post
+    from security import verify_discourse_webhook_request
+
+    class SyntheticForward(BotAction):
+        """Forwards the raw body like BotPublicPostWebhookForward, without the network."""
+        action_name = "SyntheticForward"
+
+        @on("post_created")
+        def forward(self, event_context):
+            return len(event_context.raw_body)
+
+    BotManager.register_bot_action(SyntheticForward)
+
+    with open(DATA_PATH) as f:
+        raw_body = json.dumps({"post": json.load(f)["webhook_with_reply_to"]}).encode()
+    headers = {
+        "X-Discourse-Event": "post_created",
+        "X-Discourse-Event-Signature": "sha256=" + hmac.new(SECRET.encode(), raw_body, hashlib.sha256).hexdigest(),
+    }
+
+    app = Flask(__name__)
+
+    @app.route("/legacy", methods=["POST"])
+    def legacy():
+        # hash request.data, then get_data and get_json, then validate a Post for every event
+        if not verify_discourse_webhook_request(request, SECRET, request.data):
+            abort(403)
+        body = request.get_data()
+        data = request.get_json()
+        Post(**data["post"])
+        BotManager.trigger_event("post_created", data, raw_body=body)
+        return "ok"
+
+    @app.route("/current", methods=["POST"])
+    def current():
+        body = request.get_data()
+        if not verify_discourse_webhook_request(request, SECRET, body):
+            abort(403)
+        BotManager.trigger_event("post_created", raw_body=body)
+        return "ok"
+
+    client = app.test_client()
+
+    def post(path):
+        return lambda: client.post(path, data=raw_body, headers=headers, content_type="application/json")
+
+    assert client.post("/current", data=raw_body, headers=headers).status_code == 200
+
+    report(
+        f"Signed post_created webhook ({len(raw_body)} bytes body) with a raw body forwarder",
+        {
+            "legacy body handling": measure_latency(post("/legacy")),
+            "single pass, lazy decoding": measure_latency(post("/current")),
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Benchmarks are plain scripts, run them from the repository root, e.g.
+`python -m benchmarks.bench_dispatch`. Like the tests, they replace
+`backend.bot_config` and `backend.plugins` so no config.yaml is needed.
+"""
+import statistics
+import sys
+import time
+import types
+from types import SimpleNamespace
+
+
+def setup_backend(action_custom_config: dict | None = None, **overrides) -> SimpleNamespace:
+    config = SimpleNamespace(
+        site_url="http://example.com",
+        limited_mode=False,
+        limited_usernames=[],
+        concurrent_dispatch=False,
+        concurrent_dispatch_workers=4,
+        account_selection="default",
+        redis_host="localhost",
+        redis_port=6379,
+        bot_accounts=[SimpleNamespace(
+            id=1, username="bot", api_key="API_KEY", writable=True, default=True)],
+        action_custom_config=action_custom_config or {},
+        db_url="sqlite:///:memory:",
+    )
+    for key, value in overrides.items():
+        setattr(config, key, value)
+
+    bot_config = types.ModuleType("backend.bot_config")
+    bot_config.config = config
+    plugins = types.ModuleType("backend.plugins")
+    plugins.load_plugins = lambda: None
+    sys.modules["backend.bot_config"] = bot_config
+    sys.modules["backend.plugins"] = plugins
+    return config
+
+
+def measure(func, repeat: int = 5, number: int = 1000) -> dict:
+    """Run `func` `number` times per round and return per-call timings in microseconds."""
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number * 1e6)
+    return {"best_us": min(rounds), "median_us": statistics.median(rounds)}
+
+
+def measure_latency(func, number: int = 2000, warmup: int = 100) -> dict:
+    """Time `number` single calls of `func` and return latency percentiles in microseconds."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(number):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "p50_us": samples[len(samples) // 2],
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def report(title: str, results: dict[str, dict]):
+    print(title)
+    for name, result in results.items():
+        values = ", ".join(f"{key}={value:.2f}" for key, value in result.items())
+        print(f"  {name:<32} {values}")
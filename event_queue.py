@@ -0,0 +1,179 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class _Timing:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "last": self.last,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+
+
+class EventQueue:
+    """
+    Bounded in-process job queue in front of a (slow) event handler.
+
+    Jobs are submitted from the request thread and executed by a pool of worker
+    threads. When the queue is full, `submit` returns False immediately so the
+    caller can apply backpressure instead of blocking. A handler may return a
+    `concurrent.futures.Future`, the job is then done when the future is, and
+    the worker takes the next job meanwhile.
+
+    At most `max_in_flight` jobs (`max_size` by default) are running or waiting
+    for their future, the workers wait for a slot before taking the next job,
+    so that the queue fills up and rejects new jobs.
+    """
+
+    def __init__(self, handler: Callable, max_size: int = 1000, workers: int = 4,
+                 max_in_flight: int | None = None):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive.")
+        if workers <= 0:
+            raise ValueError("workers must be positive.")
+        if max_in_flight is not None and max_in_flight <= 0:
+            raise ValueError("max_in_flight must be positive.")
+        self.handler = handler
+        self.max_size = max_size
+        self.workers = workers
+        self.max_in_flight = max_in_flight or max_size
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._in_flight = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._enqueued = 0
+        self._rejected = 0
+        self._processed = 0
+        self._failed = 0
+        self._wait_time = _Timing()
+        self._run_time = _Timing()
+
+    def start(self):
+        if self._threads:
+            logger.warning("Event queue is already started.")
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"event-queue-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Event queue started with {self.workers} workers and size {self.max_size}.")
+
+    def submit(self, *args, **kwargs) -> bool:
+        try:
+            self._queue.put_nowait((time.monotonic(), args, kwargs))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            logger.warning(f"Event queue is full ({self.max_size}), rejecting event.")
+            return False
+        with self._lock:
+            self._enqueued += 1
+        return True
+
+    def shutdown(self, wait: bool = True, timeout: float | None = None):
+        threads, self._threads = self._threads, []
+        for _ in threads:
+            if wait:
+                # stop markers must not be dropped, so block until there is room
+                self._queue.put(_STOP)
+            else:
+                # workers are daemon threads, they will not block the exit
+                try:
+                    self._queue.put_nowait(_STOP)
+                except queue.Full:
+                    break
+        if wait:
+            for thread in threads:
+                thread.join(timeout)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                # the jobs waiting for their future are not done either
+                "depth": self._queue.qsize() + self._in_flight,
+                "in_flight": self._in_flight,
+                "max_size": self.max_size,
+                "max_in_flight": self.max_in_flight,
+                "workers": self.workers,
+                "enqueued": self._enqueued,
+                "rejected": self._rejected,
+                "processed": self._processed,
+                "failed": self._failed,
+                "wait_seconds": self._wait_time.as_dict(),
+                "run_seconds": self._run_time.as_dict(),
+            }
+
+    def _worker(self):
+        while True:
+            # the slot is taken before the job, which stays in the queue meanwhile
+            self._slots.acquire()
+            job = self._queue.get()
+            try:
+                if job is _STOP:
+                    self._slots.release()
+                    return
+                self._run(*job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, enqueued_at: float, args: tuple, kwargs: dict):
+        started_at = time.monotonic()
+        try:
+            result = self.handler(*args, **kwargs)
+        except Exception:
+            logger.exception("Error when processing queued event.")
+            self._slots.release()
+            self._record(enqueued_at, started_at, failed=True)
+            return
+        if isinstance(result, Future):
+            # the handler goes on elsewhere (e.g. an event loop), the worker is
+            # free and the slot is released once the future is done
+            with self._lock:
+                self._in_flight += 1
+            result.add_done_callback(lambda future: self._on_done(future, enqueued_at, started_at))
+        else:
+            self._slots.release()
+            self._record(enqueued_at, started_at, failed=False)
+
+    def _on_done(self, future: Future, enqueued_at: float, started_at: float):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+        error = None if future.cancelled() else future.exception()
+        failed = future.cancelled() or error is not None
+        if failed:
+            logger.error("Error when processing queued event.", exc_info=error)
+        self._record(enqueued_at, started_at, failed)
+
+    def _record(self, enqueued_at: float, started_at: float, failed: bool):
+        finished_at = time.monotonic()
+        with self._lock:
+            self._processed += 1
+            if failed:
+                self._failed += 1
+            self._wait_time.add(started_at - enqueued_at)
+            self._run_time.add(finished_at - started_at)
@@ -0,0 +1,154 @@
+import fcntl
+import logging
+import os
+import socket
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class RedisLeaderLock:
+    """
+    Lease in Redis shared by every worker and replica.
+
+    The key holds the identity of the leader and expires after `ttl` seconds,
+    so another worker takes over when the leader stops renewing it.
+    """
+
+    # only the owner can renew or release the lease
+    _RENEW_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('pexpire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+    _RELEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, redis_client, key: str = "scheduler_leader", ttl: float = 30, identity: str | None = None):
+        self.redis_client = redis_client
+        self.key = key
+        self.ttl = ttl
+        self.identity = identity or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+
+    def acquire(self) -> bool:
+        return bool(self.redis_client.set(self.key, self.identity, nx=True, px=int(self.ttl * 1000)))
+
+    def renew(self) -> bool:
+        return bool(self.redis_client.eval(self._RENEW_SCRIPT, 1, self.key, self.identity, int(self.ttl * 1000)))
+
+    def release(self):
+        self.redis_client.eval(self._RELEASE_SCRIPT, 1, self.key, self.identity)
+
+
+class FileLeaderLock:
+    """
+    Exclusive lock on a local file, used when Redis is not available.
+
+    It only elects one worker per host, the lock is released by the OS when
+    the leader process dies.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        lock_file = open(self.path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def renew(self) -> bool:
+        return self._file is not None
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class SchedulerLeader:
+    """
+    Elect one worker to run the scheduled jobs.
+
+    Every `interval` seconds the leader renews its lock and the other workers
+    try to acquire it. `on_elected` and `on_demoted` are called when this
+    worker gains or loses the leadership, e.g. to resume and pause the
+    scheduler. The interval should be well below the lease ttl of the lock.
+    """
+
+    def __init__(self, lock, on_elected, on_demoted, interval: float = 10):
+        self.lock = lock
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.interval = interval
+        self._is_leader = False
+        self._elections = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def start(self):
+        """Try to become the leader right away, then keep the election running in the background."""
+        self.step()
+        self._thread = threading.Thread(target=self._run, name="scheduler-leader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.step()
+
+    def step(self):
+        if self._is_leader:
+            try:
+                still_leader = self.lock.renew()
+            except Exception as e:
+                logger.warning(f"Failed to renew the scheduler leader lock: {e}")
+                still_leader = False
+            if not still_leader:
+                self._is_leader = False
+                logger.warning("This worker lost the scheduler leadership, scheduled jobs are paused.")
+                self.on_demoted()
+        else:
+            try:
+                elected = self.lock.acquire()
+            except Exception as e:
+                logger.warning(f"Failed to acquire the scheduler leader lock: {e}")
+                elected = False
+            if elected:
+                self._is_leader = True
+                self._elections += 1
+                logger.info("This worker is elected to run the scheduled jobs.")
+                self.on_elected()
+
+    def stop(self):
+        """Stop the election and release the lock so that another worker takes over at once."""
+        self._stop.set()
+        if self._is_leader:
+            try:
+                self.lock.release()
+            except Exception as e:
+                logger.warning(f"Failed to release the scheduler leader lock: {e}")
+            self._is_leader = False
+            self.on_demoted()
+
+    def metrics(self) -> dict:
+        return {
+            "is_leader": self._is_leader,
+            "elections": self._elections,
+            "lock": type(self.lock).__name__,
+        }
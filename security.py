@@ -1,48 +1,123 @@
+import bisect
 import hmac
 import hashlib
 import ipaddress
+import socket
+from typing import Iterable
 from flask import Request
 
 
-def verify_discourse_webhook_request(request: Request, secret: str) -> bool:
+def verify_discourse_webhook_request(request: Request, secret: str, payload: bytes | None = None) -> bool:
     if not secret:
         return True
     sig = request.headers.get('X-Discourse-Event-Signature', '')[7:]
     if sig:
-        payload = request.data
+        if payload is None:
+            payload = request.get_data()
         computed_sig = hmac.new(secret.encode(), payload,
                                 hashlib.sha256).hexdigest()
-        if computed_sig == sig:
-            return True
-        else:
+        return hmac.compare_digest(computed_sig, sig)
+    return False
+
+
+class IPMatcher:
+    """
+    Set of IP networks compiled into sorted, merged integer ranges per IP
+    version, so that a lookup is a binary search whatever the number of networks.
+
+    Networks are given as strings, a single address is a /32 (or /128) network.
+    IPv4-mapped IPv6 addresses match the IPv4 networks.
+    """
+
+    def __init__(self, networks: Iterable[str] = ()):
+        ranges: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+        for net in networks:
+            network = ipaddress.ip_network(net.strip(), strict=False)
+            ranges[network.version].append(
+                (int(network.network_address), int(network.broadcast_address)))
+        self._starts: dict[int, list[int]] = {}
+        self._ends: dict[int, list[int]] = {}
+        self._size = 0
+        for version, version_ranges in ranges.items():
+            merged: list[tuple[int, int]] = []
+            for start, end in sorted(version_ranges):
+                if merged and start <= merged[-1][1] + 1:
+                    if end > merged[-1][1]:
+                        merged[-1] = (merged[-1][0], end)
+                else:
+                    merged.append((start, end))
+            self._starts[version] = [start for start, _ in merged]
+            self._ends[version] = [end for _, end in merged]
+            self._size += len(version_ranges)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, ip) -> bool:
+        parsed = _parse_ip(ip)
+        if parsed is None:
             return False
+        version, value = parsed
+        index = bisect.bisect_right(self._starts[version], value) - 1
+        return index >= 0 and value <= self._ends[version][index]
+
 
+_IPV4_MAPPED_PREFIX = b'\x00' * 10 + b'\xff\xff'
 
-def verify_ip_address(request: Request, whitelist_ips: list[str], reverse_proxy_ips: list[str]) -> bool:
+
+def _parse_ip(ip) -> tuple[int, int] | None:
+    """Return (version, integer value) of an address, None if it is not valid."""
+    if isinstance(ip, str):
+        # inet_pton is much faster than ipaddress.ip_address
+        try:
+            return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+        except OSError:
+            pass
+        try:
+            packed = socket.inet_pton(socket.AF_INET6, ip)
+        except OSError:
+            pass
+        else:
+            if packed.startswith(_IPV4_MAPPED_PREFIX):
+                return 4, int.from_bytes(packed[12:], "big")
+            return 6, int.from_bytes(packed, "big")
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return None
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return address.version, int(address)
+
+
+def _as_matcher(ips: IPMatcher | Iterable[str]) -> IPMatcher:
+    return ips if isinstance(ips, IPMatcher) else IPMatcher(ips)
+
+
+def verify_ip_address(request: Request, whitelist_ips: IPMatcher | list[str],
+                      reverse_proxy_ips: IPMatcher | list[str]) -> bool:
+    """Lists are compiled on every call, pass `IPMatcher` instances built once instead."""
     if not whitelist_ips:
         return True
     return in_whitelist(extract_real_ip(request, reverse_proxy_ips), whitelist_ips)
 
 
-def in_whitelist(ip, whitelist_ips) -> bool:
-    if ip in whitelist_ips:
-        return True
-    for net in whitelist_ips:
-        if ipaddress.ip_address(ip) in ipaddress.ip_network(net):
-            return True
-    return False
+def in_whitelist(ip, whitelist_ips: IPMatcher | list[str]) -> bool:
+    return ip in _as_matcher(whitelist_ips)
 
 
-def extract_real_ip(request: Request, reverse_proxy_ips: list[str]) -> str:
+def extract_real_ip(request: Request, reverse_proxy_ips: IPMatcher | list[str]) -> str:
     x_forwarded_for = request.headers.get('X-Forwarded-For')
 
-    if x_forwarded_for and request.remote_addr in reverse_proxy_ips:
-        ip_addresses = x_forwarded_for.split(',')
+    if x_forwarded_for and reverse_proxy_ips:
+        reverse_proxy_ips = _as_matcher(reverse_proxy_ips)
+        if request.remote_addr in reverse_proxy_ips:
+            ip_addresses = x_forwarded_for.split(',')
 
-        for ip in ip_addresses:
-            ip = ip.strip()
-            if ip not in reverse_proxy_ips:
-                return ip
+            for ip in ip_addresses:
+                ip = ip.strip()
+                if ip not in reverse_proxy_ips:
+                    return ip
 
     return request.remote_addr
 
@@ -41,7 +41,7 @@ def unload_backend_after_each_test():
 
 @pytest.fixture(autouse=True)
 def mock_bot_api():
-    with patch('backend.discourse_api.Discourse', autospec=True) as mock_api:
+    with patch('backend.discourse_api.PooledDiscourse', autospec=True) as mock_api:
         mock_api.return_value = MagicMock()
         yield mock_api.return_value
 
@@ -70,6 +70,14 @@ def mock_config_base():
     ]
     mock_config.action_custom_config = {}
     mock_config.limited_mode = False
+    mock_config.account_selection = "default"
+    mock_config.concurrent_dispatch = False
+    mock_config.concurrent_dispatch_workers = 4
+    mock_config.http = MagicMock(pool_connections=1, pool_maxsize=2, keep_alive=True,
+                                 max_retries=0, backoff_factor=0)
+    mock_config.rate_limit = MagicMock(enabled=False)
+    mock_config.scheduler = MagicMock(persistent_jobs=False, jitter=0, startup_jitter=0, coalesce=True,
+                                      max_instances=1, misfire_grace_time=60)
     mock_config.db_url = "sqlite:///:memory:"
     yield mock_config
 
@@ -0,0 +1,122 @@
+import pickle
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def auto_patch(patch_bot_config):
+    yield
+
+
+@pytest.fixture
+def PostReportStore():
+    from backend.plugins.bot_action_annual_report.post_report_store import PostReportStore
+    return PostReportStore
+
+
+def test_get(PostReportStore):
+    day_counts = {7: np.arange(365), 3: np.ones(365)}
+    hour_counts = {7: np.arange(24), 3: np.ones(24)}
+    store = PostReportStore.from_dicts(day_counts, hour_counts)
+    assert store.user_ids.tolist() == [3, 7]
+    assert store.day_counts.dtype == np.int32
+    day_count, hour_count = store.get(7)
+    assert day_count.tolist() == list(range(365))
+    assert hour_count.tolist() == list(range(24))
+    assert store.get(5) is None
+    assert store.get(1) is None
+    assert store.get(100) is None
+
+
+def test_save_and_load_memory_mapped(PostReportStore, tmp_path):
+    store = PostReportStore.from_dicts({1: np.full(365, 2)}, {1: np.full(24, 3)})
+    assert not PostReportStore.exists(str(tmp_path / "store"))
+    store.save(str(tmp_path / "store"))
+    assert PostReportStore.exists(str(tmp_path / "store"))
+
+    loaded = PostReportStore.load(str(tmp_path / "store"))
+    assert isinstance(loaded.day_counts, np.memmap)
+    day_count, hour_count = loaded.get(1)
+    # rows are views of the mapped matrices, not copies
+    assert np.shares_memory(day_count, loaded.day_counts)
+    assert day_count.sum() == 730
+    assert hour_count.sum() == 72
+
+
+def test_empty_store(PostReportStore, tmp_path):
+    store = PostReportStore.from_dicts({}, {})
+    assert store.day_counts.shape == (0, 365)
+    store.save(str(tmp_path / "store"))
+    assert PostReportStore.load(str(tmp_path / "store")).get(1) is None
+
+
+def test_preprocess_posts_data(tmp_path):
+    from backend.plugins.bot_action_annual_report.post_report_store import PostReportStore
+    from backend.plugins.bot_action_annual_report.preprocess_data import USER_TABLE_FILE, preprocess_posts_data
+    # 2025-01-01 08:30 and 2025-01-02 09:00 in Asia/Shanghai
+    data = {
+        "columns": ["id", "user_id", "raw", "created_at", "reads"],
+        "rows": [
+            [1, 10, "你好 hello", 1735691400, 3],
+            [2, 10, "text", 1735779600, 1],
+            [3, 20, "水源", 1735691400, 5],
+        ],
+    }
+    path = str(tmp_path / "post_report_processed")
+    assert preprocess_posts_data([data], path) == 3
+
+    store = PostReportStore.load(path)
+    day_count, hour_count = store.get(10)
+    assert day_count[0] == 1 and day_count[1] == 1 and day_count.sum() == 2
+    assert hour_count[8] == 1 and hour_count[9] == 1
+    with open(f"{path}/{USER_TABLE_FILE}", "rb") as f:
+        user_table = pickle.load(f)
+    assert user_table.loc[10, "post_count"] == 2
+    assert user_table.loc[10, "post_days"] == 2
+    assert user_table.loc[20, "post_character_count"] == 2
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_concurrent_preprocess_posts_data(tmp_path):
+    import threading
+    from backend.plugins.bot_action_annual_report.post_report_store import PostReportStore
+    from backend.plugins.bot_action_annual_report.preprocess_data import USER_TABLE_FILE, preprocess_posts_data
+    columns = ["id", "user_id", "raw", "created_at", "reads"]
+    path = str(tmp_path / "post_report_processed")
+    errors = []
+
+    def write(user_id):
+        try:
+            for _ in range(5):
+                preprocess_posts_data([{"columns": columns, "rows": [[1, user_id, "", 1735691400, 0]]}], path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(user_id,)) for user_id in range(1, 5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # one of the writers published a complete result
+    store = PostReportStore.load(path)
+    assert len(store.user_ids) == 1
+    with open(f"{path}/{USER_TABLE_FILE}", "rb") as f:
+        assert pickle.load(f).index.tolist() == store.user_ids.tolist()
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_preprocess_posts_data_failure_cleans_up(tmp_path):
+    from backend.plugins.bot_action_annual_report.preprocess_data import preprocess_posts_data
+    path = str(tmp_path / "post_report_processed")
+    page = {"columns": ["id", "user_id", "raw", "created_at", "reads"], "rows": [[1, 1, "", 1735691400, 0]]}
+    preprocess_posts_data([page], path)
+    with patch("backend.plugins.bot_action_annual_report.preprocess_data.pickle.dump", side_effect=OSError("full")):
+        with pytest.raises(OSError):
+            preprocess_posts_data([page], path)
+    # the published result is kept
+    assert (tmp_path / "post_report_processed" / "user_ids.npy").exists()
+    assert list(tmp_path.glob("*.tmp")) == []
@@ -0,0 +1,147 @@
+import re
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+import pytz
+
+
+@pytest.fixture(autouse=True)
+def auto_patch(patch_bot_config):
+    yield
+
+
+def reference_preprocess_posts_data(data: dict):
+    """The row by row implementation `aggregate_posts_data` replaces."""
+    data_table = pd.DataFrame(data['rows'], columns=data['columns'])
+    data_table['created_at'] = data_table['created_at'].map(
+        lambda x: datetime.fromtimestamp(x, pytz.timezone('Asia/Shanghai')))
+    data_table.set_index('id', inplace=True)
+    user_post_count = defaultdict(lambda: 0)
+    user_post_character_count = defaultdict(lambda: 0)
+    user_post_read_count = defaultdict(lambda: 0)
+    user_post_hour_count = defaultdict(lambda: np.zeros(24, dtype=np.int32))
+    user_post_day_count = defaultdict(lambda: np.zeros(365, dtype=np.int32))
+    for row in data_table.itertuples():
+        user_id = row.user_id
+        user_post_count[user_id] += 1
+        user_post_read_count[user_id] += row.reads
+        user_post_character_count[user_id] += len(
+            re.findall(r'[一-龥]', row.raw))
+        user_post_hour_count[user_id][row.created_at.hour] += 1
+        day_of_year = row.created_at.timetuple().tm_yday - 1
+        user_post_day_count[user_id][day_of_year] += 1
+    user_post_days = {
+        user_id: np.count_nonzero(user_post_day_count[user_id])
+        for user_id in user_post_day_count
+    }
+    user_table = pd.DataFrame(
+        columns=['user_id', 'post_count', 'post_read_count', 'post_character_count'])
+    user_table.set_index('user_id', inplace=True)
+    user_table['post_count'] = pd.Series(user_post_count, copy=True).astype(np.int32)
+    user_table['post_read_count'] = pd.Series(user_post_read_count, copy=True).astype(np.int32)
+    user_table['post_character_count'] = pd.Series(user_post_character_count, copy=True).astype(np.int32)
+    user_table['post_count_rank'] = user_table['post_count'].rank(ascending=False)
+    user_table['post_read_count_rank'] = user_table['post_read_count'].rank(ascending=False)
+    user_table['post_character_count_rank'] = user_table['post_character_count'].rank(ascending=False)
+    user_table['post_days'] = pd.Series(user_post_days, copy=True).astype(np.int32)
+    user_table['post_days_rank'] = user_table['post_days'].rank(ascending=False)
+    return user_table, dict(user_post_day_count), dict(user_post_hour_count)
+
+
+def synthetic_posts(post_count: int, user_count: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    # the first and last second of 2025 in Asia/Shanghai
+    year_start, year_end = 1735660800, 1767196799
+    timestamps = rng.integers(year_start, year_end, post_count).tolist()
+    timestamps[:4] = [year_start, year_end, year_start + 86399, year_start + 86400]
+    words = ["水源", "hello", "你好，世界", "〇", "龦", "😀", "", "abc 中文 def", "一龥"]
+    rows = [
+        [
+            post_id,
+            int(rng.integers(1, user_count * 10)) if post_id % 7 else 1,
+            " ".join(rng.choice(words, int(rng.integers(0, 6)))),
+            timestamps[post_id],
+            int(rng.integers(0, 1000)),
+        ]
+        for post_id in range(post_count)
+    ]
+    return {"columns": ["id", "user_id", "raw", "created_at", "reads"], "rows": rows}
+
+
+@pytest.mark.parametrize("post_count, user_count", [(1, 1), (50, 3), (5000, 300)])
+def test_aggregate_posts_data_matches_reference(post_count, user_count):
+    from backend.plugins.bot_action_annual_report.preprocess_data import aggregate_posts_data
+    data = synthetic_posts(post_count, user_count)
+
+    user_table, store = aggregate_posts_data(data)
+    expected_table, expected_day_counts, expected_hour_counts = reference_preprocess_posts_data(data)
+
+    pd.testing.assert_frame_equal(user_table, expected_table)
+    assert store.user_ids.tolist() == sorted(expected_day_counts)
+    for user_id in expected_day_counts:
+        day_count, hour_count = store.get(user_id)
+        np.testing.assert_array_equal(day_count, expected_day_counts[user_id])
+        np.testing.assert_array_equal(hour_count, expected_hour_counts[user_id])
+
+
+@pytest.mark.parametrize("page_size", [1, 7, 1000])
+def test_posts_aggregator_pages_match_single_pass(page_size):
+    from backend.plugins.bot_action_annual_report.preprocess_data import PostsAggregator, aggregate_posts_data
+    data = synthetic_posts(500, 40)
+
+    aggregator = PostsAggregator()
+    for start in range(0, len(data["rows"]), page_size):
+        aggregator.add_page({"columns": data["columns"], "rows": data["rows"][start:start + page_size]})
+    aggregator.add_page({"columns": data["columns"], "rows": []})
+    user_table, store = aggregator.result()
+    expected_table, expected_store = aggregate_posts_data(data)
+
+    assert aggregator.rows_processed == 500
+    pd.testing.assert_frame_equal(user_table, expected_table)
+    np.testing.assert_array_equal(store.user_ids, expected_store.user_ids)
+    np.testing.assert_array_equal(store.day_counts, expected_store.day_counts)
+    np.testing.assert_array_equal(store.hour_counts, expected_store.hour_counts)
+
+
+def test_preprocess_visit_data_pages(tmp_path):
+    import pickle
+    from backend.plugins.bot_action_annual_report.preprocess_data import preprocess_visit_data
+    columns = ["user_id", "posts_read", "time_read", "days_visited"]
+    rows = [[1, 10, 100, 3], [2, 30, 50, 3], [3, 20, 300, 1]]
+    path = str(tmp_path / "visit_report_processed.pkl")
+
+    assert preprocess_visit_data(
+        [{"columns": columns, "rows": rows[:2]}, {"columns": columns, "rows": rows[2:]}], path) == 3
+    with open(path, "rb") as f:
+        table = pickle.load(f)
+    assert table.index.tolist() == [1, 2, 3]
+    assert table["posts_read_rank"].tolist() == [3, 1, 2]
+    assert table["days_visited_rank"].tolist() == [1, 1, 3]
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_local_hour_and_day_of_year():
+    from backend.plugins.bot_action_annual_report.preprocess_data import local_hour_and_day_of_year
+    timestamps = np.array([1735660800, 1735660799, 1767196799, 1735704000.5])
+    hours, days = local_hour_and_day_of_year(timestamps)
+    expected = [datetime.fromtimestamp(x, pytz.timezone('Asia/Shanghai')) for x in timestamps]
+    assert hours.tolist() == [x.hour for x in expected]
+    assert days.tolist() == [x.timetuple().tm_yday - 1 for x in expected]
+
+
+def test_count_cjk_characters(monkeypatch):
+    from backend.plugins.bot_action_annual_report import preprocess_data
+    monkeypatch.setattr(preprocess_data, "CJK_COUNT_CHUNK_SIZE", 2)
+    texts = ["你好", "", None, "a\ud800水源", "😀一龥〇龦", "hello"]
+    assert preprocess_data.count_cjk_characters(texts).tolist() == [2, 0, 0, 2, 2, 0]
+
+
+def test_posts_out_of_the_year():
+    from backend.plugins.bot_action_annual_report.preprocess_data import aggregate_posts_data
+    # 2024-12-31 in Asia/Shanghai, the 366th day of 2024
+    data = {"columns": ["id", "user_id", "raw", "created_at", "reads"], "rows": [[1, 1, "", 1735660799, 0]]}
+    with pytest.raises(ValueError):
+        aggregate_posts_data(data)
@@ -0,0 +1,265 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from fluent_discourse import DiscourseError
+
+
+@pytest.fixture(autouse=True)
+def auto_patch(patch_bot_config):
+    yield
+
+
+def paged_api(rows: list, columns=("id",), timeouts: int = 0):
+    """A mock api answering the paged query from `rows`, after `timeouts` statement timeouts."""
+    api = MagicMock()
+    calls = []
+
+    def post(body):
+        calls.append(body)
+        if len(calls) <= timeouts:
+            raise DiscourseError("ERROR: canceling statement due to statement timeout")
+        offset = int(json.loads(body["params"])["offset"])
+        page = rows[offset:offset + body["limit"]]
+        return {"columns": list(columns), "rows": page, "duration": 0.5, "result_count": len(page)}
+
+    api.client.g["bot"].reports[1].run.json.post.side_effect = post
+    return api, calls
+
+
+def test_iter_query_pages():
+    from backend.plugins.bot_action_annual_report.query_database import iter_query_pages
+    api, calls = paged_api([[i] for i in range(7)])
+    progress = []
+
+    pages = iter_query_pages(api, 1, page_size=3, on_page=lambda *args: progress.append(args))
+    assert calls == []
+    assert [page["rows"] for page in pages] == [[[0], [1], [2]], [[3], [4], [5]], [[6]]]
+    assert progress == [(1, 3), (2, 6), (3, 7)]
+
+
+def test_iter_query_pages_retries_timeouts():
+    from backend.plugins.bot_action_annual_report.query_database import iter_query_pages, query_database_paged
+    api, calls = paged_api([[i] for i in range(3)], timeouts=2)
+    result = query_database_paged(api, 1, page_size=3)
+    assert result["rows"] == [[0], [1], [2]] and result["columns"] == ["id"]
+    assert len(calls) == 4
+
+    api, _ = paged_api([[0]], timeouts=3)
+    with pytest.raises(DiscourseError):
+        list(iter_query_pages(api, 1, page_size=3))
+
+
+def keyset_api(rows: list, timeout_above: int | None = None):
+    """
+    A mock api answering a keyset query over `rows` (id, created_at) from
+    `:cursor_created_at`, `:cursor_id`, `:range_start` and `:range_end`.
+    Pages larger than `timeout_above` time out.
+    """
+    api = MagicMock()
+    calls = []
+
+    def post(body):
+        params = json.loads(body["params"])
+        calls.append((params, body["limit"]))
+        if timeout_above is not None and body["limit"] > timeout_above:
+            raise DiscourseError("ERROR: canceling statement due to statement timeout")
+        cursor = (float(params.get("cursor_created_at", 0)), int(params.get("cursor_id", 0)))
+        selected = sorted(
+            (row for row in rows
+             if float(params.get("range_start", 0)) <= row[1] < float(params.get("range_end", "inf"))
+             and (row[1], row[0]) > cursor),
+            key=lambda row: (row[1], row[0]))
+        page = selected[:body["limit"]]
+        return {"columns": ["id", "created_at"], "rows": page, "duration": 0.1, "result_count": len(page)}
+
+    api.client.g["bot"].reports[1].run.json.post.side_effect = post
+    return api, calls
+
+
+POSTS = [[post_id, 100 + post_id // 3] for post_id in range(20)]
+
+
+def test_iter_query_pages_keyset():
+    from backend.plugins.bot_action_annual_report.query_database import iter_query_pages
+    api, calls = keyset_api(POSTS)
+
+    pages = list(iter_query_pages(api, 1, page_size=4, cursor_columns=("created_at", "id")))
+    assert [row for page in pages for row in page["rows"]] == POSTS
+    assert "offset" not in calls[0][0] and "cursor_id" not in calls[0][0]
+    assert calls[1][0] == {"cursor_created_at": "101", "cursor_id": "3"}
+
+
+def test_iter_query_pages_decreases_page_size_on_timeouts():
+    from backend.plugins.bot_action_annual_report.query_database import iter_query_pages, query_database_paged
+    api, calls = keyset_api(POSTS, timeout_above=5)
+    pages = list(iter_query_pages(api, 1, page_size=16, min_page_size=2, cursor_columns=("created_at", "id")))
+    assert [row for page in pages for row in page["rows"]] == POSTS
+    assert [limit for _, limit in calls[:4]] == [16, 8, 4, 4]
+
+    api, calls = paged_api([[i] for i in range(10)], timeouts=1)
+    result = query_database_paged(api, 1, page_size=8, min_page_size=3)
+    assert result["rows"] == [[i] for i in range(10)]
+    assert [json.loads(body["params"])["offset"] for body in calls[1:]] == ["0", "4", "8"]
+
+    api, _ = keyset_api(POSTS, timeout_above=1)
+    with pytest.raises(DiscourseError):
+        list(iter_query_pages(api, 1, page_size=16, min_page_size=2, cursor_columns=("created_at", "id")))
+
+
+def test_time_partitions():
+    from backend.plugins.bot_action_annual_report.query_database import time_partitions
+    assert time_partitions(0, 90, 3) == [
+        {"range_start": 0, "range_end": 30}, {"range_start": 30, "range_end": 60}, {"range_start": 60, "range_end": 90}]
+
+
+@pytest.mark.parametrize("workers", [1, 2, None])
+def test_iter_query_partitions(workers):
+    from backend.plugins.bot_action_annual_report.query_database import iter_query_partitions, time_partitions
+    api, calls = keyset_api(POSTS)
+    progress = []
+
+    pages = list(iter_query_partitions(
+        api, 1, time_partitions(100, 107, 3), workers=workers, on_page=lambda *args: progress.append(args),
+        page_size=2, cursor_columns=("created_at", "id")))
+    assert sorted(row for page in pages for row in page["rows"]) == POSTS
+    assert all("range_start" in params and "range_end" in params for params, _ in calls)
+    assert progress[-1] == (len(pages), len(POSTS))
+
+
+def test_iter_query_partitions_raises_errors():
+    from backend.plugins.bot_action_annual_report.query_database import iter_query_partitions, time_partitions
+    api, _ = keyset_api(POSTS)
+    api.client.g["bot"].reports[1].run.json.post.side_effect = DiscourseError("permission denied")
+    with pytest.raises(DiscourseError, match="permission denied"):
+        list(iter_query_partitions(api, 1, time_partitions(100, 107, 3), page_size=2))
+
+
+def test_query_gate_bounds_concurrency():
+    import threading
+    import time
+    from backend.plugins.bot_action_annual_report.query_database import QueryGate
+    gate = QueryGate(max_concurrent=2, cache_ttl=0)
+    running = []
+    max_running = []
+    lock = threading.Lock()
+
+    def query():
+        with lock:
+            running.append(1)
+            max_running.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.pop()
+        return {}
+
+    threads = [threading.Thread(target=gate.run, args=((i,), query)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(max_running) == 2
+    assert gate.metrics()["queries"] == 6
+
+
+def test_query_gate_coalesces_identical_queries():
+    import threading
+    import time
+    from backend.plugins.bot_action_annual_report.query_database import QueryGate
+    gate = QueryGate(max_concurrent=4, cache_ttl=0)
+    release = threading.Event()
+    calls = []
+
+    def query():
+        calls.append(1)
+        release.wait(5)
+        return {"rows": [[1]]}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gate.run(("same",), query))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for _ in range(500):
+        if gate.metrics()["coalesced"] == 4:
+            break
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [{"rows": [[1]]}] * 5
+    assert gate.metrics()["in_flight"] == 0
+
+
+def test_query_gate_caches_results(monkeypatch):
+    from backend.plugins.bot_action_annual_report import query_database
+    gate = query_database.QueryGate(max_concurrent=1, cache_ttl=60)
+    now = [1000.0]
+    monkeypatch.setattr(query_database.time, "monotonic", lambda: now[0])
+    calls = []
+
+    def query():
+        calls.append(1)
+        return {"count": len(calls)}
+
+    assert gate.run(("a",), query) == {"count": 1}
+    assert gate.run(("a",), query) == {"count": 1}
+    assert gate.run(("b",), query) == {"count": 2}
+    now[0] += 61
+    assert gate.run(("a",), query) == {"count": 3}
+    assert gate.metrics()["cache_hits"] == 1
+
+
+def test_query_gate_does_not_keep_errors():
+    from backend.plugins.bot_action_annual_report.query_database import QueryGate
+    gate = QueryGate(max_concurrent=1, cache_ttl=60)
+
+    def failing():
+        raise DiscourseError("statement timeout")
+
+    with pytest.raises(DiscourseError):
+        gate.run(("a",), failing)
+    assert gate.run(("a",), lambda: {"ok": True}) == {"ok": True}
+    assert gate.metrics()["in_flight"] == 0
+
+
+def test_query_database_uses_the_gate():
+    from backend.plugins.bot_action_annual_report.query_database import query_database, query_gate
+    query_gate.configure(max_concurrent=2, cache_ttl=60)
+    api = MagicMock()
+    post = api.client.g["bot"].reports[5].run.json.post
+    post.return_value = {"rows": []}
+
+    query_database(api, 5, {"user_id": 1, "year": 2025})
+    query_database(api, 5, {"year": 2025, "user_id": 1})
+    query_database(api, 5, {"user_id": 2, "year": 2025})
+    assert post.call_count == 2
+
+
+def test_query_gate_reserves_before_the_slot():
+    import contextlib
+    import threading
+    from backend.plugins.bot_action_annual_report.query_database import QueryGate
+    gate = QueryGate(max_concurrent=1, cache_ttl=0)
+    events = []
+    release = threading.Event()
+
+    @contextlib.contextmanager
+    def reserve():
+        events.append(("reserve", gate._semaphore._value))
+        yield
+
+    def query():
+        events.append("query")
+        release.wait(5)
+        return {}
+
+    threads = [threading.Thread(target=gate.run, args=(("same",), query, reserve)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    # the slot is free while reserving, and each run reserves once
+    assert events[0] == ("reserve", 1)
+    assert events.count("query") == events.count(("reserve", 1))
@@ -0,0 +1,51 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def auto_patch(patch_bot_config):
+    yield
+
+
+@pytest.fixture
+def report_config(patch_bot_config, tmp_path):
+    patch_bot_config.action_custom_config["BotAnnualReport"] = {
+        "enabled": False,
+        "interaction_from_query_id": 1,
+        "interaction_to_query_id": 2,
+        "post_tag_query_id": 3,
+        "topic_read_query_id": 4,
+        "user_post_query_id": 5,
+        "user_visit_query_id": 6,
+        "working_path": str(tmp_path / "annual_report"),
+    }
+    yield patch_bot_config
+
+
+def test_processed_data_is_built_once(report_config):
+    from backend.plugins.bot_action_annual_report.bot_action_annual_read_report import BotReadReport
+    api = MagicMock()
+
+    def post(body):
+        # slow enough for the other workers to find the data missing
+        time.sleep(0.2)
+        return {"columns": ["user_id", "posts_read", "time_read", "days_visited"],
+                "rows": [[1, 10, 100, 3]], "duration": 0.1, "result_count": 1}
+
+    api.client.g["bot"].reports[6].run.json.post.side_effect = post
+    # one action per worker process
+    actions = [BotReadReport() for _ in range(3)]
+    for action in actions:
+        action.api = api
+    threads = [threading.Thread(target=action.warm_up) for action in actions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert api.client.g["bot"].reports[6].run.json.post.call_count == 1
+    for action in actions:
+        assert action.get_visit_data(1)["posts_read"] == 10
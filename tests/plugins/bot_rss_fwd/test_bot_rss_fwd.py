@@ -142,4 +142,121 @@ def test_handle_new_task(init_table):
     assert action.config.tasks[0].is_new_task
     action.on_scheduled()
     assert RssFwdRecord.where(task_id="/test_100_None").count() == 2
-    assert not action.config.tasks[0].is_new_task
\ No newline at end of file
+    assert not action.config.tasks[0].is_new_task
+def test_conditional_fetch(init_table, patch_bot_kv_storage, mock_rss_feed):
+    from backend.plugins.bot_rss_fwd.bot_rss_fwd import BotRssFwd, RssFwdRecord
+    from feedparser import parse
+    mock_rss_feed['etag'] = '"abc"'
+    mock_rss_feed['modified'] = "Wed, 01 Jan 2025 00:00:00 GMT"
+    action = BotRssFwd()
+    action.on_scheduled()
+    parse.assert_called_once_with("https://rsshub.example.com/test")
+    assert patch_bot_kv_storage["BotRssFwd.feed_cache./test_100_None"] == {
+        "etag": '"abc"', "modified": "Wed, 01 Jan 2025 00:00:00 GMT"}
+
+    parse.reset_mock()
+    parse.return_value = feedparser.FeedParserDict(status=304, bozo=False, entries=[])
+    action.process_feed = MagicMock()
+    action.on_scheduled()
+    parse.assert_called_once_with(
+        "https://rsshub.example.com/test", etag='"abc"', modified="Wed, 01 Jan 2025 00:00:00 GMT")
+    action.process_feed.assert_not_called()
+    assert RssFwdRecord.where(task_id="/test_100_None").count() == 2
+
+def test_fetch_feeds_concurrently(init_table, mock_config, mock_rss_feed):
+    import threading
+    for i in range(3):
+        mock_config.action_custom_config["BotRssFwd"]["tasks"].append({
+            "endpoint": f"/concurrent{i}",
+            "enabled": True,
+            "new_topic": True,
+            "category_id": 100 + i
+        })
+    from backend.plugins.bot_rss_fwd.bot_rss_fwd import BotRssFwd
+    barrier = threading.Barrier(4, timeout=5)
+
+    def parse(url, **kwargs):
+        # every fetch waits for the others, so this only passes if they run at the same time
+        barrier.wait()
+        return mock_rss_feed
+
+    action = BotRssFwd()
+    with patch("feedparser.parse", side_effect=parse):
+        action.on_scheduled()
+    assert all(not task.is_new_task for task in action.config.tasks)
+
+def test_fetch_error_does_not_stop_other_tasks(init_table, mock_config, mock_rss_feed, caplog):
+    mock_config.action_custom_config["BotRssFwd"]["tasks"].append({
+        "endpoint": "/broken",
+        "enabled": True,
+        "new_topic": True,
+        "category_id": 101
+    })
+    from backend.plugins.bot_rss_fwd.bot_rss_fwd import BotRssFwd
+
+    def parse(url, **kwargs):
+        if url.endswith("/broken"):
+            raise Exception("Connection reset")
+        return mock_rss_feed
+
+    action = BotRssFwd()
+    with patch("feedparser.parse", side_effect=parse):
+        action.on_scheduled()
+    assert not action.config.tasks[0].is_new_task
+    assert action.config.tasks[1].is_new_task
+    assert "Failed to fetch RSS feed of task /broken." in caplog.text
+
+@pytest.fixture
+def count_queries():
+    from sqlalchemy import event
+    from backend.db import db_manager
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_manager._engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(db_manager._engine, "before_cursor_execute", before_cursor_execute)
+
+def test_filter_feed_batched_query(init_table, mock_rss_feed, count_queries):
+    from backend.plugins.bot_rss_fwd.bot_rss_fwd import BotRssFwd
+    all_feeds = mock_rss_feed.entries
+    action = BotRssFwd()
+    action.record_feeds(action.config.tasks[0], [action.feed_record(action.config.tasks[0], all_feeds[0])])
+
+    action.seen_guids = type(action.seen_guids)()
+    count_queries.clear()
+    feeds = action.filter_feed(all_feeds, action.config.tasks[0])
+    assert [feed.guid for feed in feeds] == [all_feeds[1].guid]
+    assert len(count_queries) == 1
+    assert " IN " in count_queries[0]
+
+def test_steady_state_poll_without_query(init_table, mock_rss_feed, count_queries):
+    from backend.plugins.bot_rss_fwd.bot_rss_fwd import BotRssFwd, RssFwdRecord
+    action = BotRssFwd()
+    action.on_scheduled()
+    assert RssFwdRecord.where(task_id="/test_100_None").count() == 2
+
+    count_queries.clear()
+    action.create_post_or_topic = MagicMock()
+    action.on_scheduled()
+    assert count_queries == []
+    action.create_post_or_topic.assert_not_called()
+
+def test_forward_new_feeds_bulk_insert(init_table, mock_rss_feed):
+    from backend.plugins.bot_rss_fwd.bot_rss_fwd import BotRssFwd, RssFwdRecord
+    action = BotRssFwd()
+    task = action.config.tasks[0]
+    RssFwdRecord(task_id=task.task_key, guid="old-guid").save()
+    post = MagicMock(id=10, topic_id=20)
+    action.create_post_or_topic = MagicMock(side_effect=[post, Exception("Rate limited")])
+
+    with patch.object(RssFwdRecord, 'bulk_insert', wraps=RssFwdRecord.bulk_insert) as bulk_insert:
+        with pytest.raises(Exception, match="Rate limited"):
+            action.process_feed(task, mock_rss_feed)
+        bulk_insert.assert_called_once()
+
+    # the feed forwarded before the error is recorded
+    assert RssFwdRecord.where(task_id=task.task_key).count() == 2
+    assert len(action.filter_feed(mock_rss_feed.entries, task)) == 1
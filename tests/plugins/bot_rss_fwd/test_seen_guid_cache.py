@@ -0,0 +1,71 @@
+import pytest
+from unittest.mock import MagicMock
+
+
+@pytest.fixture(autouse=True)
+def auto_patch(patch_bot_config):
+    yield
+
+
+@pytest.fixture
+def SeenGuidCache():
+    from backend.plugins.bot_rss_fwd.seen_guid_cache import SeenGuidCache
+    return SeenGuidCache
+
+
+def test_unseen_and_add(SeenGuidCache):
+    cache = SeenGuidCache(max_size=10)
+    assert not cache.has_task("task")
+    assert cache.unseen("task", ["a", "b"]) == ["a", "b"]
+    cache.add("task", ["a"])
+    assert cache.has_task("task")
+    assert not cache.has_task("other")
+    assert cache.unseen("task", ["a", "b"]) == ["b"]
+    assert cache.unseen("other", ["a"]) == ["a"]
+
+
+def test_lru_eviction(SeenGuidCache):
+    cache = SeenGuidCache(max_size=2)
+    cache.add("task", ["a", "b"])
+    # "a" becomes the most recently used
+    assert cache.unseen("task", ["a"]) == []
+    cache.add("task", ["c"])
+    assert cache.unseen("task", ["a", "b", "c"]) == ["b"]
+
+
+def test_disabled_local_cache(SeenGuidCache):
+    cache = SeenGuidCache(max_size=0)
+    cache.add("task", ["a"])
+    assert cache.unseen("task", ["a"]) == ["a"]
+    assert not cache.has_task("task")
+
+
+def test_redis_cache(SeenGuidCache):
+    redis_client = MagicMock()
+    redis_client.zmscore.return_value = [1700000000.0, None]
+    redis_client.exists.return_value = 1
+    cache = SeenGuidCache(max_size=10, redis_client=redis_client, redis_max_size=100, redis_ttl=3600)
+
+    assert cache.has_task("task")
+    assert cache.unseen("task", ["a", "b"]) == ["b"]
+    redis_client.zmscore.assert_called_once_with("rss_fwd.seen_at:task", ["a", "b"])
+    # "a" is now in the local cache
+    redis_client.zmscore.reset_mock()
+    assert cache.unseen("task", ["a"]) == []
+    redis_client.zmscore.assert_not_called()
+
+    cache.add("task", ["b"])
+    pipeline = redis_client.pipeline.return_value
+    assert list(pipeline.zadd.call_args[0][1]) == ["b"]
+    # only the most recent GUIDs are kept, and the set expires with the task
+    pipeline.zremrangebyrank.assert_called_once_with("rss_fwd.seen_at:task", 0, -101)
+    pipeline.expire.assert_called_once_with("rss_fwd.seen_at:task", 3600)
+    pipeline.execute.assert_called_once_with()
+
+
+def test_redis_error_falls_back_to_database(SeenGuidCache, caplog):
+    redis_client = MagicMock()
+    redis_client.zmscore.side_effect = Exception("Connection refused")
+    cache = SeenGuidCache(max_size=10, redis_client=redis_client)
+    assert cache.unseen("task", ["a"]) == ["a"]
+    assert "Failed to read seen GUIDs of task from Redis" in caplog.text
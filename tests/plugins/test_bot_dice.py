@@ -45,6 +45,27 @@ def test_bot_dice_should_reply(patch_bot_config, test_post):
     assert bot_dice.should_response(post) is True
 
 
+@pytest.mark.parametrize('account_selection, expected', [
+    ("default", False),
+    ("round_robin", True),
+])
+def test_bot_dice_should_reply_to_other_accounts(mock_config, patch_bot_config, test_post,
+                                                  account_selection, expected):
+    mock_config.bot_accounts.append(
+        MagicMock(id=2, username="bot2", api_key="API_KEY_2", writable=True, default=False))
+    mock_config.account_selection = account_selection
+    from backend.plugins.bot_dice.bot_dice import BotDice
+    bot_dice = BotDice()
+    post = deepcopy(test_post)
+    post.raw = "投掷\n1234"
+    post.reply_to_user.username = "bot2"
+    assert bot_dice.should_response(post) is expected
+    post = deepcopy(test_post)
+    post.raw = "@bot2 投掷\n1234"
+    post.cooked = '<p><a class="mention" href="/u/bot2">@bot2</a> 投掷<br>1234</p>'
+    assert bot_dice.should_response(post) is expected
+
+
 @pytest.mark.parametrize('input_str, expected_len', [
     ('5dGeom(0.5)', 5),
     ('3dN(0,1)', 3),
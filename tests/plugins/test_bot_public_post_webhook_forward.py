@@ -1,11 +1,11 @@
 import json
 import os
+from contextlib import contextmanager
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from backend.event_context import EventContext
-from backend.model.post import Post
 
 
 @pytest.fixture(scope="module")
@@ -30,6 +30,16 @@ def auto_patch(patch_bot_config):
     yield
 
 
+@contextmanager
+def patch_http_post(**kwargs):
+    with patch(
+        "backend.plugins.bot_public_post_webhook_forward.bot_public_post_webhook_forward.get_http_session",
+    ) as mock_get_http_session:
+        mock_post = mock_get_http_session.return_value.post
+        mock_post.configure_mock(**kwargs)
+        yield mock_post
+
+
 def create_action():
     from backend.plugins.bot_public_post_webhook_forward.bot_public_post_webhook_forward import (
         BotPublicPostWebhookForward,
@@ -56,12 +66,10 @@ def test_forward_public_post_webhook(webhook_data):
     }
     response = MagicMock(ok=True)
 
-    with patch(
-        "backend.plugins.bot_public_post_webhook_forward.bot_public_post_webhook_forward.requests.post",
+    with patch_http_post(
         return_value=response,
     ) as mock_post:
         action.on_post_created(
-            Post(**webhook_data["post"]),
             event_context=create_event_context(webhook_data, raw_body, event_headers),
         )
 
@@ -78,11 +86,8 @@ def test_skip_when_category_id_is_null(webhook_data):
     webhook_data = {"post": webhook_data["post"].copy()}
     webhook_data["post"]["category_id"] = None
 
-    with patch(
-        "backend.plugins.bot_public_post_webhook_forward.bot_public_post_webhook_forward.requests.post",
-    ) as mock_post:
+    with patch_http_post() as mock_post:
         action.on_post_created(
-            Post(**webhook_data["post"]),
             event_context=create_event_context(webhook_data),
         )
 
@@ -94,11 +99,8 @@ def test_skip_when_category_id_is_missing(webhook_data, caplog):
     webhook_data = {"post": webhook_data["post"].copy()}
     del webhook_data["post"]["category_id"]
 
-    with patch(
-        "backend.plugins.bot_public_post_webhook_forward.bot_public_post_webhook_forward.requests.post",
-    ) as mock_post:
+    with patch_http_post() as mock_post:
         action.on_post_created(
-            Post(**webhook_data["post"]),
             event_context=create_event_context(webhook_data),
         )
 
@@ -110,12 +112,10 @@ def test_forward_failure_does_not_raise(webhook_data, caplog):
     action = create_action()
     response = MagicMock(ok=False, status_code=500)
 
-    with patch(
-        "backend.plugins.bot_public_post_webhook_forward.bot_public_post_webhook_forward.requests.post",
+    with patch_http_post(
         return_value=response,
     ):
         action.on_post_created(
-            Post(**webhook_data["post"]),
             event_context=create_event_context(webhook_data),
         )
 
@@ -125,12 +125,10 @@ def test_forward_failure_does_not_raise(webhook_data, caplog):
 def test_forward_exception_does_not_raise(webhook_data, caplog):
     action = create_action()
 
-    with patch(
-        "backend.plugins.bot_public_post_webhook_forward.bot_public_post_webhook_forward.requests.post",
+    with patch_http_post(
         side_effect=Exception("boom"),
     ):
         action.on_post_created(
-            Post(**webhook_data["post"]),
             event_context=create_event_context(webhook_data),
         )
 
@@ -143,12 +141,25 @@ def test_missing_webhook_url_does_not_forward(patch_bot_config, webhook_data):
     }
     action = create_action()
 
-    with patch(
-        "backend.plugins.bot_public_post_webhook_forward.bot_public_post_webhook_forward.requests.post",
-    ) as mock_post:
+    with patch_http_post() as mock_post:
         action.on_post_created(
-            Post(**webhook_data["post"]),
             event_context=create_event_context(webhook_data),
         )
 
     mock_post.assert_not_called()
+
+
+def test_forward_without_building_post_model(patch_bot_config, webhook_data):
+    from backend.bot_manager import bot_manager as BotManager
+    action = create_action()
+    BotManager.activate_action(action.action_name, action)
+    raw_body = json.dumps(webhook_data).encode()
+
+    with patch("backend.bot_manager.Post") as mock_post_model, patch_http_post(
+        return_value=MagicMock(ok=True),
+    ) as mock_post:
+        BotManager.trigger_event("post_created", raw_body=raw_body, event_headers={})
+
+    mock_post_model.assert_not_called()
+    mock_post.assert_called_once()
+    assert mock_post.call_args.kwargs["data"] is raw_body
@@ -88,4 +88,54 @@ def test_check_warnings_remove_warning(test_data):
 
     record_pending = UncategorizedTopicWarningRecord.find(topic_id=1)
     assert record_pending.status == WarningStatus.REMOVED
-    action.api.delete_post.assert_called_once_with(record_pending.post_id)
\ No newline at end of file
+    action.api.delete_post.assert_called_once_with(record_pending.post_id)
+
+
+def test_check_warnings_batch(test_data):
+    from backend.plugins.bot_uncategorized_warn.bot_uncategorized_warn import BotUncategorizedWarn, UncategorizedTopicWarningRecord, WarningStatus
+    action = BotUncategorizedWarn()
+
+    now = datetime.now(UTC)
+    UncategorizedTopicWarningRecord(topic_id=1, post_id=11, status=WarningStatus.PENDING, created_at=now - timedelta(minutes=5)).save()
+    UncategorizedTopicWarningRecord(topic_id=2, post_id=12, status=WarningStatus.PENDING, created_at=now - timedelta(minutes=40)).save()
+    UncategorizedTopicWarningRecord(topic_id=3, post_id=13, status=WarningStatus.PENDING, created_at=now - timedelta(minutes=5)).save()
+    UncategorizedTopicWarningRecord(topic_id=4, post_id=14, status=WarningStatus.PENDING, created_at=now - timedelta(minutes=150)).save()
+    UncategorizedTopicWarningRecord(topic_id=5, post_id=15, status=WarningStatus.PENDING, created_at=now - timedelta(minutes=40)).save()
+    UncategorizedTopicWarningRecord(topic_id=6, post_id=16, status=WarningStatus.REMOVED, created_at=now - timedelta(minutes=40)).save()
+
+    def get_topic_by_id(topic_id):
+        if topic_id in (4, 5):
+            raise Exception("Topic not found")
+        topic = test_data['topic'].copy()
+        topic['id'] = topic_id
+        topic['category_id'] = 2 if topic_id == 3 else 1
+        return topic
+
+    action.api = MagicMock()
+    action.api.get_topic_by_id.side_effect = get_topic_by_id
+
+    with patch.object(UncategorizedTopicWarningRecord, 'bulk_update', wraps=UncategorizedTopicWarningRecord.bulk_update) as bulk_update:
+        action.check_warnings()
+        bulk_update.assert_called_once()
+
+    assert sorted(call.args[0] for call in action.api.get_topic_by_id.call_args_list) == [1, 2, 3, 4, 5]
+    action.api.archive_topic.assert_called_once_with(2)
+    action.api.delete_post.assert_called_once_with(13)
+    statuses = {record.topic_id: record.status for record in UncategorizedTopicWarningRecord.where().all()}
+    assert statuses == {
+        1: WarningStatus.PENDING,
+        2: WarningStatus.EXPIRED,
+        3: WarningStatus.REMOVED,
+        4: WarningStatus.EXCPTION,
+        5: WarningStatus.PENDING,
+        6: WarningStatus.REMOVED,
+    }
+
+def test_check_warnings_nothing_pending():
+    from backend.plugins.bot_uncategorized_warn.bot_uncategorized_warn import BotUncategorizedWarn
+    action = BotUncategorizedWarn()
+    action.api = MagicMock()
+
+    action.check_warnings()
+
+    action.api.get_topic_by_id.assert_not_called()
@@ -3,20 +3,43 @@ import sys
 from types import SimpleNamespace
 from unittest.mock import MagicMock
 
+import pytest
 
-def test_endpoint_passes_raw_body_and_discourse_headers(monkeypatch):
+
+@pytest.fixture
+def mock_bot():
     mock_bot = MagicMock()
     mock_bot.BotManager.trigger_event.return_value = []
+    mock_bot.BotManager.scheduled_job_metrics.return_value = {}
+    mock_bot.BotManager.warm_up_status.return_value = {}
+    mock_bot.BotManager.is_ready.return_value = True
+    mock_bot.scheduler_options.return_value = {}
     mock_bot.Config.server = SimpleNamespace(
         discourse_instance_name="",
         whitelist_ips=[],
         reverse_proxy_ips=[],
         webhook_secret="",
+        event_queue_enabled=False,
+        event_queue_size=10,
+        event_queue_workers=1,
+        webhook_dedup_enabled=False,
+        webhook_dedup_size=100,
+        webhook_dedup_ttl=60,
+        webhook_dedup_redis=False,
+        scheduler_leader_election=False,
+        scheduler_lock_ttl=30,
+        scheduler_lock_file="",
     )
+    return mock_bot
+
 
+@pytest.fixture
+def load_app(monkeypatch, mock_bot):
     mock_scheduler = MagicMock()
+    mock_scheduler.running = False
     mock_scheduler_module = MagicMock()
     mock_scheduler_module.BackgroundScheduler.return_value = mock_scheduler
+    mock_bot.scheduler = mock_scheduler
 
     monkeypatch.setitem(sys.modules, "backend.bot", mock_bot)
     monkeypatch.setitem(
@@ -24,12 +47,25 @@ def test_endpoint_passes_raw_body_and_discourse_headers(monkeypatch):
         "apscheduler.schedulers.background",
         mock_scheduler_module,
     )
+    loaded = []
+
+    def _load_app():
+        sys.modules.pop("app", None)
+        app_module = importlib.import_module("app")
+        loaded.append(app_module)
+        return app_module
+
+    yield _load_app
+    for app_module in loaded:
+        if app_module.event_queue is not None:
+            app_module.event_queue.shutdown()
+        if app_module.scheduler_leader is not None:
+            app_module.scheduler_leader.stop()
     sys.modules.pop("app", None)
-    app_module = importlib.import_module("app")
 
-    client = app_module.app.test_client()
-    raw_body = b'{"post":{"id":1,"category_id":2}}'
-    response = client.post(
+
+def post_event(client, raw_body=b'{"post":{"id":1,"category_id":2}}'):
+    return client.post(
         "/",
         data=raw_body,
         content_type="application/json",
@@ -40,13 +76,180 @@ def test_endpoint_passes_raw_body_and_discourse_headers(monkeypatch):
         },
     )
 
+
+def test_endpoint_passes_raw_body_and_discourse_headers(mock_bot, load_app):
+    app_module = load_app()
+
+    client = app_module.app.test_client()
+    raw_body = b'{"post":{"id":1,"category_id":2}}'
+    response = post_event(client, raw_body)
+
     assert response.status_code == 200
     mock_bot.BotManager.trigger_event.assert_called_once()
     args, kwargs = mock_bot.BotManager.trigger_event.call_args
-    assert args == ("post_created", {"post": {"id": 1, "category_id": 2}})
+    assert args == ("post_created",)
     assert kwargs["raw_body"] == raw_body
+    assert kwargs["trusted"] is False
     assert kwargs["event_headers"] == {
         "X-Discourse-Event": "post_created",
         "X-Discourse-Event-Id": "event-id",
     }
-    sys.modules.pop("app", None)
+
+
+def test_endpoint_dispatches_through_event_queue(mock_bot, load_app):
+    mock_bot.Config.server.event_queue_enabled = True
+    app_module = load_app()
+
+    client = app_module.app.test_client()
+    raw_body = b'{"post":{"id":1,"category_id":2}}'
+    response = post_event(client, raw_body)
+    assert response.status_code == 200
+    assert response.data == b"ok"
+
+    app_module.event_queue.shutdown()
+    mock_bot.BotManager.trigger_event.assert_called_once()
+    args, kwargs = mock_bot.BotManager.trigger_event.call_args
+    assert args == ("post_created",)
+    assert kwargs["raw_body"] == raw_body
+    assert kwargs["wait"] is False
+
+    metrics = client.get("/metrics").get_json()
+    assert metrics["event_queue"]["enqueued"] == 1
+    assert metrics["event_queue"]["processed"] == 1
+
+
+def test_endpoint_returns_503_when_event_queue_is_full(mock_bot, load_app):
+    mock_bot.Config.server.event_queue_enabled = True
+    app_module = load_app()
+    app_module.event_queue.submit = MagicMock(return_value=False)
+
+    response = post_event(app_module.app.test_client())
+
+    assert response.status_code == 503
+    mock_bot.BotManager.trigger_event.assert_not_called()
+
+
+def test_endpoint_verifies_signature_of_raw_body(mock_bot, load_app):
+    import hashlib
+    import hmac
+    mock_bot.Config.server.webhook_secret = "secret"
+    app_module = load_app()
+    client = app_module.app.test_client()
+    raw_body = b'{"post":{"id":1,"category_id":2}}'
+    signature = hmac.new(b"secret", raw_body, hashlib.sha256).hexdigest()
+
+    def post_signed(signature):
+        return client.post("/", data=raw_body, content_type="application/json", headers={
+            "X-Discourse-Event": "post_created",
+            "X-Discourse-Event-Signature": f"sha256={signature}",
+        })
+
+    assert post_signed("0" * 64).status_code == 403
+    mock_bot.BotManager.trigger_event.assert_not_called()
+    assert post_signed(signature).status_code == 200
+    assert mock_bot.BotManager.trigger_event.call_args.kwargs["raw_body"] == raw_body
+    assert mock_bot.BotManager.trigger_event.call_args.kwargs["trusted"] is True
+
+
+def test_endpoint_skips_duplicated_event(mock_bot, load_app):
+    mock_bot.Config.server.webhook_dedup_enabled = True
+    app_module = load_app()
+    client = app_module.app.test_client()
+
+    assert post_event(client).status_code == 200
+    response = post_event(client)
+    assert response.status_code == 200
+    assert response.data == b"ok"
+    mock_bot.BotManager.trigger_event.assert_called_once()
+    assert client.get("/metrics").get_json()["webhook_dedup"]["duplicates"] == 1
+
+
+def test_endpoint_accepts_redelivery_after_503(mock_bot, load_app):
+    mock_bot.Config.server.event_queue_enabled = True
+    mock_bot.Config.server.webhook_dedup_enabled = True
+    app_module = load_app()
+    app_module.event_queue.submit = MagicMock(side_effect=[False, True])
+    client = app_module.app.test_client()
+
+    assert post_event(client).status_code == 503
+    assert post_event(client).status_code == 200
+    assert app_module.event_queue.submit.call_count == 2
+
+
+def test_scheduler_runs_without_election(mock_bot, load_app):
+    load_app()
+
+    mock_bot.BotManager.register_jobs_to_scheduler.assert_called_once_with(mock_bot.scheduler)
+    mock_bot.scheduler.start.assert_called_once_with()
+    mock_bot.BotManager.delegate_scheduler.assert_not_called()
+
+
+def test_scheduler_is_started_by_elected_worker(mock_bot, load_app, tmp_path):
+    mock_bot.Config.server.scheduler_leader_election = True
+    mock_bot.Config.server.scheduler_lock_file = str(tmp_path / "scheduler.lock")
+    mock_bot.get_redis_client.return_value = None
+
+    app_module = load_app()
+
+    mock_bot.BotManager.register_jobs_to_scheduler.assert_called_once_with(mock_bot.scheduler)
+    mock_bot.scheduler.start.assert_called_once_with()
+    assert app_module.scheduler_leader.is_leader
+    metrics = app_module.app.test_client().get("/metrics").get_json()
+    assert metrics["scheduler_leader"]["lock"] == "FileLeaderLock"
+
+
+def test_scheduler_is_not_started_by_other_workers(mock_bot, load_app, tmp_path):
+    from scheduler_leader import FileLeaderLock
+
+    lock_path = str(tmp_path / "scheduler.lock")
+    mock_bot.Config.server.scheduler_leader_election = True
+    mock_bot.Config.server.scheduler_lock_file = lock_path
+    mock_bot.get_redis_client.return_value = None
+    leader_lock = FileLeaderLock(lock_path)
+    assert leader_lock.acquire()
+
+    try:
+        app_module = load_app()
+
+        assert not app_module.scheduler_leader.is_leader
+        mock_bot.scheduler.start.assert_not_called()
+        mock_bot.BotManager.register_jobs_to_scheduler.assert_not_called()
+        mock_bot.BotManager.delegate_scheduler.assert_called_once_with()
+    finally:
+        leader_lock.release()
+
+    app_module.scheduler_leader.step()
+
+    assert app_module.scheduler_leader.is_leader
+    mock_bot.scheduler.start.assert_called_once_with()
+    mock_bot.BotManager.register_jobs_to_scheduler.assert_called_once_with(mock_bot.scheduler)
+
+
+def test_scheduler_is_resumed_on_reelection(mock_bot, load_app, tmp_path):
+    mock_bot.Config.server.scheduler_leader_election = True
+    mock_bot.Config.server.scheduler_lock_file = str(tmp_path / "scheduler.lock")
+    mock_bot.get_redis_client.return_value = None
+    app_module = load_app()
+    mock_bot.scheduler.running = True
+
+    app_module.scheduler_leader.lock.release()
+    app_module.scheduler_leader.step()
+    mock_bot.scheduler.pause.assert_called_once_with()
+
+    app_module.scheduler_leader.step()
+    mock_bot.scheduler.resume.assert_called_once_with()
+    mock_bot.scheduler.start.assert_called_once_with()
+    mock_bot.BotManager.register_jobs_to_scheduler.assert_called_once_with(mock_bot.scheduler)
+
+
+def test_ready_reports_warm_up(mock_bot, load_app):
+    client = load_app().app.test_client()
+    assert client.get("/ready").status_code == 200
+
+    mock_bot.BotManager.is_ready.return_value = False
+    mock_bot.BotManager.warm_up_status.return_value = {
+        "BotPostReport": {"state": "running", "progress": {"pages_fetched": 1}, "error": None, "duration": None},
+    }
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.get_json()["actions"]["BotPostReport"]["progress"] == {"pages_fetched": 1}
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fluent_discourse import DiscourseError, PageNotFoundError, RateLimitError
+
+
+class StandInDiscourse(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        self.server.requests.append({
+            "method": self.command,
+            "path": self.path,
+            "headers": dict(self.headers),
+            "body": body,
+        })
+        status, payload = self.server.responses.get(
+            (self.command, self.path.split("?")[0]), (404, {}))
+        response = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+
+@pytest.fixture
+def discourse_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInDiscourse)
+    server.requests = []
+    server.responses = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def auto_patch(patch_bot_config):
+    yield
+
+
+def create_api(server, **kwargs):
+    from backend.async_discourse_api import AsyncBotAPI
+    return AsyncBotAPI(f"http://127.0.0.1:{server.server_port}/", "bot1", "API_KEY", **kwargs)
+
+
+def run(coro):
+    from backend.utils.async_runner import async_runner
+    return async_runner.run(coro, timeout=10)
+
+
+def test_get_topic_by_id(discourse_server):
+    discourse_server.responses[("GET", "/t/42.json")] = (200, {"id": 42, "title": "hello"})
+    api = create_api(discourse_server)
+
+    assert run(api.get_topic_by_id(42)) == {"id": 42, "title": "hello"}
+    request = discourse_server.requests[0]
+    assert request["headers"]["Api-Key"] == "API_KEY"
+    assert request["headers"]["Api-Username"] == "bot1"
+
+
+def test_create_post(discourse_server):
+    discourse_server.responses[("POST", "/posts.json")] = (200, {"id": 1})
+    api = create_api(discourse_server)
+
+    assert run(api.create_post("content", 42, 3, skip_validations=True)) == {"id": 1}
+    assert json.loads(discourse_server.requests[0]["body"]) == {
+        "raw": "content",
+        "topic_id": 42,
+        "reply_to_post_number": 3,
+        "skip_validations": True,
+    }
+
+
+def test_update_topic_status(discourse_server):
+    discourse_server.responses[("PUT", "/t/42/status")] = (200, {"success": "OK"})
+    api = create_api(discourse_server)
+
+    run(api.archive_topic(42))
+    assert json.loads(discourse_server.requests[0]["body"]) == {"status": "archived", "enabled": "true"}
+
+
+def test_create_upload(discourse_server):
+    discourse_server.responses[("POST", "/uploads.json")] = (200, {"short_url": "upload://a.png"})
+    api = create_api(discourse_server)
+
+    assert run(api.create_upload(b"png-data", "a.png")) == {"short_url": "upload://a.png"}
+    request = discourse_server.requests[0]
+    assert request["path"] == "/uploads.json?upload_type=composer"
+    assert request["headers"]["Content-Type"].startswith("multipart/form-data")
+    assert b"png-data" in request["body"]
+
+
+def test_create_upload_rewinds_the_file_on_retry(discourse_server, monkeypatch):
+    import io
+    import backend.async_discourse_api as async_discourse_api
+    discourse_server.responses[("POST", "/uploads.json")] = (200, {"short_url": "upload://a.png"})
+    api = create_api(discourse_server)
+
+    async def retried_call(account, method, url, send):
+        # the rate limiter sends the request again after a 429
+        await send()
+        return await send()
+
+    monkeypatch.setattr(async_discourse_api, "rate_limited_call_async", retried_call)
+    file = io.BytesIO(b"png-data")
+    assert run(api.create_upload(file, "a.png")) == {"short_url": "upload://a.png"}
+    assert len(discourse_server.requests) == 2
+    for request in discourse_server.requests:
+        assert b"\r\n\r\npng-data\r\n" in request["body"]
+
+
+def test_concurrent_requests_share_one_thread(discourse_server):
+    discourse_server.responses.update({
+        ("GET", f"/posts/{i}.json"): (200, {"id": i}) for i in range(20)
+    })
+    api = create_api(discourse_server)
+
+    async def fetch_all():
+        return await asyncio.gather(*(api.get_post_by_id(i) for i in range(20)))
+
+    assert [post["id"] for post in run(fetch_all())] == list(range(20))
+
+
+def test_errors(discourse_server):
+    discourse_server.responses[("GET", "/t/1.json")] = (429, {"extras": {"wait_seconds": 0}})
+    discourse_server.responses[("GET", "/t/2.json")] = (500, {})
+    api = create_api(discourse_server)
+
+    with pytest.raises(RateLimitError):
+        run(api.get_topic_by_id(1))
+    with pytest.raises(DiscourseError, match="500"):
+        run(api.get_topic_by_id(2))
+    with pytest.raises(PageNotFoundError):
+        run(api.get_topic_by_id(3))
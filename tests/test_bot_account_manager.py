@@ -1,5 +1,7 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
+from fluent_discourse import RateLimitError
 
 @pytest.fixture
 def mock_config():
@@ -11,6 +13,7 @@ def mock_config():
         MagicMock(id=2, username="bot2", api_key="API_KEY_2",
                   writable=True, default=False)
     ]
+    mock_config.account_selection = "default"
     yield mock_config
 
 @pytest.fixture(autouse=True)
@@ -59,4 +62,155 @@ def test_no_default_bot_account_configured(mock_config):
     from backend.bot_account_manager import account_manager
     from backend.discourse_api import BotAPI
     assert type(account_manager.default_bot_client) is BotAPI
-    assert account_manager.default_bot_client.username == "bot1"
\ No newline at end of file
+    assert account_manager.default_bot_client.username == "bot1"
+
+def test_async_bot_clients():
+    from backend.bot_account_manager import account_manager
+    from backend.async_discourse_api import AsyncBotAPI
+    assert [client.username for client in account_manager.async_bot_clients] == ["bot1", "bot2"]
+    assert type(account_manager.default_async_bot_client) is AsyncBotAPI
+    assert account_manager.default_async_bot_client.username == "bot1"
+    assert account_manager.get_async_bot_client("bot2").username == "bot2"
+    with pytest.raises(ValueError):
+        account_manager.get_async_bot_client("nonexistent_bot")
+
+
+def test_default_account_selection():
+    from backend.bot_account_manager import account_manager
+    assert account_manager.writable_usernames == ["bot1", "bot2"]
+    assert account_manager.order_writable_accounts() == ["bot1", "bot2"]
+    assert account_manager.order_writable_accounts() == ["bot1", "bot2"]
+
+
+def test_round_robin_account_selection(mock_config):
+    mock_config.account_selection = "round_robin"
+    from backend.bot_account_manager import account_manager
+    assert account_manager.order_writable_accounts() == ["bot1", "bot2"]
+    assert account_manager.order_writable_accounts() == ["bot2", "bot1"]
+    assert account_manager.order_writable_accounts() == ["bot1", "bot2"]
+
+
+def test_least_recently_rate_limited_account_selection(mock_config):
+    mock_config.account_selection = "least_recently_rate_limited"
+    from backend.bot_account_manager import account_manager
+    account_manager.mark_rate_limited("bot1")
+    assert account_manager.order_writable_accounts() == ["bot2", "bot1"]
+    assert account_manager.order_writable_accounts() == ["bot2", "bot1"]
+    account_manager.mark_rate_limited("bot2")
+    assert account_manager.order_writable_accounts() == ["bot1", "bot2"]
+
+
+def test_least_recently_rate_limited_after_cooldown(mock_config):
+    mock_config.account_selection = "least_recently_rate_limited"
+    from backend.bot_account_manager import account_manager
+    account_manager.mark_rate_limited("bot1")
+    account_manager._rate_limited_at["bot1"] -= account_manager.rate_limit_cooldown + 1
+    assert not account_manager.is_rate_limited("bot1")
+    # back to the round robin once the cooldown has expired
+    orders = [account_manager.order_writable_accounts() for _ in range(4)]
+    assert sorted(order[0] for order in orders) == ["bot1", "bot1", "bot2", "bot2"]
+
+
+def test_default_account_selection_falls_back_while_rate_limited():
+    from backend.bot_account_manager import account_manager
+    account_manager.mark_rate_limited("bot1")
+    assert account_manager.order_writable_accounts() == ["bot2", "bot1"]
+
+
+@pytest.mark.parametrize("strategy", ["round_robin", "least_recently_rate_limited"])
+def test_account_selection_skips_accounts_backing_off(mock_config, monkeypatch, strategy):
+    mock_config.account_selection = strategy
+    from backend.utils.ratelimiter import RateLimiter
+    import backend.bot_account_manager as bot_account_manager
+    rate_limiter = RateLimiter({"default": (1, 10)}, max_retry_wait=60)
+    monkeypatch.setattr(bot_account_manager, "get_rate_limiter", lambda: rate_limiter)
+    account_manager = bot_account_manager.account_manager
+    # the cooldown of the manager is over, Discourse asked to wait longer
+    account_manager.mark_rate_limited("bot1")
+    account_manager._rate_limited_at["bot1"] -= account_manager.rate_limit_cooldown + 1
+    rate_limiter.backoff("bot1", "post", 600)
+
+    assert account_manager.is_rate_limited("bot1")
+    assert not account_manager.is_rate_limited("bot2")
+    orders = [account_manager.order_writable_accounts() for _ in range(4)]
+    assert orders == [["bot2", "bot1"]] * 4
+
+
+def test_unknown_account_selection(mock_config, caplog):
+    mock_config.account_selection = "random"
+    from backend.bot_account_manager import account_manager, DefaultAccountStrategy
+    assert type(account_manager.selection_strategy) is DefaultAccountStrategy
+    assert "Unknown account selection strategy random" in caplog.text
+
+
+def test_only_writable_accounts_are_used(mock_config):
+    mock_config.bot_accounts[0].writable = False
+    from backend.bot_account_manager import account_manager
+    assert account_manager.writable_usernames == ["bot2"]
+
+
+def test_writer_client_falls_back_on_rate_limit():
+    from backend.bot_account_manager import account_manager
+    bot1 = account_manager.get_bot_client("bot1")
+    bot2 = account_manager.get_bot_client("bot2")
+    bot1.create_post = MagicMock(side_effect=RateLimitError("Rate limit hit"))
+    bot2.create_post = MagicMock(return_value={"id": 1})
+
+    assert account_manager.writer_client.create_post("content", 42) == {"id": 1}
+    bot2.create_post.assert_called_once_with("content", 42)
+    assert account_manager.is_rate_limited("bot1")
+    assert not account_manager.is_rate_limited("bot2")
+
+    bot2.create_post.side_effect = RateLimitError("Rate limit hit")
+    with pytest.raises(RateLimitError):
+        account_manager.writer_client.create_post("content", 42)
+    with pytest.raises(AttributeError):
+        _ = account_manager.writer_client.not_an_api_method
+
+
+def test_async_writer_client_falls_back_on_rate_limit():
+    from backend.bot_account_manager import account_manager
+    account_manager.get_async_bot_client("bot1").create_post = AsyncMock(
+        side_effect=RateLimitError("Rate limit hit"))
+    account_manager.get_async_bot_client("bot2").create_post = AsyncMock(return_value={"id": 1})
+
+    result = asyncio.run(account_manager.async_writer_client.create_post("content", 42))
+    assert result == {"id": 1}
+    assert account_manager.is_rate_limited("bot1")
+
+
+def test_multi_step_helper_retries_single_requests():
+    from backend.bot_account_manager import account_manager
+    bot1 = account_manager.get_bot_client("bot1")
+    bot2 = account_manager.get_bot_client("bot2")
+    for bot in (bot1, bot2):
+        bot.get_topic_by_id = MagicMock(return_value={"tags": [], "category_id": 3, "title": "Old"})
+        bot.close_topic = MagicMock()
+        bot.update_post_wiki = MagicMock()
+    bot1.create_topic = MagicMock(side_effect=RateLimitError("Rate limit hit"))
+    bot2.create_topic = MagicMock(return_value={"id": 7})
+
+    assert account_manager.writer_client.close_topic_and_create_new(1, "New", "raw") == {"id": 7}
+    # the old topic is closed once, only the rate limited request is retried
+    assert bot1.close_topic.call_count + bot2.close_topic.call_count == 1
+    assert bot1.get_topic_by_id.call_count + bot2.get_topic_by_id.call_count == 1
+    bot2.create_topic.assert_called_once_with("New", "raw", 3, [])
+    assert [call.args for call in bot1.update_post_wiki.call_args_list + bot2.update_post_wiki.call_args_list] \
+        == [(7, True)]
+
+
+def test_async_multi_step_helper_retries_single_requests():
+    from backend.bot_account_manager import account_manager
+    bot1 = account_manager.get_async_bot_client("bot1")
+    bot2 = account_manager.get_async_bot_client("bot2")
+    for bot in (bot1, bot2):
+        bot.get_topic_by_id = AsyncMock(return_value={"tags": [], "category_id": 3, "title": "Old"})
+        bot.close_topic = AsyncMock()
+        bot.update_post_wiki = AsyncMock()
+    bot1.create_topic = AsyncMock(side_effect=RateLimitError("Rate limit hit"))
+    bot2.create_topic = AsyncMock(return_value={"id": 7})
+
+    result = asyncio.run(account_manager.async_writer_client.close_topic_and_create_new(1, "New", "raw"))
+    assert result == {"id": 7}
+    assert bot1.close_topic.await_count + bot2.close_topic.await_count == 1
+    assert bot1.update_post_wiki.await_count + bot2.update_post_wiki.await_count == 1
@@ -34,6 +34,14 @@ def mock_bot_action_class(patch_bot_config):
             return "Scheduled job"
     return TestBotAction
 
+def make_mock_action(events=("post_created", "topic_created"), enabled=True, priority=0, concurrent=False):
+    mock_action = MagicMock()
+    mock_action.enabled = enabled
+    mock_action.priority = priority
+    mock_action.concurrent = concurrent
+    mock_action._events_listeners = dict.fromkeys(events)
+    return mock_action
+
 @pytest.fixture(autouse=True)
 def mock_plugins():
     mock_plugins = create_autospec('backend.plugins')
@@ -45,9 +53,8 @@ def test_trigger_event_post_created(patch_bot_config, test_data, mock_activated_
     from backend.event_context import EventContext
     from backend.bot_manager import bot_manager as BotManager
     from backend.model import Post
-    mock_action = MagicMock()
-    mock_action.enabled = True
-    mock_activated_actions['test_action'] = mock_action
+    mock_action = make_mock_action()
+    BotManager.activate_action('test_action', mock_action)
 
     BotManager.trigger_event('post_created', test_data)
 
@@ -86,7 +93,7 @@ def test_trigger_event_passes_event_context_to_supported_handler(patch_bot_confi
     raw_body = b'{"post":{"id":3859}}'
     event_headers = {"X-Discourse-Event": "post_created"}
     action = TestBotAction()
-    mock_activated_actions['test_action'] = action
+    BotManager.activate_action('test_action', action)
 
     result = BotManager.trigger_event(
         'post_created',
@@ -116,7 +123,7 @@ def test_trigger_event_filters_event_context_for_legacy_handler(patch_bot_config
             return f"Handled post with id {post.id}"
 
     action = TestBotAction()
-    mock_activated_actions['test_action'] = action
+    BotManager.activate_action('test_action', action)
 
     result = BotManager.trigger_event(
         'post_created',
@@ -130,9 +137,8 @@ def test_trigger_event_filters_event_context_for_legacy_handler(patch_bot_config
 def test_trigger_event_topic_created(patch_bot_config, test_data, mock_activated_actions):
     from backend.bot_manager import bot_manager as BotManager
     from backend.model import Topic
-    mock_action = MagicMock()
-    mock_action.enabled = True
-    mock_activated_actions['test_action'] = mock_action
+    mock_action = make_mock_action()
+    BotManager.activate_action('test_action', mock_action)
 
     BotManager.trigger_event('topic_created', test_data)
 
@@ -144,9 +150,8 @@ def test_trigger_event_topic_created(patch_bot_config, test_data, mock_activated
 
 def test_trigger_event_action_disabled(patch_bot_config, test_data, mock_activated_actions):
     from backend.bot_manager import bot_manager as BotManager
-    mock_action = MagicMock()
-    mock_action.enabled = False
-    mock_activated_actions['test_action'] = mock_action
+    mock_action = make_mock_action(enabled=False)
+    BotManager.activate_action('test_action', mock_action)
 
     BotManager.trigger_event('post_created', test_data)
 
@@ -154,10 +159,9 @@ def test_trigger_event_action_disabled(patch_bot_config, test_data, mock_activat
 
 def test_trigger_event_exception_handling(patch_bot_config, test_data, mock_activated_actions):
     from backend.bot_manager import bot_manager as BotManager
-    mock_action = MagicMock()
-    mock_action.enabled = True
+    mock_action = make_mock_action()
     mock_action.trigger.side_effect = Exception("Test Exception")
-    mock_activated_actions['test_action'] = mock_action
+    BotManager.activate_action('test_action', mock_action)
 
     with patch('backend.bot_manager.logging.error') as mock_logging_error:
         BotManager.trigger_event('post_created', test_data)
@@ -166,9 +170,8 @@ def test_trigger_event_exception_handling(patch_bot_config, test_data, mock_acti
 
 def test_limited_mode(patch_bot_config, test_data, mock_activated_actions):
     from backend.bot_manager import bot_manager as BotManager
-    mock_action = MagicMock()
-    mock_action.enabled = True
-    mock_activated_actions['test_action'] = mock_action
+    mock_action = make_mock_action()
+    BotManager.activate_action('test_action', mock_action)
     patch_bot_config.limited_mode = True
     patch_bot_config.limited_usernames = ['test_user']
 
@@ -190,17 +193,75 @@ def test_warn_when_same_action_registered_twice(mock_bot_action_class, caplog):
 
 def test_register_scheduled_jobs(patch_bot_config, mock_bot_action_class):
     from backend.bot_manager import bot_manager as BotManager
+    from backend.scheduled_jobs import run_scheduled_job
     patch_bot_config.action_custom_config["TestBotAction"] = {"enabled": True}
     BotManager.register_bot_action(mock_bot_action_class)
     scheduler = MagicMock()
-    scheduler.add_job = MagicMock()
+    scheduler.get_job.return_value = None
+    scheduler.get_jobs.return_value = [MagicMock(id="my_job_id"), MagicMock(id="removed_job_id")]
     BotManager.register_jobs_to_scheduler(scheduler)
-    scheduler.add_job.call_count == 1
+    assert scheduler.add_job.call_count == 1
     call_args = scheduler.add_job.call_args
-    assert call_args[0][0].func == mock_bot_action_class.scheduled_job.func
+    assert call_args[0][0] is run_scheduled_job
     assert call_args[0][1] == 'interval'
     assert call_args[1]['id'] == 'my_job_id'
+    assert call_args[1]['args'] == ('my_job_id', 'TestBotAction', 'scheduled_job')
     assert call_args[1]['minutes'] == 2
+    assert call_args[1]['replace_existing'] is True
+    scheduler.remove_job.assert_called_once_with("removed_job_id")
+
+def test_scheduled_jobs_keep_stored_run_time(patch_bot_config, tmp_path):
+    import datetime
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+    from backend.bot_action import BotAction, scheduled
+    from backend.bot_manager import bot_manager as BotManager
+    patch_bot_config.action_custom_config["ScheduledAction"] = {"enabled": True}
+    patch_bot_config.scheduler.jitter = 10
+    patch_bot_config.scheduler.startup_jitter = 60
+    start_at = datetime.datetime.now() + datetime.timedelta(hours=1)
+
+    class ScheduledAction(BotAction):
+        action_name = "ScheduledAction"
+
+        @scheduled('interval', minutes=5, next_run_time=start_at)
+        def run(self):
+            return "run"
+
+    BotManager.register_bot_action(ScheduledAction)
+    db_url = f"sqlite:///{tmp_path / 'jobs.sqlite'}"
+
+    def restart():
+        scheduler = BackgroundScheduler(jobstores={"default": SQLAlchemyJobStore(url=db_url)})
+        scheduler.start(paused=True)
+        BotManager.register_jobs_to_scheduler(scheduler)
+        job = scheduler.get_job("ScheduledAction.run")
+        scheduler.shutdown(wait=False)
+        return job
+
+    job = restart()
+    assert job.max_instances == 1
+    assert job.trigger.jitter == 10
+    next_run_time = job.next_run_time.replace(tzinfo=None)
+    assert start_at <= next_run_time <= start_at + datetime.timedelta(seconds=60)
+    assert restart().next_run_time == job.next_run_time
+
+def test_run_scheduled_job_records_metrics(patch_bot_config, mock_bot_action_class):
+    from apscheduler.events import EVENT_JOB_MAX_INSTANCES
+    from backend.bot_manager import bot_manager as BotManager
+    from backend.scheduled_jobs import job_metrics, run_scheduled_job
+    patch_bot_config.action_custom_config["TestBotAction"] = {"enabled": True}
+    BotManager.register_bot_action(mock_bot_action_class)
+    assert run_scheduled_job("my_job_id", "TestBotAction", "scheduled_job") == "Scheduled job"
+    assert run_scheduled_job("missing_job_id", "MissingAction", "scheduled_job") is None
+    job_metrics.listen(MagicMock(job_id="my_job_id", code=EVENT_JOB_MAX_INSTANCES))
+    metrics = BotManager.scheduled_job_metrics()
+    assert metrics["my_job_id"]["runs"] == 1
+    assert metrics["my_job_id"]["failures"] == 0
+    assert metrics["my_job_id"]["last_duration"] >= 0
+    assert metrics["my_job_id"]["overruns"] == 1
+    assert metrics["my_job_id"]["misfires"] == 0
+    assert "missing_job_id" not in metrics
 
 def test_warn_when_not_registered_to_scheduler(patch_bot_config, mock_bot_action_class, test_data, caplog):
     from backend.bot_manager import bot_manager as BotManager
@@ -208,3 +269,377 @@ def test_warn_when_not_registered_to_scheduler(patch_bot_config, mock_bot_action
     BotManager.register_bot_action(mock_bot_action_class)
     BotManager.trigger_event('post_created', test_data)
     assert "There are schedules that are not registered, please make sure you have registered the scheduler." in caplog.text
+
+
+def test_no_warning_when_scheduler_is_delegated(patch_bot_config, mock_bot_action_class, test_data, caplog):
+    from backend.bot_manager import bot_manager as BotManager
+    patch_bot_config.action_custom_config["TestBotAction"] = {"enabled": True}
+    BotManager.register_bot_action(mock_bot_action_class)
+    BotManager.delegate_scheduler()
+    BotManager.trigger_event('post_created', test_data)
+    assert "There are schedules that are not registered" not in caplog.text
+
+
+def test_trigger_event_only_dispatches_interested_actions(patch_bot_config, test_data, mock_activated_actions):
+    from backend.bot_manager import bot_manager as BotManager
+    post_action = make_mock_action(events=("post_created",))
+    topic_action = make_mock_action(events=("topic_created",))
+    BotManager.activate_action('post_action', post_action)
+    BotManager.activate_action('topic_action', topic_action)
+
+    BotManager.trigger_event('topic_created', test_data)
+
+    post_action.trigger.assert_not_called()
+    topic_action.trigger.assert_called_once()
+
+def test_trigger_event_without_handlers_skips_parsing(patch_bot_config, mock_activated_actions):
+    from backend.bot_manager import bot_manager as BotManager
+    BotManager.activate_action('topic_action', make_mock_action(events=("topic_created",)))
+
+    # the payload is not a valid post, but no action listens to post_created
+    assert BotManager.trigger_event('post_created', {'post': {}}) == []
+
+def test_trigger_event_respects_priority(patch_bot_config, test_data, mock_activated_actions):
+    from backend.bot_manager import bot_manager as BotManager
+    from backend.bot_action import ActionResult
+    low = make_mock_action(priority=-1)
+    low.trigger.return_value = "low"
+    default = make_mock_action()
+    default.trigger.return_value = "default"
+    high = make_mock_action(priority=10)
+    high.trigger.return_value = "high"
+    BotManager.activate_action('low', low)
+    BotManager.activate_action('default', default)
+    BotManager.activate_action('high', high)
+
+    assert [name for name, _ in BotManager.get_event_handlers('post_created')] == ['high', 'default', 'low']
+    assert BotManager.trigger_event('post_created', test_data) == ["high", "default", "low"]
+
+    high.trigger.return_value = ActionResult(
+        action_name="high", message="stop", stop_propagation=True)
+    assert BotManager.trigger_event('post_created', test_data) == ["stop"]
+    default.trigger.assert_called_once()
+
+def test_priority_from_config(patch_bot_config, mock_bot_action_class):
+    from backend.bot_manager import bot_manager as BotManager
+    patch_bot_config.action_custom_config["TestBotAction"] = {"enabled": True, "priority": 5}
+    BotManager.register_bot_action(mock_bot_action_class)
+    (action_name, action), = BotManager.get_event_handlers('post_created')
+    assert action_name == "TestBotAction"
+    assert action.priority == 5
+
+def test_concurrent_dispatch_runs_concurrent_actions_together(patch_bot_config, test_data, mock_activated_actions):
+    import threading
+    from backend.bot_manager import bot_manager as BotManager
+    patch_bot_config.concurrent_dispatch = True
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_for_each_other(name):
+        def _trigger(*args, **kwargs):
+            # fails with BrokenBarrierError if the actions run one after another
+            barrier.wait()
+            return name
+        return _trigger
+
+    first = make_mock_action(concurrent=True)
+    first.trigger.side_effect = wait_for_each_other("first")
+    second = make_mock_action(concurrent=True)
+    second.trigger.side_effect = wait_for_each_other("second")
+    BotManager.activate_action('first', first)
+    BotManager.activate_action('second', second)
+
+    assert BotManager.trigger_event('post_created', test_data) == ["first", "second"]
+
+def test_concurrent_dispatch_respects_ordered_actions(patch_bot_config, test_data, mock_activated_actions):
+    from backend.bot_manager import bot_manager as BotManager
+    from backend.bot_action import ActionResult
+    patch_bot_config.concurrent_dispatch = True
+    calls = []
+
+    def record(name, result=None):
+        def _trigger(*args, **kwargs):
+            calls.append(name)
+            return result if result is not None else name
+        return _trigger
+
+    before = make_mock_action(priority=2, concurrent=True)
+    before.trigger.side_effect = record("before")
+    ordered = make_mock_action(priority=1)
+    ordered.trigger.side_effect = record("ordered", ActionResult(
+        action_name="ordered", message="ordered", stop_propagation=True))
+    after = make_mock_action(concurrent=True)
+    after.trigger.side_effect = record("after")
+    BotManager.activate_action('after', after)
+    BotManager.activate_action('ordered', ordered)
+    BotManager.activate_action('before', before)
+
+    assert BotManager.trigger_event('post_created', test_data) == ["before", "ordered"]
+    assert calls == ["before", "ordered"]
+    after.trigger.assert_not_called()
+
+def test_concurrent_dispatch_exception_handling(patch_bot_config, test_data, mock_activated_actions):
+    from backend.bot_manager import bot_manager as BotManager
+    patch_bot_config.concurrent_dispatch = True
+    failing = make_mock_action(concurrent=True)
+    failing.trigger.side_effect = Exception("Test Exception")
+    working = make_mock_action(concurrent=True)
+    working.trigger.return_value = "ok"
+    BotManager.activate_action('failing', failing)
+    BotManager.activate_action('working', working)
+
+    with patch('backend.bot_manager.logging.error') as mock_logging_error:
+        assert BotManager.trigger_event('post_created', test_data) == ["ok"]
+        mock_logging_error.assert_called_once()
+
+def test_concurrent_from_config(patch_bot_config, mock_bot_action_class):
+    patch_bot_config.action_custom_config["TestBotAction"] = {"enabled": True}
+    assert mock_bot_action_class().concurrent is False
+    patch_bot_config.action_custom_config["TestBotAction"]["concurrent"] = True
+    assert mock_bot_action_class().concurrent is True
+
+def test_trigger_event_awaits_async_handler(patch_bot_config, test_data, mock_activated_actions):
+    import asyncio
+    from backend.bot_action import BotAction, on
+    from backend.bot_manager import bot_manager as BotManager
+    patch_bot_config.action_custom_config["TestBotAction"] = {"enabled": True}
+
+    class TestBotAction(BotAction):
+        action_name = "TestBotAction"
+
+        @on("post_created")
+        async def handle_post_created(self, post):
+            await asyncio.sleep(0)
+            return f"Handled post with id {post.id}"
+
+    BotManager.activate_action('test_action', TestBotAction())
+
+    assert BotManager.trigger_event('post_created', test_data) == [f"Handled post with id {test_data['post']['id']}"]
+
+def test_async_handler_exception_handling(patch_bot_config, test_data, mock_activated_actions):
+    from backend.bot_action import BotAction, on
+    from backend.bot_manager import bot_manager as BotManager
+    patch_bot_config.action_custom_config["TestBotAction"] = {"enabled": True}
+
+    class TestBotAction(BotAction):
+        action_name = "TestBotAction"
+
+        @on("post_created")
+        async def handle_post_created(self, post):
+            raise Exception("Test Exception")
+
+    BotManager.activate_action('test_action', TestBotAction())
+
+    with patch('backend.bot_manager.logging.error') as mock_logging_error:
+        assert BotManager.trigger_event('post_created', test_data) == []
+        mock_logging_error.assert_called_once()
+
+def test_trigger_event_does_not_wait_for_async_handlers(patch_bot_config, test_data, mock_activated_actions):
+    import asyncio
+    from backend.bot_action import BotAction, on
+    from backend.bot_manager import bot_manager as BotManager
+    from backend.utils.async_runner import async_runner
+    patch_bot_config.action_custom_config["TestBotAction"] = {"enabled": True}
+    started = []
+
+    class TestBotAction(BotAction):
+        action_name = "TestBotAction"
+
+        @on("post_created")
+        async def handle_post_created(self, post):
+            started.append(post.id)
+            await release.wait()
+            return post.id
+
+    release = asyncio.run_coroutine_threadsafe(_make_event(), async_runner.loop).result()
+    BotManager.activate_action('test_action', TestBotAction())
+
+    # many events are in flight without a thread each
+    futures = [BotManager.trigger_event('post_created', test_data, wait=False) for _ in range(20)]
+    assert not any(future.done() for future in futures)
+    async_runner.loop.call_soon_threadsafe(release.set)
+    assert [future.result(5) for future in futures] == [[test_data['post']['id']]] * 20
+    assert len(started) == 20
+
+async def _make_event():
+    import asyncio
+    return asyncio.Event()
+
+def test_async_dispatch_keeps_the_order(patch_bot_config, test_data, mock_activated_actions):
+    from backend.bot_action import ActionResult, BotAction, on
+    from backend.bot_manager import bot_manager as BotManager
+    patch_bot_config.action_custom_config["AsyncAction"] = {"enabled": True, "priority": 2}
+    patch_bot_config.action_custom_config["SyncAction"] = {"enabled": True, "priority": 1}
+    patch_bot_config.action_custom_config["LastAction"] = {"enabled": True, "priority": 0}
+
+    class AsyncAction(BotAction):
+        action_name = "AsyncAction"
+
+        @on("post_created")
+        async def handle_post_created(self):
+            return "async"
+
+    class SyncAction(BotAction):
+        action_name = "SyncAction"
+
+        @on("post_created")
+        def handle_post_created(self):
+            return ActionResult(action_name=self.action_name, message="sync", stop_propagation=True)
+
+    class LastAction(BotAction):
+        action_name = "LastAction"
+
+        @on("post_created")
+        def handle_post_created(self):
+            return "last"
+
+    BotManager.activate_action('last', LastAction())
+    BotManager.activate_action('sync', SyncAction())
+    BotManager.activate_action('async', AsyncAction())
+
+    assert BotManager.trigger_event('post_created', test_data) == ["async", "sync"]
+
+def test_trigger_event_decodes_raw_body(patch_bot_config, test_data, mock_activated_actions):
+    from backend.bot_manager import bot_manager as BotManager
+    mock_action = make_mock_action()
+    BotManager.activate_action('test_action', mock_action)
+
+    BotManager.trigger_event('post_created', raw_body=json.dumps(test_data).encode())
+
+    kwargs = mock_action.trigger.call_args.kwargs
+    assert kwargs['post'].id == test_data['post']['id']
+    assert kwargs['event_context'].raw_data == test_data
+
+def test_trigger_event_skips_unused_models(patch_bot_config, test_data, mock_activated_actions):
+    from backend.bot_action import BotAction, on
+    from backend.bot_manager import bot_manager as BotManager
+    patch_bot_config.action_custom_config["TestBotAction"] = {"enabled": True}
+
+    class TestBotAction(BotAction):
+        action_name = "TestBotAction"
+
+        @on("post_created")
+        @on("topic_created")
+        def handle(self, event_context):
+            return event_context.is_parsed
+
+    BotManager.activate_action('test_action', TestBotAction())
+
+    assert BotManager.trigger_event('post_created', raw_body=json.dumps(test_data).encode()) == [False]
+    assert BotManager.trigger_event('topic_created', raw_body=json.dumps(test_data).encode()) == [False]
+
+def test_trigger_event_trusted_payload(patch_bot_config, test_data, mock_activated_actions):
+    from backend.bot_manager import bot_manager as BotManager
+    from backend.model import Post, TrustedPost
+    mock_action = make_mock_action()
+    BotManager.activate_action('test_action', mock_action)
+
+    BotManager.trigger_event('post_created', test_data, trusted=True)
+    post = mock_action.trigger.call_args.kwargs['post']
+    assert isinstance(post, TrustedPost)
+    assert post.id == test_data['post']['id']
+
+    BotManager.trigger_event('post_created', test_data)
+    assert isinstance(mock_action.trigger.call_args.kwargs['post'], Post)
+
+def test_trigger_event_with_declared_filters(patch_bot_config, test_data, mock_activated_actions):
+    from backend.bot_action import BotAction, on
+    from backend.bot_manager import bot_manager as BotManager
+    patch_bot_config.action_custom_config["KeywordAction"] = {"enabled": True}
+    patch_bot_config.action_custom_config["TopicAction"] = {"enabled": True}
+
+    class KeywordAction(BotAction):
+        action_name = "KeywordAction"
+        keyword = "投掷"
+
+        @on("post_created", keywords=lambda action: [action.keyword], exclude_bots=True)
+        def handle(self, post):
+            return "keyword"
+
+    class TopicAction(BotAction):
+        action_name = "TopicAction"
+
+        @on("post_created", topic_ids=[test_data['post']['topic_id']])
+        def handle(self, post):
+            return "topic"
+
+    BotManager.activate_action('keyword', KeywordAction())
+    BotManager.activate_action('topic', TopicAction())
+
+    def post_data(**kwargs):
+        return {"post": {**test_data['post'], **kwargs}}
+
+    assert BotManager.trigger_event('post_created', post_data(raw="hello")) == ["topic"]
+    assert BotManager.trigger_event('post_created', post_data(raw="投掷 1d6")) == ["keyword", "topic"]
+    assert BotManager.trigger_event('post_created', post_data(raw="投掷 1d6", topic_id=1)) == ["keyword"]
+    bot_username = patch_bot_config.bot_accounts[0].username
+    assert BotManager.trigger_event('post_created', post_data(raw="投掷", topic_id=1, username=bot_username)) == []
+
+def test_actions_join_dispatch_after_warm_up(patch_bot_config, test_data):
+    import threading
+    from backend.bot_action import BotAction, on
+    from backend.bot_manager import bot_manager as BotManager
+    patch_bot_config.action_custom_config["WarmAction"] = {"enabled": True}
+    patch_bot_config.action_custom_config["ColdAction"] = {"enabled": True}
+    loaded = threading.Event()
+
+    class WarmAction(BotAction):
+        action_name = "WarmAction"
+
+        def warm_up(self):
+            self.warm_up_status.update(pages_fetched=1)
+            loaded.wait(5)
+
+        @on("post_created")
+        def handle(self, post):
+            return "warm"
+
+    class ColdAction(BotAction):
+        action_name = "ColdAction"
+
+        @on("post_created")
+        def handle(self, post):
+            return "cold"
+
+    warm_action = WarmAction()
+    BotManager.activate_action('warm', warm_action)
+    BotManager.activate_action('cold', ColdAction())
+    BotManager.start_warm_up()
+
+    assert BotManager.trigger_event('post_created', test_data) == ["cold"]
+    assert not BotManager.is_ready()
+    status = BotManager.warm_up_status()
+    assert status['warm']['state'] == "running"
+    assert status['warm']['progress'] == {"pages_fetched": 1}
+    assert status['cold']['state'] == "ready"
+
+    loaded.set()
+    for thread in threading.enumerate():
+        if thread.name == "warm-up-warm":
+            thread.join(5)
+    assert BotManager.is_ready()
+    assert BotManager.trigger_event('post_created', test_data) == ["warm", "cold"]
+
+def test_failed_warm_up_keeps_action_out_of_dispatch(patch_bot_config, test_data):
+    from backend.bot_action import BotAction, on
+    from backend.bot_manager import bot_manager as BotManager
+    patch_bot_config.action_custom_config["BrokenAction"] = {"enabled": True}
+
+    class BrokenAction(BotAction):
+        action_name = "BrokenAction"
+
+        def warm_up(self):
+            raise RuntimeError("query failed")
+
+        @on("post_created")
+        def handle(self, post):
+            return "broken"
+
+    action = BrokenAction()
+    BotManager.activate_action('broken', action)
+    action.warm_up_status.start()
+    BotManager._warm_up_action('broken', action)
+
+    assert BotManager.warm_up_status()['broken']['state'] == "failed"
+    assert "query failed" in BotManager.warm_up_status()['broken']['error']
+    assert not BotManager.is_ready()
+    assert BotManager.trigger_event('post_created', test_data) == []
@@ -0,0 +1,41 @@
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def auto_patch(patch_bot_config):
+    yield
+
+
+def test_raw_data_is_decoded_lazily():
+    from backend.event_context import EventContext
+    with patch("backend.event_context.loads", wraps=__import__("json").loads) as mock_loads:
+        event_context = EventContext(event="post_created", raw_body=b'{"post": {"id": 1}}')
+        assert not event_context.is_parsed
+        mock_loads.assert_not_called()
+
+        assert event_context.raw_data == {"post": {"id": 1}}
+        assert event_context.raw_data == {"post": {"id": 1}}
+        mock_loads.assert_called_once_with(b'{"post": {"id": 1}}')
+    assert event_context.is_parsed
+
+
+def test_raw_data_given():
+    from backend.event_context import EventContext
+    event_context = EventContext(event="ping", raw_data={"ping": "OK"}, raw_body=b"ignored")
+    assert event_context.is_parsed
+    assert event_context.raw_data == {"ping": "OK"}
+    assert event_context.event_headers == {}
+
+
+def test_empty_body():
+    from backend.event_context import EventContext
+    assert EventContext(event="ping").raw_data == {}
+
+
+def test_json_fallback():
+    from backend.utils import json_codec
+    assert json_codec.loads(b'{"a": [1, "\\u00e9"]}') == {"a": [1, "é"]}
+    with patch.object(json_codec, "orjson", None):
+        assert json_codec.loads(b'{"a": [1, "\\u00e9"]}') == {"a": [1, "é"]}
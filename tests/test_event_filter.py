@@ -0,0 +1,57 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def auto_patch(patch_bot_config):
+    yield
+
+
+def post_data(raw="hello", topic_id=1, category_id=2, username="user"):
+    return {"post": {"raw": raw, "topic_id": topic_id, "category_id": category_id, "username": username}}
+
+
+def test_create():
+    from backend.event_filter import EventFilter
+    assert EventFilter.create() is None
+    event_filter = EventFilter.create(keywords=["a"], topic_ids=[1, 2])
+    assert event_filter.keywords == ("a",)
+    assert event_filter.topic_ids == frozenset({1, 2})
+    assert event_filter.category_ids is None
+    assert EventFilter.create(exclude_bots=True).exclude_bots
+
+
+def test_resolve_keywords_from_action():
+    from backend.event_filter import EventFilter
+    event_filter = EventFilter.create(keywords=lambda action: [action.keyword])
+    action = type("Action", (), {"keyword": "report"})()
+    assert event_filter.resolve(action).keywords == ("report",)
+
+
+def test_select():
+    from backend.event_filter import CompiledEventFilters, EventFilter
+    filters = [
+        None,
+        EventFilter.create(keywords=["dice", "roll"]),
+        EventFilter.create(keywords=["report"], exclude_bots=True),
+        EventFilter.create(topic_ids=[1]),
+        EventFilter.create(category_ids=[3]),
+    ]
+    handlers = ("any", "dice", "report", "topic", "category")
+    compiled = CompiledEventFilters("post_created", filters, ["bot"])
+
+    assert compiled.select(handlers, post_data()) == ("any", "topic")
+    assert compiled.select(handlers, post_data(raw="roll a dice")) == ("any", "dice", "topic")
+    assert compiled.select(handlers, post_data(raw="my report", topic_id=5)) == ("any", "report")
+    assert compiled.select(handlers, post_data(raw="my report", username="bot")) == ("any", "topic")
+    assert compiled.select(handlers, post_data(category_id=3, topic_id=None)) == ("any", "category")
+    assert compiled.select(handlers, {}) == ("any",)
+
+
+def test_select_topic():
+    from backend.event_filter import CompiledEventFilters, EventFilter
+    filters = [EventFilter.create(keywords=["help"], topic_ids=[10], exclude_bots=True)]
+    compiled = CompiledEventFilters("topic_created", filters, ["bot"])
+    topic = {"id": 10, "title": "need help", "created_by": {"username": "user"}}
+    assert compiled.select(("handler",), {"topic": topic}) == ("handler",)
+    topic["created_by"]["username"] = "bot"
+    assert compiled.select(("handler",), {"topic": topic}) == ()
@@ -0,0 +1,130 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from event_queue import EventQueue
+
+
+def test_submit_and_process():
+    handler = MagicMock()
+    event_queue = EventQueue(handler, max_size=10, workers=2)
+    event_queue.start()
+
+    assert event_queue.submit("post_created", {"post": {}}, raw_body=b"{}")
+    event_queue.shutdown()
+
+    handler.assert_called_once_with("post_created", {"post": {}}, raw_body=b"{}")
+    metrics = event_queue.metrics()
+    assert metrics["enqueued"] == 1
+    assert metrics["processed"] == 1
+    assert metrics["failed"] == 0
+    assert metrics["depth"] == 0
+
+
+def test_reject_when_full():
+    release = threading.Event()
+    started = threading.Event()
+
+    def handler(*args, **kwargs):
+        started.set()
+        release.wait(5)
+
+    event_queue = EventQueue(handler, max_size=1, workers=1)
+    event_queue.start()
+    assert event_queue.submit("first")
+    started.wait(5)
+    # the only worker is busy, so the second job stays in the queue
+    assert event_queue.submit("second")
+    assert not event_queue.submit("third")
+
+    metrics = event_queue.metrics()
+    assert metrics["depth"] == 1
+    assert metrics["rejected"] == 1
+
+    release.set()
+    event_queue.shutdown()
+    assert event_queue.metrics()["processed"] == 2
+
+
+def test_handler_exception_is_counted(caplog):
+    handler = MagicMock(side_effect=Exception("boom"))
+    event_queue = EventQueue(handler, max_size=10, workers=1)
+    event_queue.start()
+
+    event_queue.submit("ping")
+    event_queue.submit("ping")
+    event_queue.shutdown()
+
+    metrics = event_queue.metrics()
+    assert metrics["processed"] == 2
+    assert metrics["failed"] == 2
+    assert metrics["run_seconds"]["max"] >= 0
+    assert "Error when processing queued event." in caplog.text
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        EventQueue(MagicMock(), max_size=0)
+    with pytest.raises(ValueError):
+        EventQueue(MagicMock(), workers=0)
+    with pytest.raises(ValueError):
+        EventQueue(MagicMock(), max_in_flight=0)
+
+
+def test_handler_returning_future_frees_the_worker(caplog):
+    from concurrent.futures import Future
+    futures = []
+
+    def handler(*args, **kwargs):
+        futures.append(Future())
+        return futures[-1]
+
+    event_queue = EventQueue(handler, max_size=10, workers=1)
+    event_queue.start()
+    event_queue.submit("first")
+    event_queue.submit("second")
+    event_queue.shutdown()
+
+    # the only worker has run both jobs while the first one is still pending
+    assert len(futures) == 2
+    assert event_queue.metrics()["processed"] == 0
+    assert event_queue.metrics()["in_flight"] == 2
+    futures[0].set_result([])
+    futures[1].set_exception(Exception("boom"))
+    metrics = event_queue.metrics()
+    assert metrics["processed"] == 2
+    assert metrics["failed"] == 1
+    assert "Error when processing queued event." in caplog.text
+
+
+def test_futures_in_flight_are_bounded():
+    from concurrent.futures import Future
+    futures = []
+    started = threading.Semaphore(0)
+
+    def handler(*args, **kwargs):
+        futures.append(Future())
+        started.release()
+        return futures[-1]
+
+    event_queue = EventQueue(handler, max_size=1, workers=1, max_in_flight=1)
+    event_queue.start()
+    assert event_queue.submit("first")
+    assert started.acquire(timeout=5)
+    # the worker waits for the slot of the first job, the second one stays queued
+    assert event_queue.submit("second")
+    assert not event_queue.submit("third")
+    metrics = event_queue.metrics()
+    assert metrics["in_flight"] == 1
+    assert metrics["depth"] == 2
+    assert len(futures) == 1
+
+    futures[0].set_result([])
+    assert started.acquire(timeout=5)
+    futures[1].set_result([])
+    event_queue.shutdown()
+    metrics = event_queue.metrics()
+    assert metrics["processed"] == 2
+    assert metrics["in_flight"] == 0
+    assert metrics["rejected"] == 1
@@ -0,0 +1,44 @@
+import pytest
+from unittest.mock import MagicMock
+
+
+@pytest.fixture
+def mock_config(mock_config_base):
+    mock_config_base.http = MagicMock(pool_connections=3, pool_maxsize=7, keep_alive=True,
+                                      max_retries=2, backoff_factor=0.1)
+    return mock_config_base
+
+
+@pytest.fixture(autouse=True)
+def auto_patch(patch_bot_config):
+    yield
+
+
+def test_session_is_shared():
+    from backend.utils.http_session import get_http_session
+    assert get_http_session() is get_http_session()
+
+
+def test_session_uses_configured_pool():
+    from backend.utils.http_session import get_http_session
+    session = get_http_session()
+    adapter = session.get_adapter("https://example.com")
+    assert adapter is session.get_adapter("http://example.com")
+    assert adapter._pool_connections == 3
+    assert adapter._pool_maxsize == 7
+    assert adapter.max_retries.total == 2
+    assert adapter.max_retries.backoff_factor == 0.1
+    assert "Connection" not in session.headers or session.headers["Connection"] != "close"
+
+
+def test_session_without_keep_alive():
+    from backend.utils.http_session import create_http_session
+    session = create_http_session(keep_alive=False)
+    assert session.headers["Connection"] == "close"
+
+
+def test_post_is_not_retried_after_read_error():
+    from backend.utils.http_session import create_http_session
+    retry = create_http_session(max_retries=3).get_adapter("https://example.com").max_retries
+    assert not retry._is_method_retryable("POST")
+    assert retry._is_method_retryable("GET")
@@ -2,7 +2,7 @@ import pytest
 import json
 import os.path
 
-from backend.model.post import PostWebhook, PostAPI
+from backend.model.post import Post, PostWebhook, PostAPI, TrustedPost
 from backend.model.user import BasicUser
 
 
@@ -28,3 +28,77 @@ def test_init_api(test_data):
     post = PostAPI(**test_data["api"])
     assert post.id == 994
     assert isinstance(post.reply_to_user, BasicUser)
+
+
+
+@pytest.mark.parametrize("key", ["webhook_without_reply_to", "webhook_with_reply_to", "api"])
+def test_trusted_post_matches_validation(test_data, key):
+    post = Post(**test_data[key])
+    trusted_post = TrustedPost(test_data[key])
+    for name in Post.model_fields:
+        assert getattr(trusted_post, name) == getattr(post, name)
+    assert trusted_post.model_dump() == post.model_dump()
+    if test_data[key].get("reply_to_user") is not None:
+        assert isinstance(trusted_post.reply_to_user, BasicUser)
+
+
+def test_trusted_post_skips_validation():
+    post = TrustedPost({"id": "not an int", "unknown_field": 1})
+    assert post.id == "not an int"
+    assert post.primary_group_name is None
+    with pytest.raises(AttributeError):
+        _ = post.unknown_field
+    with pytest.raises(AttributeError, match="topic_id"):
+        _ = post.topic_id
+
+
+def test_timestamps_are_parsed_lazily(test_data):
+    from datetime import datetime, timezone
+    post = TrustedPost(test_data["webhook_with_reply_to"])
+    assert post.__dict__ == {}
+    assert post.created_at_datetime == datetime(2024, 5, 28, 17, 39, 9, 427000, tzinfo=timezone.utc)
+    assert Post(**test_data["webhook_with_reply_to"]).updated_at_datetime.tzinfo is not None
+    assert post.cooked_soup is post.cooked_soup
+
+
+@pytest.mark.parametrize("cooked, mentions", [
+    ('<p><a class="mention" href="/u/bot1">@bot1</a> 投掷</p>', {"bot1"}),
+    ('<p><a href="/u/bot1" class="mention">@bot1</a> <a class="mention" href="/u/user">@user</a></p>', {"bot1", "user"}),
+    ('<aside class="quote"><blockquote><p><a class="mention" href="/u/bot1">@bot1</a></p></blockquote></aside>', {"bot1"}),
+    ('<p><a class="mention-group" href="/g/bot1">@bot1</a></p>', set()),
+    ('<p><a class="mention" href="/u/bot2">@bot1</a></p>', set()),
+    ('<p><a class="mention" href="/u/bot1">bot1</a></p>', set()),
+    ('<p><a href="/u/bot1">@bot1</a></p>', set()),
+    ('<p><a class="mention" href="/u/a&amp;b">@a&amp;b</a></p>', {"a&b"}),
+    ('<p>@bot1 mention</p>', set()),
+])
+def test_scan_mentions(cooked, mentions):
+    from bs4 import BeautifulSoup
+    from backend.model.addressing import scan_mentions
+    assert scan_mentions(cooked) == mentions
+    # same result as looking up the mention anchors in the soup
+    soup = BeautifulSoup(cooked, 'lxml')
+    assert {
+        tag.get_text()[1:] for tag in soup.find_all('a')
+        if tag.get('class') == ['mention'] and tag.get('href') == f"/u/{tag.get_text()[1:]}"
+        and tag.get_text().startswith('@')
+    } == mentions
+
+
+@pytest.mark.parametrize("post_class", [Post, TrustedPost])
+def test_addressing(test_data, post_class):
+    data = dict(test_data["webhook_with_reply_to"])
+    data["cooked"] = '<p><a class="mention" href="/u/bot1">@bot1</a> hi</p>'
+    post = post_class(**data) if post_class is Post else post_class(data)
+    addressing = post.addressing
+    assert addressing.author == data["username"]
+    assert addressing.mentions == {"bot1"}
+    assert addressing.reply_to == data["reply_to_user"]["username"]
+    assert post.addressing is addressing
+    assert "cooked_soup" not in post.__dict__
+
+
+def test_addressing_without_reply_to_user(test_data):
+    post = Post(**test_data["webhook_without_reply_to"])
+    assert post.addressing.reply_to is None
+    assert post.addressing.mentions == frozenset()
@@ -2,7 +2,7 @@ import pytest
 import json
 import os.path
 
-from backend.model.topic import Topic
+from backend.model.topic import Topic, TrustedTopic
 from backend.model.user import BasicUser
 
 
@@ -16,3 +16,13 @@ def test_init_topic(test_data):
     topic = Topic(**test_data["topic"])
     assert topic.id == 25
     assert isinstance(topic.created_by, BasicUser)
+
+
+
+def test_trusted_topic(test_data):
+    topic = Topic(**test_data["topic"])
+    trusted_topic = TrustedTopic(test_data["topic"])
+    assert trusted_topic.model_dump() == topic.model_dump()
+    assert trusted_topic.title == topic.title
+    assert isinstance(trusted_topic.created_by, BasicUser)
+    assert trusted_topic.created_at_datetime == topic.created_at_datetime
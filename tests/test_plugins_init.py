@@ -1,3 +1,6 @@
+import os
+import pkgutil
+
 import pytest
 from unittest.mock import patch, MagicMock
 
@@ -82,3 +85,57 @@ def test_load_plugins(patch_bot_config, bypass_db_init, mock_pkgutil, mock_impor
     BotManager.register_bot_action.assert_any_call(mock_module2.BotAction2)
     BotManager.register_bot_action.assert_any_call(mock_module3.BotAction3)
     assert mock_module4.BotAction4 not in BotManager.register_bot_action.call_args_list
+
+
+def test_declared_config_keys(patch_bot_config, tmp_path):
+    from backend.plugins import declared_config_keys
+    (tmp_path / "declared").mkdir()
+    (tmp_path / "declared" / "__init__.py").write_text(
+        'raise ImportError("must not be imported")\n__action_config_keys__ = ["Key1", "Key2"]\n')
+    (tmp_path / "undeclared").mkdir()
+    (tmp_path / "undeclared" / "__init__.py").write_text('__all__ = []\n')
+    assert declared_config_keys(str(tmp_path / "declared")) == ["Key1", "Key2"]
+    assert declared_config_keys(str(tmp_path / "undeclared")) is None
+    assert declared_config_keys(str(tmp_path / "missing")) is None
+
+
+def test_load_plugins_skips_disabled_plugins(patch_bot_config, bypass_db_init, mock_pkgutil, mock_importlib):
+    import backend.plugins as plugins
+    from backend.bot_action import BotAction
+    from backend.bot_manager import bot_manager as BotManager
+    BotManager.register_bot_action = MagicMock()
+    patch_bot_config.action_custom_config = {"Enabled": {"enabled": True}, "Disabled": {"enabled": False}}
+    mock_pkgutil.return_value = [
+        (None, 'enabled_plugin', True),
+        (None, 'disabled_plugin', True),
+        (None, 'unconfigured_plugin', True),
+        (None, 'undeclared_plugin', True),
+    ]
+    mock_module = MagicMock()
+    mock_module.__all__ = ['Action']
+    mock_module.Action = type('Action', (BotAction,), {'action_name': 'Enabled'})
+    mock_importlib.return_value = mock_module
+    config_keys = {
+        'enabled_plugin': ['Disabled', 'Enabled'],
+        'disabled_plugin': ['Disabled'],
+        'unconfigured_plugin': ['Unconfigured'],
+        'undeclared_plugin': None,
+    }
+
+    with patch.object(plugins, "declared_config_keys", side_effect=lambda path: config_keys[os.path.basename(path)]):
+        timings = plugins.load_plugins()
+
+    assert [call.args[0] for call in mock_importlib.call_args_list] == [
+        'backend.plugins.enabled_plugin', 'backend.plugins.undeclared_plugin']
+    assert set(timings) == {'enabled_plugin', 'undeclared_plugin'}
+    assert timings['enabled_plugin']['import'] >= 0
+    assert BotManager.register_bot_action.call_count == 2
+
+
+def test_plugins_declare_config_keys(patch_bot_config):
+    import backend.plugins
+    from backend.plugins import declared_config_keys
+    package_path = os.path.dirname(backend.plugins.__file__)
+    for _, module_name, is_pkg in pkgutil.iter_modules([package_path]):
+        if is_pkg and not module_name.startswith('_'):
+            assert declared_config_keys(os.path.join(package_path, module_name)), module_name
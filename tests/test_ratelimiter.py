@@ -0,0 +1,201 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+@pytest.fixture(autouse=True)
+def auto_patch(patch_bot_config):
+    yield
+
+
+def make_response(status_code, headers=None, body=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = body or {}
+    return response
+
+
+def test_token_bucket_burst_then_rate():
+    from backend.utils.ratelimiter import TokenBucket
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+
+
+def test_token_bucket_backoff():
+    from backend.utils.ratelimiter import TokenBucket
+    bucket = TokenBucket(rate=1, burst=10)
+    bucket.backoff(30)
+    assert bucket.reserve() == pytest.approx(30, abs=0.05)
+    assert bucket.reserve() == pytest.approx(31, abs=0.05)
+
+
+def test_token_bucket_invalid_arguments():
+    from backend.utils.ratelimiter import TokenBucket
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, burst=1)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, burst=0)
+
+
+@pytest.mark.parametrize("method, url, expected", [
+    ("POST", "https://example.com/posts.json", "post"),
+    ("GET", "https://example.com/posts/1.json", "default"),
+    ("POST", "https://example.com/uploads.json?upload_type=composer", "upload"),
+    ("PUT", "https://example.com/t/123/status", "topic_status"),
+    ("POST", "https://example.com/g/bot/reports/12/run.json", "data_explorer"),
+    ("GET", "https://example.com/t/123.json", "default"),
+])
+def test_classify_endpoint(method, url, expected):
+    from backend.utils.ratelimiter import classify_endpoint
+    assert classify_endpoint(method, url) == expected
+
+
+def test_parse_retry_after():
+    from backend.utils.ratelimiter import parse_retry_after, DEFAULT_RETRY_AFTER
+    assert parse_retry_after(make_response(429, headers={"Retry-After": "7"})) == 7
+    assert parse_retry_after(make_response(429, body={"extras": {"wait_seconds": 3}})) == 3
+    response = make_response(429)
+    response.json.side_effect = ValueError
+    assert parse_retry_after(response) == DEFAULT_RETRY_AFTER
+
+
+def test_buckets_per_account_and_class():
+    from backend.utils.ratelimiter import RateLimiter
+    limiter = RateLimiter({"default": (1, 1), "post": (1, 1)})
+    assert limiter.reserve("bot1", "post") == 0
+    assert limiter.reserve("bot1", "post") > 0
+    assert limiter.reserve("bot2", "post") == 0
+    assert limiter.reserve("bot1", "upload") == 0
+    # classes without limits share the default configuration, not the bucket
+    assert limiter.reserve("bot1", "topic_status") == 0
+    assert RateLimiter({}).reserve("bot1", "post") == 0
+
+
+def test_call_retries_after_rate_limit():
+    from backend.utils.ratelimiter import RateLimiter
+    limiter = RateLimiter({"default": (100, 100)}, max_retries=2, max_retry_wait=10)
+    send = MagicMock(side_effect=[
+        make_response(429, headers={"Retry-After": "2"}),
+        make_response(200),
+    ])
+    with patch("backend.utils.ratelimiter.time.sleep") as mock_sleep:
+        response = limiter.call("bot1", "POST", "https://example.com/posts.json", send)
+    assert response.status_code == 200
+    assert send.call_count == 2
+    assert mock_sleep.call_args[0][0] == pytest.approx(2, abs=0.05)
+
+
+def test_call_gives_up_on_long_retry_after():
+    from backend.utils.ratelimiter import RateLimiter
+    limiter = RateLimiter({"default": (100, 100)}, max_retries=2, max_retry_wait=10)
+    send = MagicMock(return_value=make_response(429, headers={"Retry-After": "60"}))
+    response = limiter.call("bot1", "POST", "https://example.com/posts.json", send)
+    assert response.status_code == 429
+    assert send.call_count == 1
+    # the bucket is blocked for the following requests
+    assert limiter.reserve("bot1", "post") == pytest.approx(60, abs=0.05)
+
+
+def test_call_fails_fast_while_backing_off():
+    from fluent_discourse import RateLimitError
+    from backend.utils.ratelimiter import RateLimiter
+    limiter = RateLimiter({"default": (100, 100)}, max_retries=2, max_retry_wait=10)
+    limiter.backoff("bot1", "post", 600)
+    send = MagicMock(return_value=make_response(200))
+
+    with patch("backend.utils.ratelimiter.time.sleep") as mock_sleep:
+        with pytest.raises(RateLimitError):
+            limiter.call("bot1", "POST", "https://example.com/posts.json", send)
+        with pytest.raises(RateLimitError):
+            asyncio.run(limiter.call_async("bot1", "POST", "https://example.com/posts.json", send))
+    mock_sleep.assert_not_called()
+    send.assert_not_called()
+    # the token is given back, the failed calls do not extend the wait
+    assert limiter.wait_time("bot1", "post") == pytest.approx(600, abs=0.05)
+    assert limiter.wait_time("bot2", "post") == 0
+
+
+def test_call_async_retries_after_rate_limit():
+    from backend.utils.ratelimiter import RateLimiter
+    limiter = RateLimiter({"default": (100, 100)}, max_retries=1, max_retry_wait=10)
+    responses = [make_response(429, headers={"Retry-After": "0.01"}), make_response(200)]
+
+    async def send():
+        return responses.pop(0)
+
+    response = asyncio.run(limiter.call_async("bot1", "GET", "https://example.com/t/1.json", send))
+    assert response.status_code == 200
+    assert responses == []
+
+
+def test_redis_bucket_falls_back_to_local_bucket(caplog):
+    from backend.utils.ratelimiter import RedisTokenBucket
+    redis_client = MagicMock()
+    script = MagicMock(return_value=b"1.5")
+    redis_client.register_script.return_value = script
+    bucket = RedisTokenBucket(redis_client, "ratelimit:bot1:post", rate=1, burst=1)
+
+    assert bucket.reserve() == 1.5
+    script.assert_called_once_with(keys=["ratelimit:bot1:post"], args=[1, 1, 1, 0])
+
+    script.side_effect = Exception("Connection Error")
+    assert bucket.reserve() == 0
+    assert "using local bucket" in caplog.text
+
+
+def test_rate_limiter_disabled():
+    from backend.utils.ratelimiter import get_rate_limiter, rate_limited_call
+    assert get_rate_limiter() is None
+    send = MagicMock(return_value="response")
+    assert rate_limited_call("bot1", "GET", "https://example.com/t/1.json", send) == "response"
+
+
+def test_rate_limiter_from_config(patch_bot_config):
+    patch_bot_config.rate_limit = MagicMock(
+        enabled=True, use_redis=False, max_retries=1, max_retry_wait=5,
+        buckets={"post": MagicMock(rate=0.5, burst=2)})
+    from backend.utils.ratelimiter import get_rate_limiter
+    limiter = get_rate_limiter()
+    assert limiter is get_rate_limiter()
+    assert limiter.bucket_limits == {"post": (0.5, 2)}
+    assert limiter.redis_client is None
+    assert limiter.max_retries == 1
+
+
+def test_reserved_call_takes_the_token_once(patch_bot_config):
+    patch_bot_config.rate_limit = MagicMock(
+        enabled=True, use_redis=False, max_retries=0, max_retry_wait=5,
+        buckets={"default": MagicMock(rate=1, burst=1)})
+    from backend.utils.ratelimiter import get_rate_limiter, rate_limited_call, reserved_call
+    url = "https://example.com/g/bot/reports/12/run.json"
+    send = MagicMock(return_value=make_response(200))
+
+    with patch("backend.utils.ratelimiter.time.sleep") as mock_sleep:
+        with reserved_call("bot1", "POST", url):
+            mock_sleep.assert_not_called()
+            rate_limited_call("bot1", "POST", url, send)
+        mock_sleep.assert_not_called()
+        # the bucket is empty, the next request waits
+        rate_limited_call("bot1", "POST", url, send)
+        assert mock_sleep.call_args[0][0] == pytest.approx(1, abs=0.05)
+    assert send.call_count == 2
+    assert get_rate_limiter().reserve("bot1", "data_explorer") == pytest.approx(2, abs=0.05)
+
+
+def test_reserved_call_fails_fast_while_backing_off(patch_bot_config):
+    patch_bot_config.rate_limit = MagicMock(
+        enabled=True, use_redis=False, max_retries=0, max_retry_wait=5,
+        buckets={"default": MagicMock(rate=1, burst=1)})
+    from fluent_discourse import RateLimitError
+    from backend.utils.ratelimiter import get_rate_limiter, reserved_call
+    url = "https://example.com/g/bot/reports/12/run.json"
+    get_rate_limiter().backoff("bot1", "data_explorer", 600)
+
+    with patch("backend.utils.ratelimiter.time.sleep") as mock_sleep:
+        with pytest.raises(RateLimitError):
+            with reserved_call("bot1", "POST", url):
+                pass
+    mock_sleep.assert_not_called()
@@ -128,4 +128,11 @@ def test_exception_in_function(caplog):
     client.get = MagicMock(return_value=None)
     client.set = MagicMock()
     with pytest.raises(RuntimeError):
-        test_function(5)
\ No newline at end of file
+        test_function(5)
+
+
+def test_get_redis_client():
+    import backend.utils.redis_cache as redis_cache
+    assert redis_cache.get_redis_client() is redis_cache.RedisClient().client
+    with patch.object(redis_cache, "_redis_available", False):
+        assert redis_cache.get_redis_client() is None
@@ -0,0 +1,117 @@
+from unittest.mock import MagicMock
+
+from scheduler_leader import FileLeaderLock, RedisLeaderLock, SchedulerLeader
+
+
+class FakeLock:
+    def __init__(self):
+        self.available = True
+        self.held = False
+
+    def acquire(self):
+        if self.available and not self.held:
+            self.held = True
+        return self.held
+
+    def renew(self):
+        return self.held
+
+    def release(self):
+        self.held = False
+
+
+def create_leader(lock):
+    return SchedulerLeader(lock, on_elected=MagicMock(), on_demoted=MagicMock(), interval=60)
+
+
+def test_file_lock_elects_one_holder(tmp_path):
+    path = str(tmp_path / "scheduler.lock")
+    first, second = FileLeaderLock(path), FileLeaderLock(path)
+
+    assert first.acquire() is True
+    assert second.acquire() is False
+    assert first.renew() is True
+    assert second.renew() is False
+
+    first.release()
+    assert first.renew() is False
+    assert second.acquire() is True
+    second.release()
+
+
+def test_redis_lock_commands():
+    redis_client = MagicMock()
+    redis_client.set.return_value = True
+    redis_client.eval.return_value = 1
+    lock = RedisLeaderLock(redis_client, key="leader", ttl=30, identity="worker-1")
+
+    assert lock.acquire() is True
+    redis_client.set.assert_called_once_with("leader", "worker-1", nx=True, px=30000)
+    assert lock.renew() is True
+    assert redis_client.eval.call_args.args[1:] == (1, "leader", "worker-1", 30000)
+
+    redis_client.set.return_value = None
+    redis_client.eval.return_value = 0
+    assert lock.acquire() is False
+    assert lock.renew() is False
+
+
+def test_leader_is_elected_and_demoted():
+    lock = FakeLock()
+    leader = create_leader(lock)
+
+    leader.step()
+    assert leader.is_leader
+    leader.on_elected.assert_called_once_with()
+
+    leader.step()
+    leader.on_elected.assert_called_once_with()
+    leader.on_demoted.assert_not_called()
+
+    # the lease expired and was taken by another worker
+    lock.held = False
+    lock.available = False
+    leader.step()
+    assert not leader.is_leader
+    leader.on_demoted.assert_called_once_with()
+
+    leader.step()
+    assert not leader.is_leader
+
+
+def test_follower_takes_over_when_leader_stops(tmp_path):
+    path = str(tmp_path / "scheduler.lock")
+    leader = create_leader(FileLeaderLock(path))
+    follower = create_leader(FileLeaderLock(path))
+
+    leader.step()
+    follower.step()
+    assert leader.is_leader and not follower.is_leader
+    follower.on_elected.assert_not_called()
+
+    leader.stop()
+    leader.on_demoted.assert_called_once_with()
+    follower.step()
+    assert follower.is_leader
+    follower.on_elected.assert_called_once_with()
+    assert follower.metrics() == {"is_leader": True, "elections": 1, "lock": "FileLeaderLock"}
+    follower.stop()
+
+
+def test_lock_errors_are_not_leadership():
+    lock = MagicMock()
+    lock.acquire.side_effect = ConnectionError("redis is down")
+    leader = create_leader(lock)
+
+    leader.step()
+    assert not leader.is_leader
+
+    lock.acquire.side_effect = None
+    lock.acquire.return_value = True
+    leader.step()
+    assert leader.is_leader
+
+    lock.renew.side_effect = ConnectionError("redis is down")
+    leader.step()
+    assert not leader.is_leader
+    leader.on_demoted.assert_called_once_with()
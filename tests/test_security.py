@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+import pytest
+
+from security import IPMatcher, extract_real_ip, in_whitelist, verify_ip_address
+
+
+def make_request(remote_addr, x_forwarded_for=None):
+    headers = {}
+    if x_forwarded_for is not None:
+        headers['X-Forwarded-For'] = x_forwarded_for
+    return SimpleNamespace(remote_addr=remote_addr, headers=headers)
+
+
+def test_ipv4():
+    matcher = IPMatcher(["10.0.0.0/8", "192.168.1.1", "172.16.0.0/12"])
+    assert len(matcher) == 3
+    assert "10.1.2.3" in matcher
+    assert "192.168.1.1" in matcher
+    assert "172.31.255.255" in matcher
+    assert "192.168.1.2" not in matcher
+    assert "172.32.0.0" not in matcher
+    assert "9.255.255.255" not in matcher
+    assert "11.0.0.0" not in matcher
+
+
+def test_ipv6():
+    matcher = IPMatcher(["2001:db8::/32", "::1"])
+    assert "2001:db8::1" in matcher
+    assert "2001:db8:ffff:ffff:ffff:ffff:ffff:ffff" in matcher
+    assert "2001:db9::" not in matcher
+    assert "::1" in matcher
+    assert "::2" not in matcher
+
+
+def test_mixed_versions():
+    matcher = IPMatcher(["0.0.0.0/8", "::/120"])
+    # the integer values overlap, the versions must not
+    assert "0.0.0.1" in matcher
+    assert "::1" in matcher
+    assert "1.0.0.0" not in matcher
+    assert "::1:0" not in matcher
+    assert "::ffff:0.0.0.5" in matcher
+
+
+def test_overlapping_and_adjacent_networks():
+    matcher = IPMatcher(["10.0.0.0/24", "10.0.0.128/25", "10.0.1.0/24", "10.0.3.0/24"])
+    assert "10.0.0.200" in matcher
+    assert "10.0.1.255" in matcher
+    assert "10.0.2.0" not in matcher
+    assert "10.0.3.0" in matcher
+
+
+def test_invalid_values():
+    matcher = IPMatcher(["10.0.0.0/8"])
+    assert "not an ip" not in matcher
+    assert None not in matcher
+    # host bits are ignored like in ipaddress.ip_network(strict=False)
+    assert "10.0.0.1" in IPMatcher(["10.0.0.1/8"])
+    with pytest.raises(ValueError):
+        IPMatcher(["10.0.0.0/33"])
+
+
+def test_empty():
+    matcher = IPMatcher([])
+    assert not matcher
+    assert "10.0.0.1" not in matcher
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_verify_ip_address(compiled):
+    whitelist = ["10.0.0.0/8", "2001:db8::/32"]
+    proxies = ["127.0.0.1", "192.168.0.0/16"]
+    if compiled:
+        whitelist, proxies = IPMatcher(whitelist), IPMatcher(proxies)
+    assert verify_ip_address(make_request("10.0.0.1"), whitelist, proxies)
+    assert verify_ip_address(make_request("2001:db8::1"), whitelist, proxies)
+    assert not verify_ip_address(make_request("8.8.8.8"), whitelist, proxies)
+    assert verify_ip_address(make_request("127.0.0.1", "10.0.0.5, 192.168.3.4"), whitelist, proxies)
+    assert not verify_ip_address(make_request("127.0.0.1", "8.8.8.8, 192.168.3.4"), whitelist, proxies)
+    # X-Forwarded-For is ignored when the request does not come from a proxy
+    assert not verify_ip_address(make_request("8.8.8.8", "10.0.0.5"), whitelist, proxies)
+    assert verify_ip_address(make_request("8.8.8.8"), [], proxies)
+
+
+def test_extract_real_ip():
+    proxies = IPMatcher(["127.0.0.1", "192.168.0.0/16"])
+    assert extract_real_ip(make_request("127.0.0.1", "192.168.1.1, 1.2.3.4"), proxies) == "1.2.3.4"
+    assert extract_real_ip(make_request("127.0.0.1", "192.168.1.1"), proxies) == "127.0.0.1"
+    assert extract_real_ip(make_request("1.2.3.4", "5.6.7.8"), proxies) == "1.2.3.4"
+    assert extract_real_ip(make_request("127.0.0.1", "5.6.7.8"), IPMatcher()) == "127.0.0.1"
+
+
+def test_in_whitelist():
+    assert in_whitelist("10.0.0.1", ["10.0.0.0/8"])
+    assert in_whitelist("10.0.0.1", IPMatcher(["10.0.0.1"]))
+    assert not in_whitelist("10.0.0.1", ["10.0.0.2"])
@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+from backend.utils.aho_corasick import AhoCorasick
+
+
+def test_find():
+    matcher = AhoCorasick(["he", "she", "his", "hers"])
+    assert matcher.find("ushers") == {"she", "he", "hers"}
+    assert matcher.find("this") == {"his"}
+    assert matcher.find("nothing here") == {"he"}
+    assert matcher.find("") == set()
+
+
+def test_find_cjk_keywords():
+    matcher = AhoCorasick(["投掷", "我的2025报告", "我的2025发帖报告"])
+    assert matcher.find("@bot 投掷 1d6") == {"投掷"}
+    assert matcher.find("@bot 我的2025发帖报告") == {"我的2025发帖报告"}
+    assert matcher.find("@bot 我的2025报告") == {"我的2025报告"}
+
+
+def test_empty_keyword():
+    with pytest.raises(ValueError):
+        AhoCorasick(["a", ""])
+
+
+def test_matches_substring_search():
+    rng = random.Random(0)
+    for _ in range(500):
+        keywords = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4)))
+                    for _ in range(rng.randint(1, 8))]
+        text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 30)))
+        assert AhoCorasick(keywords).find(text) == {keyword for keyword in keywords if keyword in text}
@@ -0,0 +1,78 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from webhook_dedup import WebhookDeduplicator
+
+
+def test_duplicate_event():
+    dedup = WebhookDeduplicator(max_size=10, ttl=60)
+    assert not dedup.check_and_mark("event-1")
+    assert dedup.check_and_mark("event-1")
+    assert not dedup.check_and_mark("event-2")
+    assert dedup.metrics() == {"size": 2, "max_size": 10, "duplicates": 1}
+
+
+def test_missing_event_id():
+    dedup = WebhookDeduplicator()
+    assert not dedup.check_and_mark(None)
+    assert not dedup.check_and_mark(None)
+    assert not dedup.check_and_mark("")
+
+
+def test_bounded_size():
+    dedup = WebhookDeduplicator(max_size=2, ttl=60)
+    for event_id in ("event-1", "event-2", "event-3"):
+        dedup.check_and_mark(event_id)
+    assert dedup.metrics()["size"] == 2
+    # the oldest id is evicted
+    assert not dedup.check_and_mark("event-1")
+    assert dedup.check_and_mark("event-3")
+
+
+def test_ttl():
+    dedup = WebhookDeduplicator(max_size=10, ttl=60)
+    with patch("webhook_dedup.time.monotonic", return_value=1000):
+        assert not dedup.check_and_mark("event-1")
+    with patch("webhook_dedup.time.monotonic", return_value=1059):
+        assert dedup.check_and_mark("event-1")
+    with patch("webhook_dedup.time.monotonic", return_value=1061):
+        assert not dedup.check_and_mark("event-1")
+
+
+def test_forget():
+    dedup = WebhookDeduplicator()
+    dedup.check_and_mark("event-1")
+    dedup.forget("event-1")
+    assert not dedup.check_and_mark("event-1")
+
+
+def test_redis():
+    redis_client = MagicMock()
+    redis_client.set.side_effect = [True, None]
+    dedup = WebhookDeduplicator(ttl=60, redis_client=redis_client)
+
+    assert not dedup.check_and_mark("event-1")
+    redis_client.set.assert_called_once_with("webhook_event:event-1", 1, nx=True, ex=60)
+    # received by another worker
+    assert dedup.check_and_mark("event-2")
+    # known locally, Redis is not asked again
+    assert dedup.check_and_mark("event-1")
+    assert redis_client.set.call_count == 2
+
+    dedup.forget("event-1")
+    redis_client.delete.assert_called_once_with("webhook_event:event-1")
+
+
+def test_redis_error(caplog):
+    redis_client = MagicMock()
+    redis_client.set.side_effect = Exception("Connection refused")
+    dedup = WebhookDeduplicator(redis_client=redis_client)
+    assert not dedup.check_and_mark("event-1")
+    assert dedup.check_and_mark("event-1")
+    assert "Failed to check webhook event event-1 in Redis" in caplog.text
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        WebhookDeduplicator(max_size=0)
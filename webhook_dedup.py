@@ -0,0 +1,77 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookDeduplicator:
+    """
+    Remember the ids of recently received webhook events, so that the events
+    Discourse redelivers (e.g. after a timeout) are only handled once.
+
+    Ids are kept in a bounded LRU for `ttl` seconds. With a `redis_client`
+    they are also stored in Redis, shared by every worker and replica.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600, redis_client=None,
+                 key_prefix: str = "webhook_event"):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive.")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis_client = redis_client
+        self.key_prefix = key_prefix
+        self._seen: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        self._duplicates = 0
+
+    def _redis_key(self, event_id: str) -> str:
+        return f"{self.key_prefix}:{event_id}"
+
+    def check_and_mark(self, event_id: str | None) -> bool:
+        """Mark the event as received, return True if it was already received."""
+        if not event_id:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._seen.get(event_id)
+            duplicate = expires_at is not None and expires_at > now
+            if not duplicate:
+                self._seen[event_id] = now + self.ttl
+                self._seen.move_to_end(event_id)
+                while len(self._seen) > self.max_size:
+                    self._seen.popitem(last=False)
+        if not duplicate and self.redis_client is not None:
+            try:
+                # SET NX only succeeds for the first worker receiving the event
+                duplicate = not self.redis_client.set(
+                    self._redis_key(event_id), 1, nx=True, ex=max(int(self.ttl), 1))
+            except Exception as e:
+                logger.warning(f"Failed to check webhook event {event_id} in Redis: {e}")
+        if duplicate:
+            with self._lock:
+                self._duplicates += 1
+            logger.info(f"Skip duplicated webhook event {event_id}.")
+        return duplicate
+
+    def forget(self, event_id: str | None):
+        """Forget an event which could not be handled, so that its redelivery is accepted."""
+        if not event_id:
+            return
+        with self._lock:
+            self._seen.pop(event_id, None)
+        if self.redis_client is not None:
+            try:
+                self.redis_client.delete(self._redis_key(event_id))
+            except Exception as e:
+                logger.warning(f"Failed to forget webhook event {event_id} in Redis: {e}")
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._seen),
+                "max_size": self.max_size,
+                "duplicates": self._duplicates,
+            }